@@ -0,0 +1,120 @@
+"""
+Rolling Conversation Summary
+Both agents see the conversation so far without the prompt growing with the
+thread. The summary lives in the state (`conversation_summary`) and is
+updated once per message from the previous summary and that message alone:
+
+- the last MAX_RECENT_ENTRIES messages, one line each (what we offered, and
+  the customer's intent with a short quote of their reply)
+- older lines are folded into per-strategy / per-intent counts
+- entities the extractor found (dates, amounts, plan names), latest value
+  per key, at most MAX_FACTS keys
+
+No Claude call is made: each update is O(1) in the thread length and the
+rendered text is capped at MAX_SUMMARY_CHARS (roughly 150 tokens), so per-turn
+prompt size stays flat however long the thread runs.
+"""
+from typing import Dict, List, Optional
+
+MAX_RECENT_ENTRIES = 6
+MAX_QUOTE_CHARS = 80
+MAX_FACTS = 6
+MAX_FACT_CHARS = 40
+MAX_SUMMARY_CHARS = 600
+
+# How each negotiation strategy reads in the summary
+STRATEGY_SUMMARIES = {
+    'initial_outreach_with_bridge_offer': 'introduced the $4.99/month Digital Keeper (Bridge) Plan',
+    'request_clarification': 'asked which option they meant (extension or Digital Keeper Plan)',
+    'confirm_payment_extension': 'confirmed a 14-day payment extension',
+    'explain_bridge_plan_details': 'explained what the Digital Keeper Plan includes',
+    'offer_payment_extension': 'offered a 14-day extension or the Digital Keeper Plan',
+    'offer_payment_update_or_cancel': 'offered to update the payment method or cancel',
+    'confirm_bridge_activation': 'confirmed the Digital Keeper Plan is active',
+    'default_acknowledgment': 'acknowledged and promised a follow-up',
+}
+
+
+def empty_summary() -> Dict:
+    return {'messages': 0, 'recent': [], 'earlier_offers': {}, 'earlier_intents': {}, 'facts': {}}
+
+
+def add_agent_message(summary: Optional[Dict], strategy: str) -> Dict:
+    """Summary after we send a message with `strategy`"""
+    return _append(summary, {'role': 'assistant', 'strategy': strategy})
+
+
+def add_customer_message(summary: Optional[Dict], message: str, intent: str,
+                         entities: Optional[Dict] = None) -> Dict:
+    """Summary after a customer reply classified as `intent`"""
+    quote = ' '.join(message.split())
+    if len(quote) > MAX_QUOTE_CHARS:
+        quote = quote[:MAX_QUOTE_CHARS - 1] + '…'
+    updated = _append(summary, {'role': 'user', 'intent': intent, 'quote': quote})
+
+    facts = dict(updated['facts'])
+    for key, value in (entities or {}).items():
+        if value in (None, '', [], {}):
+            continue
+        facts.pop(key, None)  # re-inserted as the most recent
+        facts[key] = str(value)[:MAX_FACT_CHARS]
+    while len(facts) > MAX_FACTS:
+        facts.pop(next(iter(facts)))
+    updated['facts'] = facts
+    return updated
+
+
+def _append(summary: Optional[Dict], entry: Dict) -> Dict:
+    """Copy of the summary with `entry` added and the oldest recent entries folded into counts"""
+    summary = summary or empty_summary()
+    recent = summary['recent'] + [entry]
+    earlier_offers = dict(summary['earlier_offers'])
+    earlier_intents = dict(summary['earlier_intents'])
+    while len(recent) > MAX_RECENT_ENTRIES:
+        oldest = recent.pop(0)
+        if oldest['role'] == 'assistant':
+            earlier_offers[oldest['strategy']] = earlier_offers.get(oldest['strategy'], 0) + 1
+        else:
+            earlier_intents[oldest['intent']] = earlier_intents.get(oldest['intent'], 0) + 1
+    return {
+        'messages': summary['messages'] + 1,
+        'recent': recent,
+        'earlier_offers': earlier_offers,
+        'earlier_intents': earlier_intents,
+        'facts': dict(summary['facts'])
+    }
+
+
+def render_summary(summary: Optional[Dict]) -> str:
+    """Prompt text for the summary ('' before any message), at most MAX_SUMMARY_CHARS"""
+    if not summary or not summary['messages']:
+        return ''
+
+    lines: List[str] = []
+    for entry in summary['recent']:
+        if entry['role'] == 'assistant':
+            lines.append(f"- We {_describe(entry['strategy'])}")
+        else:
+            lines.append(f"- Customer ({entry['intent']}): \"{entry['quote']}\"")
+    if summary['facts']:
+        lines.append('Known: ' + ', '.join(f'{key}={value}' for key, value in summary['facts'].items()))
+
+    folded = summary['messages'] - len(summary['recent'])
+    if folded:
+        # Customer intents first: they matter most and survive truncation
+        parts = [f"customer {intent}" + (f" (x{count})" if count > 1 else '')
+                 for intent, count in summary['earlier_intents'].items()]
+        parts += [f"we {_describe(strategy)}" + (f" (x{count})" if count > 1 else '')
+                  for strategy, count in summary['earlier_offers'].items()]
+        earlier = f"Earlier ({folded} messages): " + '; '.join(parts)
+        # The folded history gives way first when the summary is over budget
+        room = MAX_SUMMARY_CHARS - sum(len(line) + 1 for line in lines)
+        if len(earlier) > room:
+            earlier = earlier[:max(0, room - 1)] + '…'
+        lines.insert(0, earlier)
+
+    return '\n'.join(lines)[:MAX_SUMMARY_CHARS]
+
+
+def _describe(strategy: str) -> str:
+    return STRATEGY_SUMMARIES.get(strategy, strategy.replace('_', ' '))
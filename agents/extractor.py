@@ -2,21 +2,128 @@
 Extractor Agent: Intent Understanding and NLU
 Uses Claude to extract user intent from free-form text responses
 """
-import os
-import json
-from anthropic import Anthropic
-from state import AgentState, ExtractorOutput
-from dotenv import load_dotenv
+import threading
+from typing import Callable, List, Optional
+from state import AgentState, ExtractorOutput, EXTRACTION_KEYWORD, EXTRACTION_MODEL
+from agents import llm
+from agents.intent_batcher import IntentBatcher, batcher_from_env
+from agents.conversation_summary import add_customer_message, render_summary
+from agents.intent_cache import context_signature, get_intent_cache
+from agents.keyword_matcher import KeywordMatcher
+from agents.model_router import tier_for, escalation_tier
+from utils.telemetry import INTENTS, Counter, get_registry
+from utils.schema_validator import SchemaError, compile_validator
+from utils.llm_costs import (
+    usage_scope, budget_mode, attach_record, current_campaign_id, BUDGET_NORMAL, BUDGET_TEMPLATE
+)
 
-load_dotenv()
 
-client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+# Stable instruction block sent as the cacheable system prefix of every
+# classification call (see llm.cached_system); only the reply and its
+# context change from call to call
+EXTRACTOR_SYSTEM = """You are an intent classification system for a veterinary payment system.
 
+Each request gives the user's message, the conversation context and the last assistant message.
 
-def extract_intent(user_message: str, conversation_context: str = "", last_assistant_message: str = "") -> ExtractorOutput:
+IMPORTANT RULE: If the last assistant message offered MULTIPLE OPTIONS (e.g., "Option A or Option B?", "Which would you prefer?")
+and the user responds with just "yes", "ok", "sure" WITHOUT specifying which option, classify as "ambiguous_acceptance".
+
+Classify the user's intent into ONE of these categories:
+1. accept_bridge - User EXPLICITLY agrees to Digital Keeper Plan (e.g., "yes to keeper plan", "do the $4.99 plan", "switch to keeper")
+2. accept_extension - User EXPLICITLY chooses payment extension (e.g., "yes to extension", "give me 14 days", "keep premium for now")
+3. ambiguous_acceptance - User says yes/ok/sure but multiple options were offered and they didn't specify which (IMPORTANT!)
+4. decline_bridge - User rejects Bridge Plan (e.g., "no thanks", "not interested", "just cancel")
+5. financial_hardship - User mentions money problems (e.g., "can't afford", "don't have money", "tight on cash")
+6. ask_for_more_info - User wants details (e.g., "what's included?", "tell me more")
+7. cancel_request - User wants to cancel (e.g., "cancel my plan", "I'm done")
+8. update_payment - User offers new payment method (e.g., "I'll update my card")
+9. ask_for_time - User needs extension (e.g., "give me a week", "need more time")
+
+Answer by calling the record_intent tool with the intent, your confidence (0-1), a brief
+reasoning and any entities mentioned (dates, amounts, plan names)."""
+
+# Batched classification (agents/intent_batcher.py): the same rules, applied
+# to several numbered replies from different conversations in one call
+EXTRACTOR_BATCH_SYSTEM = EXTRACTOR_SYSTEM + """
+
+BATCH MODE: the request contains several numbered replies ("Reply 1", "Reply 2", ...), each from a
+different conversation with its own context and last assistant message. Classify each reply
+independently using the rules above.
+
+Answer by calling the record_intents tool once, with one entry per reply carrying its reply
+number as "id"."""
+
+# Output budget per reply in a batched call (a single call allows 300)
+BATCH_TOKENS_PER_REPLY = 150
+
+INTENT_NAMES = (
+    'accept_bridge', 'accept_extension', 'ambiguous_acceptance', 'decline_bridge', 'financial_hardship',
+    'ask_for_more_info', 'cancel_request', 'update_payment', 'ask_for_time'
+)
+
+# Structured output: the model must answer through these tools (tool_choice),
+# and their inputs are checked once by validators compiled from the same schemas
+INTENT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'intent': {'type': 'string', 'enum': list(INTENT_NAMES)},
+        'confidence': {'type': 'number', 'minimum': 0, 'maximum': 1},
+        'reasoning': {'type': 'string'},
+        'entities': {'type': 'object'}
+    },
+    'required': ['intent', 'confidence', 'reasoning']
+}
+INTENT_TOOL = {
+    'name': 'record_intent',
+    'description': "Record the classified intent of the customer's reply",
+    'input_schema': INTENT_SCHEMA
+}
+BATCH_ITEM_SCHEMA = {
+    **INTENT_SCHEMA,
+    'properties': {'id': {'type': 'integer', 'minimum': 1}, **INTENT_SCHEMA['properties']},
+    'required': ['id'] + INTENT_SCHEMA['required']
+}
+BATCH_INTENT_TOOL = {
+    'name': 'record_intents',
+    'description': 'Record the classified intent of every numbered reply',
+    'input_schema': {
+        'type': 'object',
+        'properties': {'replies': {'type': 'array', 'items': BATCH_ITEM_SCHEMA}},
+        'required': ['replies']
+    }
+}
+
+_validate_intent = compile_validator(INTENT_SCHEMA)
+# Batched answers are checked per reply, so one bad entry doesn't void the rest
+_validate_batch = compile_validator({'type': 'object', 'properties': {'replies': {'type': 'array'}},
+                                     'required': ['replies']})
+_validate_batch_item = compile_validator(BATCH_ITEM_SCHEMA)
+
+# Output validation results
+OUTPUT_VALID = 'valid'
+OUTPUT_NO_TOOL_CALL = 'no_tool_call'
+OUTPUT_INVALID = 'invalid'
+
+STRUCTURED_OUTPUTS = get_registry().register(Counter(
+    'careloop_intent_outputs_total',
+    'Classification answers by validation result (valid | no_tool_call | invalid)',
+    ('task', 'result')
+))
+INTENT_FALLBACKS = get_registry().register(Counter(
+    'careloop_intent_fallbacks_total',
+    'Classifications not settled by the first call: escalated retries and keyword fallbacks',
+    ('reason',)  # escalated_invalid | escalated_low_confidence | keyword
+))
+
+
+def extract_intent(user_message: str, conversation_context: str = "", last_assistant_message: str = "", tier: str = None) -> ExtractorOutput:
     """
     Extract intent from user's message using Claude
 
+    Runs on the task's routed tier (data/model_routing.json) and escalates to a
+    larger tier when the answer is not valid JSON or its confidence is low.
+    Passing `tier` pins the call to that tier with no escalation.
+
     Supported intents:
     - accept_bridge: User agrees to Bridge Plan (explicitly or clearly)
     - accept_extension: User chooses payment extension option
@@ -30,103 +137,221 @@ def extract_intent(user_message: str, conversation_context: str = "", last_assis
     - ask_for_time: User needs more time to pay
     """
 
-    # Check if last message offered multiple options
-    multiple_options_offered = False
-    if last_assistant_message:
-        # Look for indicators of multiple options: "or", "option", "which", "prefer", "choose"
-        option_indicators = ['which option', 'or', 'prefer', 'choose between', 'two options', 'either']
-        multiple_options_offered = any(indicator in last_assistant_message.lower() for indicator in option_indicators)
+    prompt = reply_prompt(user_message, conversation_context, last_assistant_message)
+
+    pinned = tier is not None
+    tier = tier or tier_for('extract_intent')
+    result = _classify(prompt, tier)
+    return finish_extraction(user_message, last_assistant_message, prompt, tier, result, escalate=not pinned)
 
-    prompt = f"""You are an intent classification system for a veterinary payment system.
 
-User's message: "{user_message}"
+def reply_prompt(user_message: str, conversation_context: str = "", last_assistant_message: str = "") -> str:
+    """Per-turn suffix of a classification call; the instructions are the cached EXTRACTOR_SYSTEM prefix"""
+    return f"""User's message: "{user_message}"
 
 Conversation context: {conversation_context if conversation_context else "Initial payment failure notification sent"}
 
-Last assistant message: "{last_assistant_message if last_assistant_message else "None"}"
+Last assistant message: "{last_assistant_message if last_assistant_message else "None"}\""""
 
-IMPORTANT RULE: If the last assistant message offered MULTIPLE OPTIONS (e.g., "Option A or Option B?", "Which would you prefer?")
-and the user responds with just "yes", "ok", "sure" WITHOUT specifying which option, classify as "ambiguous_acceptance".
 
-Classify the user's intent into ONE of these categories:
-1. accept_bridge - User EXPLICITLY agrees to Digital Keeper Plan (e.g., "yes to keeper plan", "do the $4.99 plan", "switch to keeper")
-2. accept_extension - User EXPLICITLY chooses payment extension (e.g., "yes to extension", "give me 14 days", "keep premium for now")
-3. ambiguous_acceptance - User says yes/ok/sure but multiple options were offered and they didn't specify which (IMPORTANT!)
-4. decline_bridge - User rejects Bridge Plan (e.g., "no thanks", "not interested", "just cancel")
-5. financial_hardship - User mentions money problems (e.g., "can't afford", "don't have money", "tight on cash")
-6. ask_for_more_info - User wants details (e.g., "what's included?", "tell me more")
-7. cancel_request - User wants to cancel (e.g., "cancel my plan", "I'm done")
-8. update_payment - User offers new payment method (e.g., "I'll update my card")
-9. ask_for_time - User needs extension (e.g., "give me a week", "need more time")
+def finish_extraction(user_message: str, last_assistant_message: str, prompt: str, tier: str,
+                      result: Optional[dict], escalate: bool = True) -> ExtractorOutput:
+    """
+    Turn a classification from `tier` into an ExtractorOutput, retrying on the
+    escalation tier when the routing rules say the answer isn't usable and
+    falling back to keyword rules when no usable answer came back.
 
-IMPORTANT: Return ONLY valid JSON, no other text or markdown formatting.
+    There is no escalation while the campaign's budget mode isn't normal:
+    every tier then runs on the downgrade model, so a retry would pay twice
+    for the same model's answer.
+    """
+    if escalate and budget_mode(current_campaign_id()) == BUDGET_NORMAL:
+        escalate_to = escalation_tier('extract_intent', tier, result)
+        if escalate_to:
+            INTENT_FALLBACKS.inc(reason='escalated_invalid' if result is None else 'escalated_low_confidence')
+            result = _classify(prompt, escalate_to) or result
 
-{{
-  "intent": "the_intent_name",
-  "confidence": 0.95,
-  "reasoning": "brief explanation",
-  "entities": {{}}
-}}"""
+    if result is None:
+        INTENT_FALLBACKS.inc(reason='keyword')
+        return keyword_intent(user_message, offers_multiple_options(last_assistant_message))
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
+    return ExtractorOutput(
+        intent=result['intent'],
+        confidence=result.get('confidence', 0.8),
+        extracted_entities=result.get('entities', {}),
+        reasoning=result.get('reasoning', 'Intent extracted successfully'),
+        source=EXTRACTION_MODEL
+    )
+
+
+def _classify(prompt: str, tier: str) -> Optional[dict]:
+    """One classification call on `tier`. Returns the validated tool input, or None if unusable."""
+    response = llm.create_message(
+        'extract_intent',
+        tier=tier,
         max_tokens=300,
-        messages=[{"role": "user", "content": prompt}]
+        system=llm.cached_system(EXTRACTOR_SYSTEM),
+        messages=[{"role": "user", "content": prompt}],
+        **llm.forced_tool(INTENT_TOOL)
+    )
+    return structured_output('extract_intent', response, INTENT_TOOL['name'], _validate_intent)
+
+
+def classify_batch(prompts: List[str], tier: str) -> List[Optional[dict]]:
+    """
+    Classify several replies (reply_prompt outputs) in one call on `tier`.
+    Returns one validated result per prompt, in order; None where the answer
+    for that reply is missing or invalid.
+    """
+    numbered = '\n\n'.join(f"Reply {number}\n{prompt}" for number, prompt in enumerate(prompts, 1))
+    response = llm.create_message(
+        'extract_intent_batch',
+        tier=tier,
+        max_tokens=BATCH_TOKENS_PER_REPLY * len(prompts),
+        system=llm.cached_system(EXTRACTOR_BATCH_SYSTEM),
+        messages=[{"role": "user", "content": numbered}],
+        **llm.forced_tool(BATCH_INTENT_TOOL)
     )
 
-    # Parse JSON response
-    response_text = response.content[0].text.strip()
-
-    # Remove markdown code blocks if present
-    if response_text.startswith('```'):
-        # Extract JSON from markdown code block
-        lines = response_text.split('\n')
-        response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-        response_text = response_text.replace('```json', '').replace('```', '').strip()
-
-    try:
-        result = json.loads(response_text)
-        return ExtractorOutput(
-            intent=result['intent'],
-            confidence=result.get('confidence', 0.8),
-            extracted_entities=result.get('entities', {}),
-            reasoning=result.get('reasoning', 'Intent extracted successfully')
-        )
-    except (json.JSONDecodeError, KeyError):
-        # Keyword-based fallback
-        msg_lower = user_message.lower()
-
-        # Check for common patterns
-        if any(word in msg_lower for word in ['yes', 'sure', 'ok', 'do it', 'sounds good', 'that works']):
-            # Check if multiple options were offered - if so, mark as ambiguous
-            if multiple_options_offered and not any(specific in msg_lower for specific in ['bridge', 'keeper', 'extension', '$4.99', '$5', '14 day', 'premium', 'plan']):
-                return ExtractorOutput(intent='ambiguous_acceptance', confidence=0.8,
-                                     extracted_entities={}, reasoning='Ambiguous: yes/ok without specifying which option')
-            # Check for specific option mentions
-            elif 'keeper' in msg_lower or '$4.99' in msg_lower or '$5' in msg_lower:
-                return ExtractorOutput(intent='accept_bridge', confidence=0.7,
-                                     extracted_entities={}, reasoning='Keyword match: accepts Bridge Plan')
-            elif 'extension' in msg_lower or 'premium' in msg_lower or '14' in msg_lower:
-                return ExtractorOutput(intent='accept_extension', confidence=0.7,
-                                     extracted_entities={}, reasoning='Keyword match: accepts extension')
-            else:
-                return ExtractorOutput(intent='accept_bridge', confidence=0.6,
-                                     extracted_entities={}, reasoning='Keyword match: generic acceptance')
-        elif any(word in msg_lower for word in ['no money', "don't have", "can't afford", "tight", 'broke', 'options']):
-            return ExtractorOutput(intent='financial_hardship', confidence=0.7,
-                                 extracted_entities={}, reasoning='Keyword match: financial hardship')
-        elif any(word in msg_lower for word in ['friday', 'next week', 'few days', 'pay later']):
-            return ExtractorOutput(intent='ask_for_time', confidence=0.7,
-                                 extracted_entities={}, reasoning='Keyword match: needs time')
-        elif any(word in msg_lower for word in ['cancel', 'stop', 'unsubscribe']):
-            return ExtractorOutput(intent='cancel_request', confidence=0.7,
-                                 extracted_entities={}, reasoning='Keyword match: cancellation')
-        elif any(word in msg_lower for word in ['what', 'how', 'details', 'tell me more', 'included']):
-            return ExtractorOutput(intent='ask_for_more_info', confidence=0.7,
-                                 extracted_entities={}, reasoning='Keyword match: asking for info')
+    results: List[Optional[dict]] = [None] * len(prompts)
+    answer = structured_output('extract_intent_batch', response, BATCH_INTENT_TOOL['name'], _validate_batch)
+    if answer is None:
+        return results
+    for item in answer['replies']:
+        try:
+            _validate_batch_item(item)
+        except SchemaError:
+            STRUCTURED_OUTPUTS.inc(task='extract_intent_batch_item', result=OUTPUT_INVALID)
+            continue
+        if item['id'] <= len(prompts):
+            results[item['id'] - 1] = item
+    return results
+
+
+def structured_output(task: str, response, tool_name: str, validate: Callable[[dict], dict]) -> Optional[dict]:
+    """The response's `tool_name` input if it passes `validate`, else None (counted by result)"""
+    answer = llm.tool_input(response, tool_name)
+    if answer is None:
+        result = OUTPUT_NO_TOOL_CALL
+    else:
+        try:
+            validate(answer)
+            result = OUTPUT_VALID
+        except SchemaError:
+            answer, result = None, OUTPUT_INVALID
+    STRUCTURED_OUTPUTS.inc(task=task, result=result)
+    return answer
+
+
+def extract_intent_batched(batcher: IntentBatcher, user_message: str, conversation_context: str = "",
+                           last_assistant_message: str = "") -> ExtractorOutput:
+    """
+    extract_intent through a micro-batcher: the reply is classified together
+    with others that arrive in the same window. Escalation works as for a
+    single call; replies the batch didn't answer (or didn't answer in time)
+    are classified on their own.
+    """
+    prompt = reply_prompt(user_message, conversation_context, last_assistant_message)
+    outcome = batcher.classify(prompt)
+    if outcome.usage is not None:
+        attach_record(outcome.usage)
+
+    if outcome.fallback:
+        return extract_intent(user_message, conversation_context, last_assistant_message)
+    return finish_extraction(user_message, last_assistant_message, prompt, batcher.tier, outcome.result)
+
+
+_batcher: Optional[IntentBatcher] = None
+_batcher_lock = threading.Lock()
+_batcher_loaded = False
+
+
+def get_intent_batcher() -> Optional[IntentBatcher]:
+    """Process-wide batcher (None unless CARELOOP_INTENT_BATCH_WINDOW_MS is set)"""
+    global _batcher, _batcher_loaded
+    with _batcher_lock:
+        if not _batcher_loaded:
+            _batcher = batcher_from_env(classify_batch)
+            _batcher_loaded = True
+        return _batcher
+
+
+# Indicators that the last assistant message offered more than one option
+MULTIPLE_OPTIONS = KeywordMatcher({
+    'multiple_options': ['which option', 'or', 'prefer', 'choose between', 'two options', 'either']
+})
+
+# Keyword fallback phrases per signal; one pass over the reply finds them all
+ACCEPT = 'accept'
+NAMES_OPTION = 'names_option'
+NAMES_BRIDGE = 'names_bridge'
+NAMES_EXTENSION = 'names_extension'
+# Phrases match whole words, so inflected forms are listed as phrases of their own
+REPLY_PHRASES = {
+    ACCEPT: ['yes', 'sure', 'ok', 'okay', 'do it', 'sounds good', 'that works'],
+    NAMES_OPTION: ['bridge', 'keeper', 'extension', 'extensions', '$4.99', '$5', '14 day', '14 days', '14-day',
+                   'premium', 'plan', 'plans'],
+    NAMES_BRIDGE: ['keeper', '$4.99', '$5'],
+    NAMES_EXTENSION: ['extension', 'extensions', 'premium', '14'],
+    'financial_hardship': ['no money', "don't have", "can't afford", 'tight', 'broke', 'options'],
+    'ask_for_time': ['friday', 'next week', 'few days', 'pay later'],
+    'cancel_request': ['cancel', 'cancels', 'cancelled', 'canceled', 'cancelling', 'canceling', 'cancellation',
+                       'stop', 'stops', 'stopped', 'stopping', 'unsubscribe', 'unsubscribed'],
+    'ask_for_more_info': ['what', 'how', 'details', 'tell me more', 'included']
+}
+REPLY_KEYWORDS = KeywordMatcher(REPLY_PHRASES)
+# Non-acceptance intents (with their reasoning) in the order they win when several match
+KEYWORD_INTENTS = (
+    ('financial_hardship', 'Keyword match: financial hardship'),
+    ('ask_for_time', 'Keyword match: needs time'),
+    ('cancel_request', 'Keyword match: cancellation'),
+    ('ask_for_more_info', 'Keyword match: asking for info')
+)
+
+
+def offers_multiple_options(last_assistant_message: str) -> bool:
+    """Check if the last assistant message offered the customer more than one option"""
+    if not last_assistant_message:
+        return False
+    return MULTIPLE_OPTIONS.matches(last_assistant_message)
+
+
+def keyword_intent(user_message: str, multiple_options_offered: bool = False) -> ExtractorOutput:
+    """
+    Keyword-based intent classification.
+    Used when no tier returned a valid classification, and instead of Claude
+    when the campaign's LLM budget is exhausted.
+    """
+    hits = REPLY_KEYWORDS.labels(user_message)
+
+    if ACCEPT in hits:
+        # Check if multiple options were offered - if so, mark as ambiguous
+        if multiple_options_offered and NAMES_OPTION not in hits:
+            return ExtractorOutput(intent='ambiguous_acceptance', confidence=0.8,
+                                 extracted_entities={}, reasoning='Ambiguous: yes/ok without specifying which option',
+                                 source=EXTRACTION_KEYWORD)
+        # Check for specific option mentions
+        elif NAMES_BRIDGE in hits:
+            return ExtractorOutput(intent='accept_bridge', confidence=0.7,
+                                 extracted_entities={}, reasoning='Keyword match: accepts Bridge Plan',
+                                 source=EXTRACTION_KEYWORD)
+        elif NAMES_EXTENSION in hits:
+            return ExtractorOutput(intent='accept_extension', confidence=0.7,
+                                 extracted_entities={}, reasoning='Keyword match: accepts extension',
+                                 source=EXTRACTION_KEYWORD)
         else:
-            return ExtractorOutput(intent='financial_hardship', confidence=0.6,
-                                 extracted_entities={}, reasoning='Default: assuming financial concern')
+            return ExtractorOutput(intent='accept_bridge', confidence=0.6,
+                                 extracted_entities={}, reasoning='Keyword match: generic acceptance',
+                                 source=EXTRACTION_KEYWORD)
+
+    for intent, reasoning in KEYWORD_INTENTS:
+        if intent in hits:
+            return ExtractorOutput(intent=intent, confidence=0.7,
+                                 extracted_entities={}, reasoning=reasoning,
+                                 source=EXTRACTION_KEYWORD)
+    return ExtractorOutput(intent='financial_hardship', confidence=0.6,
+                         extracted_entities={}, reasoning='Default: assuming financial concern',
+                         source=EXTRACTION_KEYWORD)
 
 
 def extractor_node(state: AgentState) -> dict:
@@ -150,9 +375,31 @@ def extractor_node(state: AgentState) -> dict:
     context = f"User: {state['user_name']}, Pet: {state['pet_name']} ({state['pet_condition']})"
     if state.get('router_decision'):
         context += f", Recommendation: {state['router_decision']}"
+    summary = render_summary(state.get('conversation_summary'))
+    if summary:
+        context += f"\nConversation so far:\n{summary}"
 
     # Extract intent with last assistant message for context
-    extraction = extract_intent(last_user_message, context, last_assistant_message)
+    # (from the intent cache when this reply was seen in the same context;
+    # keyword rules only once the campaign's LLM budget is spent; batched with
+    # other conversations' replies when micro-batching is enabled)
+    cache = get_intent_cache()
+    signature = context_signature(offers_multiple_options(last_assistant_message), state.get('router_decision'))
+    cached = cache.lookup(last_user_message, signature) if cache is not None else None
+    batcher = get_intent_batcher()
+    with usage_scope(state.get('campaign_id')) as usage:
+        if cached is not None:
+            extraction = cached
+        elif budget_mode(state.get('campaign_id')) == BUDGET_TEMPLATE:
+            extraction = keyword_intent(last_user_message, offers_multiple_options(last_assistant_message))
+        elif batcher is not None:
+            extraction = extract_intent_batched(batcher, last_user_message, context, last_assistant_message)
+        else:
+            extraction = extract_intent(last_user_message, context, last_assistant_message)
+    if cache is not None and extraction['source'] == EXTRACTION_MODEL:
+        # Only validated Claude classifications are cached, not keyword fallbacks
+        cache.store(last_user_message, signature, extraction)
+    llm_usage = usage.totals(state.get('llm_usage'))
 
     # Map intent to conversation stage
     stage_map = {
@@ -167,15 +414,21 @@ def extractor_node(state: AgentState) -> dict:
     }
 
     new_stage = stage_map.get(extraction['intent'], 'negotiating')
+    INTENTS.inc(intent=extraction['intent'])
 
     # Update state
     return {
         'current_intent': extraction['intent'],
         'conversation_stage': new_stage,
+        'conversation_summary': add_customer_message(state.get('conversation_summary'), last_user_message,
+                                                     extraction['intent'], extraction['extracted_entities']),
+        'llm_usage': llm_usage,
+        'llm_cost_usd': llm_usage['cost_usd'],
         'tool_calls': state.get('tool_calls', []) + [{
             'agent': 'extractor',
             'intent': extraction['intent'],
             'confidence': extraction['confidence'],
-            'reasoning': extraction['reasoning']
+            'reasoning': extraction['reasoning'],
+            'llm_calls': usage.calls
         }]
     }
@@ -5,8 +5,10 @@ In production, this would connect to real ezyVet REST API
 """
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from utils.tracing import traced_call
 
 
+@traced_call('ezyvet.get_pet_medical_history', kind='ezyvet')
 def get_pet_medical_history(pet_id: str, user_id: str) -> Dict:
     """
     Fetch complete medical history for a pet from ezyVet.
@@ -223,6 +225,7 @@ def get_pet_medical_history(pet_id: str, user_id: str) -> Dict:
     })
 
 
+@traced_call('ezyvet.get_medication_adherence', kind='ezyvet')
 def get_medication_adherence_score(user_id: str) -> Dict:
     """
     Calculate medication adherence score based on prescription refill history.
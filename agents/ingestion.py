@@ -0,0 +1,293 @@
+"""
+Streaming Cohort Ingestion
+Reads billing failure exports (CSV or JSONL, optionally gzipped) row by row,
+joins each failure against payment, medical and adherence features, and scores
+them in bounded batches. Memory stays flat regardless of export size: only the
+current batch and the top `ai_agent_capacity` customers per tier are held.
+
+Usage (from the repo root):
+    python -m agents.ingestion exports/failures_2025-11-05.csv.gz --capacity 50
+"""
+import csv
+import io
+import gzip
+import json
+import heapq
+import argparse
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from agents import score_cache
+from agents.payment_history import get_payment_history
+from agents.ezyvet_client import get_pet_medical_history, get_medication_adherence_score
+from agents.retention_scorer import build_outreach_list
+from utils.record_store import RecordStore
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Export columns parsed as numbers (CSV cells arrive as strings)
+NUMERIC_FIELDS = {
+    'ltv': float,
+    'plan_cost': float,
+    'balance': float,
+    'tenure_months': int,
+    'medical_urgency_score': float,
+    'payment_risk_score': float,
+    'medication_adherence_score': int
+}
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _coerce(row: Dict) -> Dict:
+    for field, cast in NUMERIC_FIELDS.items():
+        value = row.get(field)
+        if value is None or value == '':
+            row.pop(field, None)
+        elif isinstance(value, str):
+            row[field] = cast(float(value)) if cast is int else cast(value)
+    return row
+
+
+def read_csv_failures(path: str) -> Iterator[Dict]:
+    """One failure dict per CSV row (header row gives the field names)"""
+    with _open_text(path) as f:
+        for row in csv.DictReader(f):
+            yield _coerce(row)
+
+
+def read_jsonl_failures(path: str) -> Iterator[Dict]:
+    """One failure dict per JSON line; blank lines are skipped"""
+    with _open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield _coerce(json.loads(line))
+
+
+def read_failures(path: str) -> Iterator[Dict]:
+    """Stream a billing export, picking the reader from the file extension"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return read_csv_failures(path)
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return read_jsonl_failures(path)
+    raise ValueError(f"Unsupported export format: {path} (expected .csv or .jsonl, optionally .gz)")
+
+
+def batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Group a row stream into lists of at most `size` rows"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Feature join
+# ---------------------------------------------------------------------------
+
+class FeatureJoin:
+    """
+    Fills in the scorer inputs an export row doesn't already carry.
+
+    Scores present in the export (medical_urgency_score, payment_risk_score,
+    medication_adherence_score) are used as-is; missing ones are looked up per
+    user and computed through the memoized sub-scores in agents/score_cache.py.
+    Lookups default to the payment history and ezyVet clients.
+
+    With a `records` store (utils/record_store.py), profile fields and stored
+    scores the export lacks are read from it first.
+    """
+
+    def __init__(
+        self,
+        payment_lookup: Callable[[str], Dict] = get_payment_history,
+        medical_lookup: Callable[[str, str], Dict] = get_pet_medical_history,
+        adherence_lookup: Callable[[str], Dict] = get_medication_adherence_score,
+        records: Optional[RecordStore] = None
+    ):
+        self.payment_lookup = payment_lookup
+        self.medical_lookup = medical_lookup
+        self.adherence_lookup = adherence_lookup
+        self.records = records
+
+    def __call__(self, failure: Dict) -> Dict:
+        user_id = failure['user_id']
+
+        if self.records is not None:
+            profile = self.records.get(user_id)
+            if profile is not None:
+                for field, value in profile.items():
+                    if value is not None:
+                        failure.setdefault(field, value)
+
+        if 'payment_risk_score' not in failure:
+            payment_risk = score_cache.payment_risk_score(self.payment_lookup(user_id))
+            failure['payment_risk_score'] = payment_risk['payment_risk_score']
+
+        if 'medical_urgency_score' not in failure or 'medication_adherence_score' not in failure:
+            adherence_data = self.adherence_lookup(user_id)
+            failure.setdefault('medication_adherence_score', adherence_data['adherence_score'])
+            if 'medical_urgency_score' not in failure:
+                medical_history = self.medical_lookup(failure.get('pet_id', ''), user_id)
+                medical_urgency = score_cache.medical_urgency(medical_history, adherence_data)
+                failure['medical_urgency_score'] = medical_urgency['urgency_score']
+
+        failure.setdefault('ltv', 0)
+        failure.setdefault('tenure_months', 0)
+        return failure
+
+
+def score_batch(batch: List[Dict], join: Callable[[Dict], Dict]) -> List[Dict]:
+    """Join and score one batch (same fields batch_score_customers adds)"""
+    scored = []
+    for failure in batch:
+        customer = join(failure)
+        score_data = score_cache.retention_priority_score(
+            medical_urgency_score=customer['medical_urgency_score'],
+            payment_risk_score=customer['payment_risk_score'],
+            medication_adherence_score=customer['medication_adherence_score'],
+            ltv=customer['ltv'],
+            tenure_months=customer['tenure_months']
+        )
+        customer['retention_score'] = score_data['retention_priority_score']
+        customer['retention_decision'] = score_data['decision']
+        customer['should_engage'] = score_data['should_engage_ai']
+        scored.append(customer)
+    return scored
+
+
+# ---------------------------------------------------------------------------
+# Bounded ranking
+# ---------------------------------------------------------------------------
+
+class TopK:
+    """
+    The k highest-scoring rows seen so far, in O(k) memory.
+
+    Ties keep the earlier row, matching the stable sort in
+    batch_score_customers.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.count = 0
+        # min-heap of (score, -sequence, row): heap[0] is the row to evict next
+        self._heap: List[tuple] = []
+
+    def push(self, score: float, row: Dict, sequence: Optional[int] = None):
+        """Offer a row; `sequence` (default: arrival order) breaks score ties, lowest first"""
+        self.count += 1
+        if self.k <= 0:
+            return
+        entry = (score, -(self.count if sequence is None else sequence), row)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def entries(self) -> List[tuple]:
+        """Kept (score, sequence, row), best first"""
+        ordered = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [(score, -negated_sequence, row) for score, negated_sequence, row in ordered]
+
+    def ranked(self) -> List[Dict]:
+        """Kept rows, highest score first"""
+        return [row for _, _, row in self.entries()]
+
+
+def stream_daily_outreach_list(
+    failures: Iterable[Dict],
+    ai_agent_capacity: int = 10,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    join: Optional[Callable[[Dict], Dict]] = None,
+    dunning_sink: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    get_daily_outreach_list over a stream of failures.
+
+    Returns the same result shape. IGNORE customers are counted and handed to
+    `dunning_sink` (e.g. a CSV writer feeding standard dunning) instead of being
+    collected, so `standard_dunning_list` is empty.
+    """
+    join = join or FeatureJoin()
+    priority = TopK(ai_agent_capacity)
+    secondary = TopK(ai_agent_capacity)
+    total = 0
+    ignore_count = 0
+
+    for batch in batched(failures, batch_size):
+        total += len(batch)
+        for customer in score_batch(batch, join):
+            decision = customer['retention_decision']
+            if decision == 'PRIORITY_OUTREACH':
+                priority.push(customer['retention_score'], customer)
+            elif decision == 'SECONDARY_OUTREACH':
+                secondary.push(customer['retention_score'], customer)
+            else:
+                ignore_count += 1
+                if dunning_sink is not None:
+                    dunning_sink(customer)
+
+    return build_outreach_list(
+        total_failures=total,
+        priority=priority.ranked(),
+        secondary=secondary.ranked(),
+        priority_count=priority.count,
+        secondary_count=secondary.count,
+        ignore_count=ignore_count,
+        standard_dunning_list=[],
+        ai_agent_capacity=ai_agent_capacity
+    )
+
+
+def ingest_export(path: str, ai_agent_capacity: int = 10, batch_size: int = DEFAULT_BATCH_SIZE,
+                  dunning_sink: Optional[Callable[[Dict], None]] = None,
+                  records: Optional[RecordStore] = None) -> Dict:
+    """Daily outreach list for a billing failure export file"""
+    return stream_daily_outreach_list(
+        read_failures(path), ai_agent_capacity, batch_size,
+        join=FeatureJoin(records=records), dunning_sink=dunning_sink
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Score a billing failure export into a daily outreach list')
+    parser.add_argument('export', help='Failure export (.csv / .jsonl, optionally .gz)')
+    parser.add_argument('--capacity', type=int, default=10, help='Customers the AI agent can handle today')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--dunning-out', help='Write IGNORE customers to this JSONL file')
+    parser.add_argument('--records', help='Customer record store to join profiles from (utils/record_store.py)')
+    args = parser.parse_args(argv)
+
+    records = RecordStore(args.records) if args.records else None
+    try:
+        if args.dunning_out:
+            with open(args.dunning_out, 'w') as out:
+                result = ingest_export(
+                    args.export, args.capacity, args.batch_size,
+                    dunning_sink=lambda customer: out.write(json.dumps(customer) + '\n'),
+                    records=records
+                )
+        else:
+            result = ingest_export(args.export, args.capacity, args.batch_size, records=records)
+    finally:
+        if records is not None:
+            records.close()
+
+    print(json.dumps({key: value for key, value in result.items() if key != 'standard_dunning_list'}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
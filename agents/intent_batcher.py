@@ -0,0 +1,258 @@
+"""
+Micro-Batched Intent Extraction
+After a campaign send, replies arrive in bursts and each one would otherwise
+be its own classification call. The batcher holds replies for a short window
+(at most `max_wait_ms` after the first one, or until `max_batch_size` are
+waiting), classifies the whole batch in one Claude call, and hands each
+conversation its own result.
+
+Replies from different campaigns are never mixed in one call, so campaign
+spend and budget modes stay per campaign. Each conversation is charged an
+equal share of the batched call (utils.llm_costs.split_record).
+
+Enabled by setting CARELOOP_INTENT_BATCH_WINDOW_MS; extractor_node then
+classifies through the batcher instead of one call per reply. Batches can
+only be as large as the number of replies being processed at once, so raise
+CARELOOP_AGENT_WORKERS along with it.
+"""
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+from agents.model_router import tier_for
+from utils.llm_costs import current_campaign_id, split_record, usage_scope
+from utils.telemetry import Counter, Histogram, get_registry
+from utils.tracing import get_histogram
+
+WINDOW_ENV = 'CARELOOP_INTENT_BATCH_WINDOW_MS'
+BATCH_SIZE_ENV = 'CARELOOP_INTENT_BATCH_SIZE'
+DEFAULT_BATCH_SIZE = 16
+
+# Batched calls allowed in flight at once; later batches queue (and that
+# queueing counts toward the reported wait)
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Longest a caller waits for its batch before classifying the reply on its own
+RESULT_TIMEOUT_S = 60.0
+
+# Why a reply fell back to a single classification call
+FALLBACK_MISSING = 'missing'  # the batch answer had no usable entry for it
+FALLBACK_ERROR = 'error'  # the batched call itself failed
+FALLBACK_TIMEOUT = 'timeout'  # no batch answer within RESULT_TIMEOUT_S
+
+BATCH_SIZE = get_registry().register(Histogram(
+    'careloop_intent_batch_size',
+    'Replies classified per batched extraction call',
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+))
+BATCH_WAIT = get_registry().register(Histogram(
+    'careloop_intent_batch_wait_seconds',
+    'Time a reply waited for its batch to be sent (queueing latency added by batching)'
+))
+BATCH_FALLBACKS = get_registry().register(Counter(
+    'careloop_intent_batch_fallbacks_total',
+    'Replies re-classified on their own after a batched call',
+    ('reason',)
+))
+
+
+class BatchOutcome:
+    """What a batched classification produced for one reply"""
+    __slots__ = ('result', 'usage', 'batch_size', 'waited_ms', 'fallback')
+
+    def __init__(self, result: Optional[dict], usage: Optional[dict], batch_size: int,
+                 waited_ms: float, fallback: Optional[str] = None):
+        self.result = result  # parsed classification, or None
+        self.usage = usage  # this reply's share of the call's usage record
+        self.batch_size = batch_size
+        self.waited_ms = waited_ms
+        self.fallback = fallback  # FALLBACK_* when the caller must classify on its own
+
+
+class _Pending:
+    __slots__ = ('prompt', 'campaign_id', 'future', 'enqueued')
+
+    def __init__(self, prompt: str, campaign_id: Optional[str]):
+        self.prompt = prompt
+        self.campaign_id = campaign_id
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class IntentBatcher:
+    """
+    Collects classification prompts and sends them in size/time-bounded batches.
+
+    `classify_batch(prompts, tier)` makes the call and returns one parsed
+    result (or None) per prompt; see agents.extractor.classify_batch.
+    """
+
+    def __init__(
+        self,
+        classify_batch: Callable[[List[str], str], List[Optional[dict]]],
+        max_wait_ms: float,
+        max_batch_size: int = DEFAULT_BATCH_SIZE,
+        tier: Optional[str] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+    ):
+        self.classify_batch = classify_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.tier = tier or tier_for('extract_intent')
+
+        self._pending: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='careloop-intent-batch')
+        self._wait_histogram = get_histogram('intent_batch.wait')
+
+        self._batches = 0
+        self._replies = 0
+        self._fallbacks: Dict[str, int] = {FALLBACK_MISSING: 0, FALLBACK_ERROR: 0, FALLBACK_TIMEOUT: 0}
+        self._stats_lock = threading.Lock()
+
+        self._collector = threading.Thread(target=self._collect, name='careloop-intent-batcher', daemon=True)
+        self._collector.start()
+
+    def submit(self, prompt: str) -> Future:
+        """
+        Queue one reply_prompt for the next batch. The future resolves to a
+        BatchOutcome. The batch is charged to the caller's campaign.
+        """
+        pending = _Pending(prompt, current_campaign_id())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('IntentBatcher is closed')
+            self._pending.append(pending)
+            self._cond.notify()
+        return pending.future
+
+    def classify(self, prompt: str, timeout_s: float = RESULT_TIMEOUT_S) -> BatchOutcome:
+        """
+        submit() and wait for the outcome. If the batch hasn't answered within
+        `timeout_s`, the outcome is a FALLBACK_TIMEOUT (the caller classifies
+        on its own; a late batch answer is discarded).
+        """
+        started = time.perf_counter()
+        try:
+            return self.submit(prompt).result(timeout=timeout_s)
+        except FutureTimeout:
+            BATCH_FALLBACKS.inc(reason=FALLBACK_TIMEOUT)
+            with self._stats_lock:
+                self._fallbacks[FALLBACK_TIMEOUT] += 1
+            return BatchOutcome(None, None, 0, (time.perf_counter() - started) * 1000, FALLBACK_TIMEOUT)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # closed and drained
+
+                # The window opens with the oldest waiting reply
+                deadline = self._pending[0].enqueued + self.max_wait_s
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+
+            by_campaign: Dict[Optional[str], List[_Pending]] = {}
+            for pending in batch:
+                by_campaign.setdefault(pending.campaign_id, []).append(pending)
+            for campaign_id, group in by_campaign.items():
+                self._executor.submit(self._dispatch, campaign_id, group)
+
+    def _dispatch(self, campaign_id: Optional[str], batch: List[_Pending]):
+        sent = time.perf_counter()
+        waits_ms = []
+        for pending in batch:
+            waited_s = sent - pending.enqueued
+            BATCH_WAIT.observe(waited_s)
+            self._wait_histogram.record(waited_s * 1000)
+            waits_ms.append(waited_s * 1000)
+        BATCH_SIZE.observe(len(batch))
+
+        fallbacks: Dict[str, int] = {}
+        try:
+            try:
+                with usage_scope(campaign_id) as usage:
+                    results = self.classify_batch([pending.prompt for pending in batch], self.tier)
+            except Exception:
+                results, shares = [], [None] * len(batch)
+                fallback = FALLBACK_ERROR
+            else:
+                shares = split_record(usage.calls[0], len(batch)) if usage.calls else [None] * len(batch)
+                fallback = FALLBACK_MISSING
+
+            # A short answer leaves the remaining replies to be classified on their own
+            results = list(results[:len(batch)]) + [None] * (len(batch) - len(results))
+            for pending, result, share, waited_ms in zip(batch, results, shares, waits_ms):
+                reason = None if result is not None else fallback
+                if reason:
+                    fallbacks[reason] = fallbacks.get(reason, 0) + 1
+                    BATCH_FALLBACKS.inc(reason=reason)
+                pending.future.set_result(BatchOutcome(result, share, len(batch), waited_ms, reason))
+        finally:
+            # Whatever went wrong above, no caller is left waiting on its future
+            for pending, waited_ms in zip(batch, waits_ms):
+                if not pending.future.done():
+                    fallbacks[FALLBACK_ERROR] = fallbacks.get(FALLBACK_ERROR, 0) + 1
+                    BATCH_FALLBACKS.inc(reason=FALLBACK_ERROR)
+                    pending.future.set_result(BatchOutcome(None, None, len(batch), waited_ms, FALLBACK_ERROR))
+
+            with self._stats_lock:
+                self._batches += 1
+                self._replies += len(batch)
+                for reason, count in fallbacks.items():
+                    self._fallbacks[reason] += count
+
+    def stats(self) -> dict:
+        """Batching efficiency and the queueing latency it adds"""
+        with self._stats_lock:
+            batches, replies = self._batches, self._replies
+            fallbacks = dict(self._fallbacks)
+        with self._cond:
+            waiting = len(self._pending)
+        return {
+            'window_ms': round(self.max_wait_s * 1000, 1),
+            'max_batch_size': self.max_batch_size,
+            'batches': batches,
+            'replies': replies,
+            'waiting': waiting,
+            'mean_batch_size': round(replies / batches, 2) if batches else 0.0,
+            'batch_fill': round(replies / (batches * self.max_batch_size), 3) if batches else 0.0,
+            # Claude calls avoided compared with one call per reply
+            'calls_saved': replies - batches,
+            'fallbacks': fallbacks,
+            'wait_p50_ms': round(self._wait_histogram.percentile(50), 2),
+            'wait_p95_ms': round(self._wait_histogram.percentile(95), 2),
+            'wait_p99_ms': round(self._wait_histogram.percentile(99), 2)
+        }
+
+    def close(self, wait: bool = True):
+        """Send whatever is waiting, then stop"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._collector.join()
+        self._executor.shutdown(wait=wait)
+
+
+def batcher_from_env(classify_batch: Callable[[List[str], str], List[Optional[dict]]]) -> Optional[IntentBatcher]:
+    """An IntentBatcher configured from the environment, or None when batching is off"""
+    window_ms = float(os.getenv(WINDOW_ENV, '0') or 0)
+    if window_ms <= 0:
+        return None
+    return IntentBatcher(
+        classify_batch,
+        max_wait_ms=window_ms,
+        max_batch_size=int(os.getenv(BATCH_SIZE_ENV, DEFAULT_BATCH_SIZE))
+    )
@@ -0,0 +1,304 @@
+"""
+Intent Cache
+Customer replies are highly repetitive ("yes", "ok do the $4.99 one",
+"cancel", "can I have till friday"), so classified intents are cached and
+reused instead of calling Claude again.
+
+Entries are keyed on the normalized reply plus a context signature: whether
+the last assistant message offered multiple options and the router decision.
+Those are the only parts of the context the intent rules depend on, so "yes"
+after a two-option offer never reuses the "yes" classified after a single
+offer.
+
+Two tiers:
+- exact: same normalized reply and signature
+- similar: character-trigram Jaccard similarity at or above
+  `similarity_threshold` against replies with the same signature, served
+  only from entries at least `similar_min_confidence` confident. Negations,
+  plan names and numbers/amounts must match exactly ("i can afford it" never
+  matches "i can't afford it"); the reported confidence is scaled by the
+  similarity.
+
+Only classifications at least `min_confidence` confident are stored. The
+cache is an LRU of `max_entries` replies and is persisted as JSON lines
+when given a path.
+
+Enabled with CARELOOP_INTENT_CACHE: ':memory:' for an in-process cache, or a
+file path to keep it across restarts.
+"""
+import os
+import re
+import json
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from state import ExtractorOutput, EXTRACTION_CACHE
+from utils.telemetry import Counter, get_registry
+
+CACHE_ENV = 'CARELOOP_INTENT_CACHE'
+IN_MEMORY = ':memory:'
+
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_SIMILARITY_THRESHOLD = 0.7
+DEFAULT_MIN_CONFIDENCE = 0.8
+DEFAULT_SIMILAR_MIN_CONFIDENCE = 0.9
+
+# New entries between automatic saves of a persistent cache
+SAVE_EVERY = 200
+
+HIT_EXACT = 'exact'
+HIT_SIMILAR = 'similar'
+MISS = 'miss'
+
+# Words that flip or pin down a reply's meaning; a similar match must carry
+# exactly the same ones
+_GUARD_WORDS = frozenset({
+    'no', 'not', 'never', 'dont', 'cant', 'wont', 'cannot', 'didnt', 'doesnt', 'isnt', 'stop',
+    'yes', 'cancel', 'keeper', 'bridge', 'extension', 'premium'
+})
+_NUMBER = re.compile(r'^\$?\d')
+
+# Politeness that never changes the intent
+_FILLER = re.compile(r'\b(?:please|pls|plz|thanks|thx|thank you)\b')
+_APOSTROPHES = str.maketrans({'’': '', '‘': '', "'": ''})
+_NON_WORD = re.compile(r'[^a-z0-9$.\s]+')
+_STRAY_DOTS = re.compile(r'(?<!\d)\.|\.(?!\d)')
+_SPACES = re.compile(r'\s+')
+
+INTENT_CACHE_LOOKUPS = get_registry().register(Counter(
+    'careloop_intent_cache_lookups_total',
+    'Intent cache lookups by result (exact / similar hits skip the Claude call)',
+    ('result',)
+))
+
+
+def normalize_reply(text: str) -> str:
+    """
+    Lowercase, drop apostrophes, punctuation (keeping $ amounts and decimals)
+    and politeness words, collapse whitespace:
+    "Yes!!  Do the $4.99 one, please." → "yes do the $4.99 one"
+    """
+    text = text.lower().translate(_APOSTROPHES)
+    text = _NON_WORD.sub(' ', text)
+    text = _FILLER.sub(' ', text)
+    text = _STRAY_DOTS.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def context_signature(multiple_options_offered: bool, router_decision: Optional[str]) -> str:
+    return f"{'multi' if multiple_options_offered else 'single'}|{router_decision or ''}"
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    padded = f'  {normalized} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def guard_tokens(normalized: str) -> FrozenSet[str]:
+    return frozenset(word for word in normalized.split() if word in _GUARD_WORDS or _NUMBER.match(word))
+
+
+class _Entry:
+    __slots__ = ('intent', 'confidence', 'reasoning', 'entities', 'grams', 'guards', 'hits')
+
+    def __init__(self, normalized: str, intent: str, confidence: float, reasoning: str, entities: dict, hits: int = 0):
+        self.intent = intent
+        self.confidence = confidence
+        self.reasoning = reasoning
+        self.entities = entities
+        self.grams = trigrams(normalized)
+        self.guards = guard_tokens(normalized)
+        self.hits = hits
+
+
+class IntentCache:
+    """Exact + n-gram similarity LRU of classified replies"""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        similar_min_confidence: float = DEFAULT_SIMILAR_MIN_CONFIDENCE,
+        path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.min_confidence = min_confidence
+        self.similar_min_confidence = similar_min_confidence
+        self.path = path
+
+        # (signature, normalized reply) → entry, least recently used first
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        # (signature, trigram) → normalized replies containing it (candidate lookup)
+        self._postings: Dict[Tuple[str, str], Set[str]] = {}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.counts = {HIT_EXACT: 0, HIT_SIMILAR: 0, MISS: 0}
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, user_message: str, signature: str) -> Optional[ExtractorOutput]:
+        """Cached classification for a reply, or None on a miss"""
+        normalized = normalize_reply(user_message)
+        with self._lock:
+            entry = self._entries.get((signature, normalized))
+            if entry is not None:
+                result, confidence = HIT_EXACT, entry.confidence
+                self._entries.move_to_end((signature, normalized))
+            else:
+                entry, similarity = self._most_similar(normalized, signature)
+                result = HIT_SIMILAR if entry is not None else MISS
+                confidence = entry.confidence * similarity if entry is not None else 0.0
+            if entry is not None:
+                entry.hits += 1
+            self.counts[result] += 1
+        INTENT_CACHE_LOOKUPS.inc(result=result)
+
+        if entry is None:
+            return None
+        return ExtractorOutput(
+            intent=entry.intent,
+            confidence=round(confidence, 3),
+            extracted_entities=dict(entry.entities),
+            reasoning=f"Cached ({result} match): {entry.reasoning}",
+            source=EXTRACTION_CACHE
+        )
+
+    def _most_similar(self, normalized: str, signature: str) -> Tuple[Optional[_Entry], float]:
+        """Best similarity-tier match (caller holds the lock)"""
+        grams = trigrams(normalized)
+        guards = guard_tokens(normalized)
+        # Trigrams shared with every stored reply that has at least one
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._postings.get((signature, gram), ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best, best_similarity = None, 0.0
+        for candidate, common in shared.items():
+            entry = self._entries[(signature, candidate)]
+            if entry.guards != guards or entry.confidence < self.similar_min_confidence:
+                continue
+            similarity = common / (len(grams) + len(entry.grams) - common)
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best_similarity < self.similarity_threshold:
+            return None, 0.0
+        return best, best_similarity
+
+    def store(self, user_message: str, signature: str, extraction: ExtractorOutput):
+        """Remember a Claude classification (ignored below min_confidence)"""
+        if extraction['confidence'] < self.min_confidence:
+            return
+        normalized = normalize_reply(user_message)
+        if not normalized:
+            return
+        entry = _Entry(normalized, extraction['intent'], extraction['confidence'],
+                       extraction['reasoning'], extraction.get('extracted_entities') or {})
+        with self._lock:
+            self._insert(signature, normalized, entry)
+            self._unsaved += 1
+            save_now = self.path is not None and self._unsaved >= SAVE_EVERY
+        if save_now:
+            self.save()
+
+    def _insert(self, signature: str, normalized: str, entry: _Entry):
+        """Add or replace an entry, evicting the least recently used (caller holds the lock)"""
+        key = (signature, normalized)
+        if key in self._entries:
+            self._unindex(key)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        for gram in entry.grams:
+            self._postings.setdefault((signature, gram), set()).add(normalized)
+        while len(self._entries) > self.max_entries:
+            self._unindex(next(iter(self._entries)))
+
+    def _unindex(self, key: Tuple[str, str]):
+        signature, normalized = key
+        entry = self._entries.pop(key)
+        for gram in entry.grams:
+            posting = self._postings.get((signature, gram))
+            if posting is not None:
+                posting.discard(normalized)
+                if not posting:
+                    del self._postings[(signature, gram)]
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path: Optional[str] = None):
+        """Write every entry as JSON lines, least recently used first (atomic replace)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            lines = [
+                json.dumps({
+                    'signature': signature,
+                    'reply': normalized,
+                    'intent': entry.intent,
+                    'confidence': entry.confidence,
+                    'reasoning': entry.reasoning,
+                    'entities': entry.entities,
+                    'hits': entry.hits
+                })
+                for (signature, normalized), entry in self._entries.items()
+            ]
+            self._unsaved = 0
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + ('\n' if lines else ''))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Add the entries saved at `path` (later lines are more recently used)"""
+        with open(path, 'r') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            for row in rows:
+                entry = _Entry(row['reply'], row['intent'], row['confidence'], row['reasoning'],
+                               row.get('entities') or {}, row.get('hits', 0))
+                self._insert(row['signature'], row['reply'], entry)
+
+    def stats(self) -> dict:
+        """Hit counts and the fraction of replies that skipped the LLM"""
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._entries)
+        lookups = sum(counts.values())
+        hits = counts[HIT_EXACT] + counts[HIT_SIMILAR]
+        return {
+            'entries': entries,
+            'lookups': lookups,
+            'exact_hits': counts[HIT_EXACT],
+            'similar_hits': counts[HIT_SIMILAR],
+            'misses': counts[MISS],
+            'skip_llm_fraction': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+
+_cache: Optional[IntentCache] = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+
+def get_intent_cache() -> Optional[IntentCache]:
+    """Process-wide cache (None unless CARELOOP_INTENT_CACHE is set); persistent caches save at exit"""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            setting = os.getenv(CACHE_ENV, '').strip()
+            if setting:
+                _cache = IntentCache(path=None if setting == IN_MEMORY else setting)
+                if _cache.path:
+                    atexit.register(_cache.save)
+            _cache_loaded = True
+        return _cache
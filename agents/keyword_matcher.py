@@ -0,0 +1,75 @@
+"""
+Keyword Matcher: compiled multi-pattern phrase matching
+The keyword fallback and the multiple-options check look for dozens of
+phrases per message. The phrases are compiled once into a trie, and the trie
+into a single regular expression (one branch per distinct next character), so
+one pass of the regex engine over the text finds every phrase and returns all
+matching labels together, instead of one substring scan per phrase.
+
+Phrases match whole words only: 'or' no longer matches inside "for", 'ok'
+inside "book", or '$5' inside "$50".
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, Set
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for the phrases below a trie node (the key '' marks a phrase end)"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A phrase ends here and longer ones continue: the longer match is tried first
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+class KeywordMatcher:
+    """
+    Phrase → label matcher built from {label: phrases}. A phrase may belong
+    to several labels; `labels(text)` returns every label with at least one
+    phrase in the text.
+    """
+
+    def __init__(self, phrases_by_label: Dict[str, Iterable[str]]):
+        labels_by_phrase: Dict[str, Set[str]] = {}
+        for label, phrases in phrases_by_label.items():
+            for phrase in phrases:
+                labels_by_phrase.setdefault(phrase.lower(), set()).add(label)
+
+        trie: Dict = {}
+        for phrase in labels_by_phrase:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # At each word start the engine reports the longest phrase there; shorter
+        # phrases it begins with (ending on a word boundary) matched as well
+        self._labels: Dict[str, FrozenSet[str]] = {}
+        for phrase, labels in labels_by_phrase.items():
+            found = set(labels)
+            for other, other_labels in labels_by_phrase.items():
+                if (len(other) < len(phrase) and phrase.startswith(other)
+                        and not _is_word_char(phrase[len(other)])):
+                    found |= other_labels
+            self._labels[phrase] = frozenset(found)
+
+        # Zero-width lookahead so matches can overlap (every word start is tried)
+        self._pattern = re.compile(r'(?<!\w)(?=(' + _trie_pattern(trie) + r')(?!\w))')
+
+    def labels(self, text: str) -> FrozenSet[str]:
+        """Labels of every phrase found in `text` (matched case-insensitively)"""
+        found = set()
+        for phrase in self._pattern.findall(text.lower()):
+            found |= self._labels[phrase]
+        return frozenset(found)
+
+    def matches(self, text: str) -> bool:
+        """True if any phrase is in `text`"""
+        return self._pattern.search(text.lower()) is not None
@@ -0,0 +1,161 @@
+"""
+Shared Claude Client
+Single entry point for every Claude call made by the agents, so that
+instrumentation (tracing, token usage, cost) lives in one place
+"""
+import os
+import time
+from typing import Dict, Iterator, Optional, Tuple
+from anthropic import Anthropic
+from dotenv import load_dotenv
+from utils.tracing import trace_call
+from utils.telemetry import Counter, get_registry, record_llm_usage
+from utils.llm_costs import (
+    usage_record,
+    record_call,
+    budget_mode,
+    current_campaign_id,
+    BUDGET_CHEAP_MODEL
+)
+from agents.model_router import (
+    tier_for,
+    model_for_tier,
+    latency_slo_ms,
+    budget_downgrade_tier
+)
+
+load_dotenv()
+
+# Initialize Claude client
+client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+
+SLO_BREACHES = get_registry().register(Counter(
+    'careloop_llm_slo_breaches_total',
+    'Claude calls slower than their tier latency SLO',
+    ('task', 'tier')
+))
+
+
+def cached_system(text: str) -> list:
+    """
+    System prompt as a cacheable prefix: the API caches everything up to and
+    including this block, so later calls with the same prefix read it from the
+    prompt cache (billed at a fraction of the input price, and faster to first
+    token). Prefixes shorter than the model's minimum cacheable length are
+    processed normally, uncached.
+    """
+    return [{'type': 'text', 'text': text, 'cache_control': {'type': 'ephemeral'}}]
+
+
+def resolve_model(task: str, tier: str = None) -> Tuple[str, str]:
+    """
+    (tier, model) for a call: the task's routed tier unless given, moved to
+    the budget downgrade tier when the active campaign is near its spend cap.
+    The returned tier is the one the call actually runs on (spans, SLOs).
+    """
+    tier = tier or tier_for(task)
+    if budget_mode(current_campaign_id()) == BUDGET_CHEAP_MODEL:
+        tier = budget_downgrade_tier()
+    return tier, model_for_tier(tier)
+
+
+def create_message(task: str, tier: str = None, **kwargs):
+    """
+    Call client.messages.create inside an 'llm' span named after the task
+    (e.g. 'llm.extract_intent', 'llm.generate_initial_outreach').
+
+    The model comes from the task's tier in data/model_routing.json unless
+    `tier` is given (used for escalation). When the campaign is near its
+    spend cap the call is moved to the budget downgrade tier.
+
+    Token usage, latency and estimated cost are captured for every call and
+    attached to the active usage scope (see utils.llm_costs.usage_scope).
+    """
+    tier, model = resolve_model(task, tier)
+
+    with trace_call(f'llm.{task}', kind='llm', model=model, tier=tier) as span:
+        started = time.perf_counter()
+        response = client.messages.create(model=model, **kwargs)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+    if latency_ms > latency_slo_ms(tier):
+        SLO_BREACHES.inc(task=task, tier=tier)
+
+    record = usage_record(task, model, response, latency_ms)
+    record['tier'] = tier
+    span.attributes.update({
+        'input_tokens': record['input_tokens'],
+        'output_tokens': record['output_tokens'],
+        'cache_read_input_tokens': record['cache_read_input_tokens'],
+        'cache_creation_input_tokens': record['cache_creation_input_tokens'],
+        'cost_usd': record['cost_usd']
+    })
+    record_call(record)
+    record_llm_usage(task, response)
+    return response
+
+
+def forced_tool(tool: dict) -> dict:
+    """create_message kwargs that make the model answer by calling `tool` (structured output)"""
+    return {'tools': [tool], 'tool_choice': {'type': 'tool', 'name': tool['name']}}
+
+
+def tool_input(response, name: str) -> Optional[dict]:
+    """Input of the response's `name` tool call (already parsed by the API), or None if it made none"""
+    for block in response.content:
+        if getattr(block, 'type', None) == 'tool_use' and block.name == name:
+            return block.input
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Message Batches API (deferred, non-urgent generation)
+# ---------------------------------------------------------------------------
+
+BATCH_ENDED = 'ended'
+
+
+def create_message_batch(task: str, requests: Dict[str, dict], tier: str = None) -> dict:
+    """
+    Submit {custom_id: client.messages.create kwargs (without model)} through
+    the asynchronous Message Batches API. Results arrive within 24 hours at
+    half the synchronous price; poll with message_batch_status and read them
+    with message_batch_results.
+
+    Returns {'batch_id', 'tier', 'model'}.
+    """
+    tier, model = resolve_model(task, tier)
+    with trace_call(f'llm_batch.{task}', kind='llm', model=model, tier=tier, requests=len(requests)):
+        batch = client.messages.batches.create(requests=[
+            {'custom_id': custom_id, 'params': {'model': model, **params}}
+            for custom_id, params in requests.items()
+        ])
+    return {'batch_id': batch.id, 'tier': tier, 'model': model}
+
+
+def message_batch_status(batch_id: str) -> str:
+    """'in_progress', 'canceling' or 'ended'"""
+    return client.messages.batches.retrieve(batch_id).processing_status
+
+
+def message_batch_results(batch_id: str) -> Iterator[Tuple[str, Optional[object]]]:
+    """
+    (custom_id, message) for every request in an ended batch; message is None
+    for requests that errored, expired or were canceled
+    """
+    for entry in client.messages.batches.results(batch_id):
+        result = entry.result
+        yield entry.custom_id, result.message if result.type == 'succeeded' else None
+
+
+def record_batch_usage(task: str, tier: str, model: str, response, turnaround_ms: float) -> dict:
+    """
+    Account for one batch result the way create_message accounts for a call
+    (active usage scope, campaign ledger, token metrics), priced at the batch
+    discount. `turnaround_ms` is submission to completion of the whole batch.
+    """
+    record = usage_record(task, model, response, turnaround_ms, batch=True)
+    record['tier'] = tier
+    record_call(record)
+    record_llm_usage(task, response)
+    return record
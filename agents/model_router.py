@@ -0,0 +1,70 @@
+"""
+Model Router: per-task Claude model tiers
+Short, constrained tasks (intent classification) run on a fast/cheap tier and
+escalate to a larger tier only when the cheap answer isn't usable.
+Configuration lives in data/model_routing.json.
+"""
+from typing import Optional
+from utils.config import load_model_routing
+
+
+def task_config(task: str) -> dict:
+    """Routing rules for a task (falls back to the 'default' entry)"""
+    tasks = load_model_routing()['tasks']
+    return tasks.get(task, tasks['default'])
+
+
+def tier_for(task: str) -> str:
+    """Tier that serves a task on its first attempt"""
+    return task_config(task).get('tier', load_model_routing()['default_tier'])
+
+
+def tier_config(tier: str) -> dict:
+    return load_model_routing()['tiers'][tier]
+
+
+def model_for_tier(tier: str) -> str:
+    return tier_config(tier)['model']
+
+
+def model_for(task: str) -> str:
+    """Claude model that serves a task on its first attempt"""
+    return model_for_tier(tier_for(task))
+
+
+def latency_slo_ms(tier: str) -> float:
+    return tier_config(tier).get('latency_slo_ms', float('inf'))
+
+
+def budget_downgrade_tier() -> str:
+    """Tier every call moves to once a campaign nears its LLM spend cap"""
+    return load_model_routing()['budget_downgrade_tier']
+
+
+def budget_downgrade_model() -> str:
+    """Model used once a campaign nears its LLM spend cap"""
+    return model_for_tier(budget_downgrade_tier())
+
+
+def escalation_tier(task: str, tier: str, result: Optional[dict]) -> Optional[str]:
+    """
+    Tier to retry on, or None if the result from `tier` is good enough.
+
+    `result` is the validated model output (None when it didn't match the schema).
+    Escalation rules per task:
+    - escalate_on_invalid_json: retry when the output couldn't be parsed
+    - escalate_below_confidence: retry when result['confidence'] is below it
+    """
+    config = task_config(task)
+    target = config.get('escalate_to')
+    if not target or target == tier:
+        return None
+
+    if result is None:
+        return target if config.get('escalate_on_invalid_json') else None
+
+    threshold = config.get('escalate_below_confidence')
+    if threshold is not None and result.get('confidence', 1.0) < threshold:
+        return target
+
+    return None
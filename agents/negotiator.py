@@ -1,30 +1,96 @@
 """
 Negotiator Agent: Claude-powered empathetic message generation
-Uses Claude Sonnet 4.5 to craft contextual, emotionally intelligent messages
+Uses Claude (the 'standard' tier in data/model_routing.json) to craft contextual,
+emotionally intelligent messages
 """
-import os
-from anthropic import Anthropic
+import threading
+from typing import Callable, Optional, Tuple
+
 from state import AgentState, NegotiatorOutput
-from dotenv import load_dotenv
+from agents import llm
+from agents.conversation_summary import add_agent_message, render_summary
+from agents.speculation import Speculator, speculator_from_env
+from utils.draft_store import get_draft_store, prompt_fingerprint
+from utils.telemetry import STRATEGIES
+from utils.llm_costs import UsageScope, attach_record, usage_scope, budget_mode, BUDGET_TEMPLATE
+
+
+# Stable prefix shared by every generation call and sent as the cached system
+# prompt (see llm.cached_system): the agent's role, the plan catalogue and the
+# house rules. Each generate_* function sends only its own short instructions.
+NEGOTIATOR_SYSTEM = """You are a compassionate customer care agent for VCA Animal Hospitals, a leading veterinary care network. You write to pet parents whose care plan payment has failed.
+
+Plans and options you can offer:
+
+Premium Care Plan
+- The customer's current plan, including unlimited in-person exams
+- Stays fully active during a payment extension
+
+Digital Keeper Plan (also called the Bridge Plan)
+- Cost: $4.99/month (vs $19.99/month Access Plan)
+- Includes: 24/7 Live Chat, Microchip & Membership, Exclusive Member Benefits, Medical Records Retention
+- Excluded: Unlimited Exams (in-person visits)
+- Duration: Flexible - upgrade back to Access Plan anytime
+- Purpose: keeps medical records active and 24/7 live chat access during financial hardship
+
+14-day payment extension
+- The customer stays on the Premium Plan and pays the full amount within 14 days
+
+House rules:
+- Write ONLY the message body (no subject line, no signature)
+- Never shame or blame the customer for the failed payment
+- Follow the length, structure and tone given in each request"""
+
+
+INITIAL_OUTREACH_TASK = 'generate_initial_outreach'
+INITIAL_OUTREACH_STRATEGY = 'initial_outreach_with_bridge_offer'
+INITIAL_OUTREACH_MAX_TOKENS = 300
+
+
+def generation_params(prompt: str, max_tokens: int) -> dict:
+    """Request body of a generation call (cached NEGOTIATOR_SYSTEM prefix + the per-message prompt), minus the model"""
+    return {
+        'max_tokens': max_tokens,
+        'system': llm.cached_system(NEGOTIATOR_SYSTEM),
+        'messages': [{"role": "user", "content": prompt}]
+    }
 
-load_dotenv()
 
-# Initialize Claude client
-client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+def with_conversation(prompt: str, state: AgentState) -> str:
+    """Per-message instructions plus the rolling conversation summary (bounded; see agents/conversation_summary.py)"""
+    summary = render_summary(state.get('conversation_summary'))
+    if not summary:
+        return prompt
+    return f"""{prompt}
+
+Conversation so far:
+{summary}"""
+
+
+def _generate(task: str, prompt: str, max_tokens: int) -> str:
+    """One generation call"""
+    response = llm.create_message(task, **generation_params(prompt, max_tokens))
+    return response.content[0].text
 
 
 def generate_initial_outreach(state: AgentState) -> str:
     """
     Generate the first message to the user after payment failure
     """
+    return _generate(INITIAL_OUTREACH_TASK, initial_outreach_prompt(state), max_tokens=INITIAL_OUTREACH_MAX_TOKENS)
+
+
+def initial_outreach_prompt(state: AgentState) -> str:
+    """
+    Per-customer instructions for the first message (also submitted through
+    the Message Batches API for deferred campaign outreach, see campaign.py)
+    """
     user_name = state['user_name']
     pet_name = state['pet_name']
     pet_condition = state['pet_condition']
     plan_cost = 50.00  # From state
 
-    prompt = f"""You are a compassionate customer care agent for VCA Animal Hospitals, a leading veterinary care network.
-
-Context:
+    prompt = f"""Context:
 - Customer: {user_name}
 - Pet: {pet_name} (diagnosed with {pet_condition})
 - Issue: Payment of ${plan_cost} failed on their Premium Care Plan
@@ -37,17 +103,26 @@ Write a brief, empathetic email (3-4 sentences) that:
 3. Introduces a solution: our $4.99/month "Digital Keeper Plan" that keeps medical records active and 24/7 live chat access during financial hardship
 4. Asks if they'd like to learn more
 
-Tone: Warm, human, supportive (not corporate). Mention the pet's name and condition to show you care.
+Tone: Warm, human, supportive (not corporate). Mention the pet's name and condition to show you care."""
 
-Write ONLY the email body (no subject line, no signature)."""
+    return prompt
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=300,
-        messages=[{"role": "user", "content": prompt}]
-    )
 
-    return response.content[0].text
+def precomputed_outreach(state: AgentState) -> Optional[str]:
+    """
+    The customer's first message drafted by the nightly precompute
+    (agents/outreach_precompute.py), or None. The draft's Claude call is
+    attached to the active usage scope.
+    """
+    store = get_draft_store()
+    if store is None:
+        return None
+    draft = store.take(state['user_id'], prompt_fingerprint(initial_outreach_prompt(state)))
+    if draft is None:
+        return None
+    for record in draft['usage']:
+        attach_record(record)
+    return draft['message']
 
 
 def generate_bridge_plan_explanation(state: AgentState) -> str:
@@ -56,13 +131,7 @@ def generate_bridge_plan_explanation(state: AgentState) -> str:
     """
     pet_name = state['pet_name']
 
-    prompt = f"""You are explaining the "Bridge Plan" to a customer who's interested but needs details.
-
-Digital Keeper Plan Details:
-- Cost: $4.99/month (vs $19.99/month Access Plan)
-- Includes: 24/7 Live Chat, Microchip & Membership, Exclusive Member Benefits, Medical Records Retention
-- Excluded: Unlimited Exams (in-person visits)
-- Duration: Flexible - upgrade back to Access Plan anytime
+    prompt = f"""You are explaining the "Bridge Plan" (Digital Keeper Plan) to a customer who's interested but needs details.
 
 Write a clear, reassuring explanation (3-4 sentences) that:
 1. Lists what {pet_name} KEEPS (telehealth, records)
@@ -72,13 +141,7 @@ Write a clear, reassuring explanation (3-4 sentences) that:
 
 Tone: Clear, helpful, no pressure."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=300,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return _generate('generate_bridge_plan_explanation', with_conversation(prompt, state), max_tokens=300)
 
 
 def generate_decline_response(state: AgentState) -> str:
@@ -102,13 +165,7 @@ Write a brief, respectful message (2-3 sentences) that:
 
 Tone: Professional, no guilt-tripping."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=250,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return _generate('generate_decline_response', with_conversation(prompt, state), max_tokens=250)
 
 
 def generate_success_confirmation(state: AgentState) -> str:
@@ -126,13 +183,7 @@ Write a warm confirmation message (2-3 sentences) that:
 
 Tone: Celebratory but calm, supportive."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=200,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return _generate('generate_success_confirmation', with_conversation(prompt, state), max_tokens=200)
 
 
 def generate_payment_extension_response(state: AgentState) -> str:
@@ -152,13 +203,7 @@ Write a response (2-3 sentences) that:
 
 Tone: Accommodating, helpful, gives them choices."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=250,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return _generate('generate_payment_extension_response', with_conversation(prompt, state), max_tokens=250)
 
 
 def generate_clarification_request(state: AgentState) -> str:
@@ -178,13 +223,7 @@ Write a brief, friendly clarification request (1-2 sentences) that:
 
 Tone: Friendly, not robotic, quick clarification."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=200,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
+    return _generate('generate_clarification_request', with_conversation(prompt, state), max_tokens=200)
 
 
 def generate_extension_confirmation(state: AgentState) -> str:
@@ -204,57 +243,148 @@ Write a confirmation message (2-3 sentences) that:
 
 Tone: Supportive, professional, reassuring."""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=200,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.content[0].text
-
-
-def negotiator_node(state: AgentState) -> dict:
+    return _generate('generate_extension_confirmation', with_conversation(prompt, state), max_tokens=200)
+
+
+# Fixed-text messages used instead of Claude once a campaign's LLM budget is spent
+TEMPLATE_MESSAGES = {
+    'initial_outreach_with_bridge_offer': (
+        "Hi {user_name}, we weren't able to process your latest Premium Care Plan payment. "
+        "We know how important {pet_name}'s ongoing care is, and we want to make sure it isn't interrupted. "
+        "Our $4.99/month Digital Keeper Plan keeps {pet_name}'s medical records active and gives you 24/7 live chat "
+        "while things settle. Would you like to hear more?"
+    ),
+    'request_clarification': (
+        "Thanks for getting back to us, {user_name}! Just to confirm, which would you like: "
+        "(A) a 14-day payment extension on your Premium Plan, or "
+        "(B) the $4.99/month Digital Keeper Plan?"
+    ),
+    'confirm_payment_extension': (
+        "You're all set, {user_name}: your 14-day payment extension is approved and {pet_name} keeps every "
+        "Premium benefit in the meantime. Just reach out if anything changes."
+    ),
+    'explain_bridge_plan_details': (
+        "With the Digital Keeper Plan ($4.99/month), {pet_name} keeps 24/7 live chat, microchip & membership, "
+        "member benefits and full medical records. In-person unlimited exams are paused, and you can upgrade "
+        "back anytime. Would you like me to switch you to the Bridge Plan?"
+    ),
+    'offer_payment_extension': (
+        "We can offer a 14-day payment extension so you stay on your Premium Plan, {user_name}. "
+        "Alternatively, the $4.99/month Digital Keeper Plan keeps {pet_name}'s essentials covered in the meantime. "
+        "Which would you prefer?"
+    ),
+    'offer_payment_update_or_cancel': (
+        "Understood, {user_name}. You can either update your payment method to keep the Premium Plan active, "
+        "or cancel the subscription (which ends access for {pet_name}). Which would you prefer?"
+    ),
+    'confirm_bridge_activation': (
+        "Done! The Digital Keeper Plan is now active at $4.99/month. {pet_name}'s medical records and 24/7 "
+        "telehealth stay available, and you can upgrade back to Premium anytime."
+    ),
+}
+
+
+def render_template_message(strategy: str, state: AgentState) -> str:
+    """Fill a fixed-text template for the strategy (no Claude call)"""
+    return TEMPLATE_MESSAGES[strategy].format(user_name=state['user_name'], pet_name=state['pet_name'])
+
+
+def plan_message(conversation_stage: str, current_intent: Optional[str]) -> Tuple[Optional[Callable[[AgentState], str]], str]:
     """
-    Main negotiator node - generates appropriate message based on conversation stage
+    Which message to generate next: (generate function, strategy). The
+    generate function is None for the default acknowledgment.
     """
-    conversation_stage = state['conversation_stage']
-    current_intent = state.get('current_intent')
-
-    # Determine which message to generate
     if conversation_stage == 'initial':
-        message = generate_initial_outreach(state)
-        strategy = 'initial_outreach_with_bridge_offer'
+        return generate_initial_outreach, INITIAL_OUTREACH_STRATEGY
 
     elif current_intent == 'ambiguous_acceptance':
         # User said yes but didn't specify which option - need clarification
-        message = generate_clarification_request(state)
-        strategy = 'request_clarification'
+        return generate_clarification_request, 'request_clarification'
 
     elif current_intent == 'accept_extension':
         # User explicitly chose payment extension
-        message = generate_extension_confirmation(state)
-        strategy = 'confirm_payment_extension'
+        return generate_extension_confirmation, 'confirm_payment_extension'
 
     elif current_intent == 'financial_hardship' or current_intent == 'ask_for_more_info':
-        message = generate_bridge_plan_explanation(state)
-        strategy = 'explain_bridge_plan_details'
+        return generate_bridge_plan_explanation, 'explain_bridge_plan_details'
 
     elif current_intent == 'ask_for_time':
-        message = generate_payment_extension_response(state)
-        strategy = 'offer_payment_extension'
+        return generate_payment_extension_response, 'offer_payment_extension'
 
     elif current_intent == 'decline_bridge':
-        message = generate_decline_response(state)
-        strategy = 'offer_payment_update_or_cancel'
+        return generate_decline_response, 'offer_payment_update_or_cancel'
 
     elif current_intent == 'accept_bridge':
-        message = generate_success_confirmation(state)
-        strategy = 'confirm_bridge_activation'
+        return generate_success_confirmation, 'confirm_bridge_activation'
+
+    # Default fallback
+    return None, 'default_acknowledgment'
+
+
+def plan_reply(intent: str) -> Optional[Tuple[Callable[[AgentState], str], str]]:
+    """Generated reply to a customer intent, or None when there is nothing to generate (speculation plan)"""
+    generate, strategy = plan_message('negotiating', intent)
+    return (generate, strategy) if generate is not None else None
+
+
+_speculator: Optional[Speculator] = None
+_speculator_lock = threading.Lock()
+_speculator_loaded = False
+
+
+def get_speculator() -> Optional[Speculator]:
+    """Process-wide speculator (None unless CARELOOP_SPECULATION is set)"""
+    global _speculator, _speculator_loaded
+    with _speculator_lock:
+        if not _speculator_loaded:
+            _speculator = speculator_from_env(plan_reply)
+            _speculator_loaded = True
+        return _speculator
+
 
-    else:
-        # Default fallback
-        message = "Thank you for your response. Our team will follow up with you shortly."
-        strategy = 'default_acknowledgment'
+def negotiator_node(state: AgentState) -> dict:
+    """
+    Main negotiator node - generates appropriate message based on conversation stage
+    """
+    conversation_stage = state['conversation_stage']
+    current_intent = state.get('current_intent')
+    campaign_id = state.get('campaign_id')
+
+    # Determine which message to generate
+    generate, strategy = plan_message(conversation_stage, current_intent)
+
+    # Drafted ahead of time: the first message by the nightly precompute,
+    # replies in the background after the previous message when speculation
+    # is enabled and this intent was among the predicted ones
+    speculator = get_speculator()
+    with usage_scope(campaign_id) as usage:
+        if conversation_stage == 'initial':
+            draft = precomputed_outreach(state)
+        elif speculator is not None:
+            draft = speculator.claim(state, strategy)
+        else:
+            draft = None
+        if generate is None:
+            message = "Thank you for your response. Our team will follow up with you shortly."
+        elif draft is not None:
+            message = draft
+        elif budget_mode(campaign_id) == BUDGET_TEMPLATE:
+            # Campaign is at its LLM spend cap - fall back to fixed templates
+            message = render_template_message(strategy, state)
+        else:
+            message = generate(state)
+
+    update = message_update(state, message, strategy, usage)
+    if speculator is not None:
+        speculator.speculate({**state, **update})
+    return update
+
+
+def message_update(state: AgentState, message: str, strategy: str, usage: UsageScope) -> dict:
+    """State update for a new assistant message and the Claude calls that produced it"""
+    llm_usage = usage.totals(state.get('llm_usage'))
+
+    STRATEGIES.inc(strategy=strategy)
 
     # Update state with new message
     new_message = {
@@ -266,9 +396,13 @@ def negotiator_node(state: AgentState) -> dict:
     return {
         'messages': state['messages'] + [new_message],
         'negotiation_strategy': strategy,
+        'conversation_summary': add_agent_message(state.get('conversation_summary'), strategy),
+        'llm_usage': llm_usage,
+        'llm_cost_usd': llm_usage['cost_usd'],
         'tool_calls': state.get('tool_calls', []) + [{
             'agent': 'negotiator',
             'strategy': strategy,
-            'message_preview': message[:100] + '...'
+            'message_preview': message[:100] + '...',
+            'llm_calls': usage.calls
         }]
     }
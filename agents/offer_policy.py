@@ -0,0 +1,154 @@
+"""
+Offer Policy: decision table for the router's offer selection
+Rules from data/offer_policy.json are compiled once into a banded grid over
+(medical urgency, payment risk); selecting an offer is two bisects and an
+index, for one customer or a whole cohort
+"""
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence
+
+URGENCY = 'medical_urgency_score'
+PAYMENT_RISK = 'payment_risk_score'
+
+# Condition operators per dimension. Urgency thresholds start a band
+# (left-closed: [a, b)); payment risk thresholds end one (right-closed: (a, b]).
+_DIMENSION_OPERATORS = {
+    URGENCY: ('min', 'below'),
+    PAYMENT_RISK: ('max', 'above')
+}
+
+
+def _holds(condition: dict, value: float) -> bool:
+    if 'min' in condition and value < condition['min']:
+        return False
+    if 'below' in condition and value >= condition['below']:
+        return False
+    if 'max' in condition and value > condition['max']:
+        return False
+    if 'above' in condition and value <= condition['above']:
+        return False
+    return True
+
+
+def _edges(rules: List[dict], dimension: str) -> List[float]:
+    allowed = _DIMENSION_OPERATORS[dimension]
+    edges = set()
+    for rule in rules:
+        for operator, threshold in rule['when'].get(dimension, {}).items():
+            if operator not in allowed:
+                raise ValueError(
+                    f"Offer policy rule '{rule['offer']}': {dimension} supports {allowed}, not '{operator}'"
+                )
+            edges.add(threshold)
+    return sorted(edges)
+
+
+def _representatives(edges: List[float], left_closed: bool) -> List[float]:
+    """One value inside each band (every value in a band gets the same offer)"""
+    if not edges:
+        return [0.0]
+    if left_closed:
+        # bands: (-inf, e0), [e0, e1), ..., [en, inf)
+        return [edges[0] - 1] + edges
+    # bands: (-inf, e0], (e0, e1], ..., (en, inf)
+    return edges + [edges[-1] + 1]
+
+
+class OfferPolicy:
+    """
+    Compiled offer decision table.
+
+    `grid[u][r]` is the offer for urgency band u and payment-risk band r;
+    bands come from the rule thresholds, so the grid reproduces the
+    first-match rule order exactly.
+    """
+
+    def __init__(self, rules: List[dict]):
+        if not rules or rules[-1]['when']:
+            raise ValueError("Offer policy needs a final catch-all rule with no conditions")
+        for rule in rules:
+            unknown = set(rule['when']) - set(_DIMENSION_OPERATORS)
+            if unknown:
+                raise ValueError(f"Offer policy rule '{rule['offer']}' uses unknown inputs: {sorted(unknown)}")
+
+        self.rules = rules
+        self.reasoning_templates = {rule['offer']: '\n'.join(rule.get('reasoning', [])) for rule in rules}
+        self.urgency_edges = _edges(rules, URGENCY)
+        self.risk_edges = _edges(rules, PAYMENT_RISK)
+
+        self.grid = [
+            [self._first_match(urgency, risk) for risk in _representatives(self.risk_edges, left_closed=False)]
+            for urgency in _representatives(self.urgency_edges, left_closed=True)
+        ]
+
+    def _first_match(self, urgency: float, risk: float) -> str:
+        for rule in self.rules:
+            when = rule['when']
+            if _holds(when.get(URGENCY, {}), urgency) and _holds(when.get(PAYMENT_RISK, {}), risk):
+                return rule['offer']
+
+    def select(self, medical_urgency_score: float, payment_risk_score: float) -> str:
+        """Offer for one customer"""
+        return self.grid[bisect_right(self.urgency_edges, medical_urgency_score)][
+            bisect_left(self.risk_edges, payment_risk_score)
+        ]
+
+    def select_batch(self, medical_urgency_scores: Sequence[float], payment_risk_scores: Sequence[float]) -> List[str]:
+        """
+        Offers for a whole cohort (same order as the inputs). Uses numpy when
+        it is installed, otherwise a pure-Python loop over the same grid.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is None:
+            urgency_edges, risk_edges, grid = self.urgency_edges, self.risk_edges, self.grid
+            return [
+                grid[bisect_right(urgency_edges, urgency)][bisect_left(risk_edges, risk)]
+                for urgency, risk in zip(medical_urgency_scores, payment_risk_scores)
+            ]
+
+        offers = np.array(self.grid, dtype=object)
+        urgency_bands = np.searchsorted(self.urgency_edges, np.asarray(medical_urgency_scores, dtype=float), side='right')
+        risk_bands = np.searchsorted(self.risk_edges, np.asarray(payment_risk_scores, dtype=float), side='left')
+        return offers[urgency_bands, risk_bands].tolist()
+
+    def render_reasoning(self, offer: str, context: Dict) -> str:
+        """Reasoning text for an offer, filled from the router's reasoning context"""
+        return self.reasoning_templates[offer].format(**context)
+
+
+_policy = None
+
+
+def load_offer_policy() -> OfferPolicy:
+    """Load and compile data/offer_policy.json (once per process)"""
+    global _policy
+    if _policy is None:
+        with open('data/offer_policy.json', 'r') as f:
+            _policy = OfferPolicy(json.load(f)['rules'])
+    return _policy
+
+
+def select_offers_for_cohort(cohort: List[dict]) -> List[str]:
+    """Batch offer selection for cohort dicts with medical_urgency_score / payment_risk_score"""
+    return load_offer_policy().select_batch(
+        [customer[URGENCY] for customer in cohort],
+        [customer[PAYMENT_RISK] for customer in cohort]
+    )
+
+
+def router_reasoning(entry: dict) -> str:
+    """
+    Reasoning text for a router tool_calls entry, rendered on demand from the
+    stored decision and reasoning context (older entries carry the text itself)
+    """
+    if entry.get('reasoning'):
+        return entry['reasoning']
+    context = entry.get('reasoning_context')
+    if not context:
+        return ''
+    return load_offer_policy().render_reasoning(entry['decision'], context)
@@ -0,0 +1,194 @@
+"""
+Nightly Outreach Precompute
+The first outreach email is otherwise generated only after the payment
+failure arrives. Billing dates follow from `last_payment_date` (monthly, same
+day of month) and failure risk from the payment history, so each night this
+stage finds the customers due in the next billing window who are likely to
+fail, drafts their initial outreach through the Message Batches API (half the
+price; the nightly run can wait for it) and leaves the drafts in the draft
+store (utils/draft_store.py). When a failure arrives, the negotiator takes
+the draft instead of calling Claude; customers without a usable draft are
+generated as before.
+
+Usage (from the repo root):
+    python -m agents.outreach_precompute --db drafts.sqlite                 # customers due tomorrow
+    python -m agents.outreach_precompute --db drafts.sqlite --window-days 3 --min-probability 0.1 --today 2025-12-04
+"""
+import json
+import time
+import calendar
+import argparse
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from state import build_initial_state
+from agents import llm
+from agents.negotiator import (
+    INITIAL_OUTREACH_MAX_TOKENS,
+    INITIAL_OUTREACH_TASK,
+    generation_params,
+    initial_outreach_prompt
+)
+from utils.draft_store import DraftStore, prompt_fingerprint
+from utils.llm_costs import usage_scope
+from utils.metrics import load_mock_data
+
+DEFAULT_WINDOW_DAYS = 1
+DEFAULT_MIN_FAILURE_PROBABILITY = 0.2
+DEFAULT_POLL_INTERVAL_S = 60.0
+
+# Drafts outlive the billing window by this much (retries and late failure reports)
+DRAFT_GRACE_DAYS = 3
+
+# Failure probability model: recency-weighted failure rate over the payment
+# history (each older payment weighs 0.8x the next), smoothed toward a base rate
+BASE_FAILURE_RATE = 0.1
+PRIOR_WEIGHT = 1.0
+RECENCY_DECAY = 0.8
+
+
+def add_months(day: date, months: int) -> date:
+    """Same day of month `months` later, clamped to the month's last day"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def next_due_date(last_payment_date: str, today: date) -> date:
+    """First monthly billing date after `today`, on the day of month of the last payment"""
+    last = date.fromisoformat(last_payment_date)
+    months = max(1, (today.year - last.year) * 12 + today.month - last.month)
+    due = add_months(last, months)
+    while due <= today:
+        months += 1
+        due = add_months(last, months)
+    return due
+
+
+def failure_probability(user_data: Dict) -> float:
+    """
+    Estimated probability that the customer's next payment fails: the latest
+    payment status and the payment history, most recent first
+    """
+    outcomes = []
+    if user_data.get('last_payment_status'):
+        outcomes.append(user_data['last_payment_status'] == 'failed')
+    history = sorted(user_data.get('payment_history') or [], key=lambda payment: payment['date'], reverse=True)
+    outcomes.extend(payment['status'] == 'failed' for payment in history)
+
+    failed, total, weight = BASE_FAILURE_RATE * PRIOR_WEIGHT, PRIOR_WEIGHT, 1.0
+    for is_failure in outcomes:
+        failed += weight * is_failure
+        total += weight
+        weight *= RECENCY_DECAY
+    return round(failed / total, 4)
+
+
+def likely_failures(users: Dict[str, Dict], today: date, window_days: int = DEFAULT_WINDOW_DAYS,
+                    min_probability: float = DEFAULT_MIN_FAILURE_PROBABILITY) -> List[Tuple[str, date, float]]:
+    """(user_id, due_date, failure probability) of customers due within the window, most likely first"""
+    window_end = today + timedelta(days=window_days)
+    candidates = []
+    for user_id, user_data in users.items():
+        if not user_data.get('last_payment_date') or user_data.get('current_plan') == 'cancelled':
+            continue
+        due = next_due_date(user_data['last_payment_date'], today)
+        if due > window_end:
+            continue
+        probability = failure_probability(user_data)
+        if probability >= min_probability:
+            candidates.append((user_id, due, probability))
+    candidates.sort(key=lambda candidate: -candidate[2])
+    return candidates
+
+
+def precompute_outreach(
+    store: DraftStore,
+    users: Dict[str, Dict],
+    today: Optional[date] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    min_probability: float = DEFAULT_MIN_FAILURE_PROBABILITY,
+    campaign_id: Optional[str] = None,
+    poll_interval_s: float = DEFAULT_POLL_INTERVAL_S
+) -> Dict:
+    """
+    Draft initial outreach for the likely failures of the next billing
+    window and store them; waits for the message batch to end. Spend is
+    charged to `campaign_id` when given.
+    """
+    today = today or date.today()
+    store.purge_expired()
+    candidates = likely_failures(users, today, window_days, min_probability)
+    summary = {'today': today.isoformat(), 'window_days': window_days, 'candidates': len(candidates),
+               'drafted': 0, 'failed': 0, 'batch_id': None, 'cost_usd': 0.0}
+    if not candidates:
+        return summary
+
+    prompts = {
+        user_id: initial_outreach_prompt(build_initial_state(user_id, users[user_id], campaign_id))
+        for user_id, _, _ in candidates
+    }
+    with usage_scope(campaign_id):
+        batch = llm.create_message_batch(INITIAL_OUTREACH_TASK, {
+            user_id: generation_params(prompt, INITIAL_OUTREACH_MAX_TOKENS) for user_id, prompt in prompts.items()
+        })
+    summary['batch_id'] = batch['batch_id']
+
+    submitted = time.perf_counter()
+    while llm.message_batch_status(batch['batch_id']) != llm.BATCH_ENDED:
+        time.sleep(poll_interval_s)
+    turnaround_ms = (time.perf_counter() - submitted) * 1000
+
+    due_by_user = {user_id: (due, probability) for user_id, due, probability in candidates}
+    drafts = []
+    with usage_scope(campaign_id) as usage:
+        for user_id, response in llm.message_batch_results(batch['batch_id']):
+            if response is None or user_id not in due_by_user:
+                continue  # generated at failure time instead
+            record = llm.record_batch_usage(INITIAL_OUTREACH_TASK, batch['tier'], batch['model'], response,
+                                            turnaround_ms)
+            due, probability = due_by_user[user_id]
+            drafts.append({
+                'user_id': user_id,
+                'due_date': due.isoformat(),
+                'failure_probability': probability,
+                'message': response.content[0].text,
+                'fingerprint': prompt_fingerprint(prompts[user_id]),
+                'usage': [record]
+            })
+    store.put_many(drafts, ttl=timedelta(days=window_days + DRAFT_GRACE_DAYS))
+
+    summary.update(drafted=len(drafts), failed=len(candidates) - len(drafts), cost_usd=round(usage.cost_usd, 6))
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Draft initial outreach for the next billing window's likely failures")
+    parser.add_argument('--db', default='drafts.sqlite', help='Draft store (SQLite file, as CARELOOP_DRAFT_STORE)')
+    parser.add_argument('--today', help='Run as of this date (YYYY-MM-DD; default: today)')
+    parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS, help='Billing window after today')
+    parser.add_argument('--min-probability', type=float, default=DEFAULT_MIN_FAILURE_PROBABILITY,
+                        help='Draft only customers at least this likely to fail')
+    parser.add_argument('--campaign-id', help='Charge the drafting spend to this campaign')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL_S)
+    args = parser.parse_args(argv)
+
+    store = DraftStore(args.db)
+    try:
+        summary = precompute_outreach(
+            store,
+            load_mock_data()['users'],
+            today=date.fromisoformat(args.today) if args.today else date.today(),
+            window_days=args.window_days,
+            min_probability=args.min_probability,
+            campaign_id=args.campaign_id,
+            poll_interval_s=args.poll_interval
+        )
+    finally:
+        store.close()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -4,8 +4,10 @@ Uses internal payment data only - no third-party credit bureaus
 """
 from datetime import datetime, timedelta
 from typing import Dict, List
+from utils.tracing import traced_call
 
 
+@traced_call('db.get_payment_history', kind='db')
 def get_payment_history(user_id: str) -> Dict:
     """
     Analyze customer's payment history with VCA.
@@ -0,0 +1,119 @@
+"""
+Scoring Record Types
+Compact, slotted records for retention scores and batch-scored cohort rows,
+where many results are held at once. The single-customer scoring functions
+keep returning dicts (LangGraph state, Glass Box UI, JSON);
+`to_dict()` / `from_dict()` convert between the two shapes.
+
+Plain classes with `__slots__` rather than `@dataclass(slots=True)`, which
+needs Python 3.10.
+"""
+from typing import Dict, Tuple
+
+
+class Record:
+    """
+    Base for slotted records: fields are the subclass's `__slots__`, in order.
+    `DEFAULTS` fills fields that are neither passed nor in a source dict
+    (None otherwise).
+    """
+    __slots__ = ()
+    DEFAULTS: Dict[str, object] = {}
+
+    def __init__(self, *args, **kwargs):
+        names = self.__slots__
+        if len(args) > len(names):
+            raise TypeError(f'{type(self).__name__} takes at most {len(names)} fields ({len(args)} given)')
+        for name, value in zip(names, args):
+            setattr(self, name, value)
+        defaults = self.DEFAULTS
+        for name in names[len(args):]:
+            setattr(self, name, kwargs.pop(name, defaults.get(name)))
+        if kwargs:
+            raise TypeError(f'{type(self).__name__} has no field {next(iter(kwargs))!r}')
+
+    @classmethod
+    def fields(cls) -> Tuple[str, ...]:
+        return cls.__slots__
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Record':
+        """Build from a dict; keys that aren't fields are ignored"""
+        defaults = cls.DEFAULTS
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, data.get(name, defaults.get(name)))
+        return record
+
+    def to_dict(self) -> Dict:
+        """Dict with the same keys and nesting as the original dict results"""
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            result[name] = value.to_dict() if isinstance(value, Record) else value
+        return result
+
+    def __getitem__(self, name: str):
+        # Read-only dict-style access, so code written against the dict
+        # results keeps working when handed a record
+        if name not in self.__slots__:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name: str, default=None):
+        return getattr(self, name, default) if name in self.__slots__ else default
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+# ---------------------------------------------------------------------------
+# Retention scoring (agents/retention_scorer.py)
+# ---------------------------------------------------------------------------
+
+class ScoreBreakdown(Record):
+    __slots__ = (
+        'medical_component',
+        'customer_value_component',
+        'engagement_component',
+        'financial_modifier'
+    )
+
+
+class RetentionScore(Record):
+    __slots__ = (
+        'retention_priority_score',
+        'decision',
+        'action',
+        'reasoning',
+        'breakdown',
+        'should_engage_ai'
+    )
+
+
+class ScoredCustomer(Record):
+    """One row of a batch-scored cohort (the fields batch_score_customers produces)"""
+    __slots__ = (
+        'user_id',
+        'medical_urgency_score',
+        'payment_risk_score',
+        'medication_adherence_score',
+        'ltv',
+        'tenure_months',
+        'retention_score',
+        'retention_decision',
+        'should_engage'
+    )
+    DEFAULTS = {
+        'medical_urgency_score': 50,
+        'payment_risk_score': 50,
+        'medication_adherence_score': 70,
+        'ltv': 0,
+        'tenure_months': 0
+    }
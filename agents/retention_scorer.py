@@ -2,7 +2,9 @@
 Retention Priority Scorer
 Autonomous decision-making for which customers deserve AI agent intervention
 """
-from typing import Dict
+from typing import Dict, Iterable, List, Tuple
+
+from agents.records import RetentionScore, ScoreBreakdown, ScoredCustomer
 
 
 def calculate_retention_priority_score(
@@ -28,6 +30,66 @@ def calculate_retention_priority_score(
     - 0-39 = IGNORE (standard dunning, no AI agent)
     """
 
+    (total_score, decision, action, reasoning, medical_component,
+     customer_value_component, engagement_score, financial_modifier) = _retention_components(
+        medical_urgency_score, payment_risk_score, medication_adherence_score, ltv, tenure_months
+    )
+
+    # Build detailed breakdown
+    breakdown = {
+        'medical_component': round(medical_component, 1),
+        'customer_value_component': customer_value_component,
+        'engagement_component': engagement_score,
+        'financial_modifier': financial_modifier
+    }
+
+    return {
+        'retention_priority_score': round(total_score, 1),
+        'decision': decision,
+        'action': action,
+        'reasoning': reasoning,
+        'breakdown': breakdown,
+        'should_engage_ai': total_score >= 70  # Boolean flag for easy filtering
+    }
+
+
+def score_retention_priority(
+    medical_urgency_score: float,
+    payment_risk_score: float,
+    medication_adherence_score: int,
+    ltv: float,
+    tenure_months: int
+) -> RetentionScore:
+    """Record form of calculate_retention_priority_score, for batch/cohort scoring"""
+    (total_score, decision, action, reasoning, medical_component,
+     customer_value_component, engagement_score, financial_modifier) = _retention_components(
+        medical_urgency_score, payment_risk_score, medication_adherence_score, ltv, tenure_months
+    )
+
+    return RetentionScore(
+        round(total_score, 1),
+        decision,
+        action,
+        reasoning,
+        ScoreBreakdown(
+            round(medical_component, 1),
+            customer_value_component,
+            engagement_score,
+            financial_modifier
+        ),
+        total_score >= 70
+    )
+
+
+def _retention_components(
+    medical_urgency_score: float,
+    payment_risk_score: float,
+    medication_adherence_score: int,
+    ltv: float,
+    tenure_months: int
+) -> Tuple:
+    """Total score, decision tier and score components shared by both result forms"""
+
     # Component 1: Medical Urgency (40% weight - most important)
     # If the pet's health is at risk, we need to act regardless of other factors
     medical_component = (medical_urgency_score / 100) * 40
@@ -102,22 +164,8 @@ def calculate_retention_priority_score(
         action = 'Standard dunning process only'
         reasoning = 'Low retention priority. Not worth AI agent resources.'
 
-    # Build detailed breakdown
-    breakdown = {
-        'medical_component': round(medical_component, 1),
-        'customer_value_component': customer_value_component,
-        'engagement_component': engagement_score,
-        'financial_modifier': financial_modifier
-    }
-
-    return {
-        'retention_priority_score': round(total_score, 1),
-        'decision': decision,
-        'action': action,
-        'reasoning': reasoning,
-        'breakdown': breakdown,
-        'should_engage_ai': total_score >= 70  # Boolean flag for easy filtering
-    }
+    return (total_score, decision, action, reasoning, medical_component,
+            customer_value_component, engagement_score, financial_modifier)
 
 
 def get_outreach_recommendation(retention_data: Dict, medical_urgency_tier: str) -> str:
@@ -190,6 +238,33 @@ def batch_score_customers(customers: list) -> list:
     return scored_customers
 
 
+def batch_score_records(customers: Iterable[Dict]) -> List[ScoredCustomer]:
+    """
+    batch_score_customers for large cohorts: each row becomes a slotted
+    ScoredCustomer instead of a copied dict (fields the scorer doesn't use
+    are dropped). Sorted by retention score, highest first.
+    """
+    scored_customers = []
+
+    for customer in customers:
+        row = ScoredCustomer.from_dict(customer)
+        score = score_retention_priority(
+            row.medical_urgency_score,
+            row.payment_risk_score,
+            row.medication_adherence_score,
+            row.ltv,
+            row.tenure_months
+        )
+        row.retention_score = score.retention_priority_score
+        row.retention_decision = score.decision
+        row.should_engage = score.should_engage_ai
+        scored_customers.append(row)
+
+    scored_customers.sort(key=lambda row: row.retention_score, reverse=True)
+
+    return scored_customers
+
+
 def get_daily_outreach_list(all_payment_failures: list, ai_agent_capacity: int = 10) -> Dict:
     """
     Given a list of payment failures, determine which ones should get AI agent outreach.
@@ -207,6 +282,35 @@ def get_daily_outreach_list(all_payment_failures: list, ai_agent_capacity: int =
     secondary = [c for c in scored if c['retention_decision'] == 'SECONDARY_OUTREACH']
     ignore = [c for c in scored if c['retention_decision'] == 'IGNORE']
 
+    return build_outreach_list(
+        total_failures=len(all_payment_failures),
+        priority=priority,
+        secondary=secondary,
+        priority_count=len(priority),
+        secondary_count=len(secondary),
+        ignore_count=len(ignore),
+        standard_dunning_list=ignore,
+        ai_agent_capacity=ai_agent_capacity
+    )
+
+
+def build_outreach_list(
+    total_failures: int,
+    priority: list,
+    secondary: list,
+    priority_count: int,
+    secondary_count: int,
+    ignore_count: int,
+    standard_dunning_list: list,
+    ai_agent_capacity: int
+) -> Dict:
+    """
+    Assemble the daily outreach result from ranked priority/secondary customers.
+
+    `priority` and `secondary` must be sorted by retention score (highest first)
+    but need only hold the top `ai_agent_capacity` of each; the counts are the
+    full tier sizes.
+    """
     # Select customers for AI agent
     ai_outreach = priority[:ai_agent_capacity]  # Start with priority customers
 
@@ -216,15 +320,15 @@ def get_daily_outreach_list(all_payment_failures: list, ai_agent_capacity: int =
         ai_outreach.extend(secondary[:remaining_capacity])
 
     return {
-        'total_failures': len(all_payment_failures),
-        'priority_count': len(priority),
-        'secondary_count': len(secondary),
-        'ignore_count': len(ignore),
+        'total_failures': total_failures,
+        'priority_count': priority_count,
+        'secondary_count': secondary_count,
+        'ignore_count': ignore_count,
         'ai_outreach_list': ai_outreach,
-        'standard_dunning_list': ignore,
+        'standard_dunning_list': standard_dunning_list,
         'recommendation': (
             f"Deploy AI agent to {len(ai_outreach)} customers. "
-            f"Route {len(ignore)} to standard dunning. "
-            f"{len(secondary) - (len(ai_outreach) - len(priority))} customers queued for follow-up."
+            f"Route {ignore_count} to standard dunning. "
+            f"{secondary_count - (len(ai_outreach) - priority_count)} customers queued for follow-up."
         )
     }
@@ -0,0 +1,151 @@
+"""
+Router Sub-Score Cache
+Memoizes the router's sub-scores (payment risk, financial capacity, medical
+urgency, retention priority) on a fingerprint of their input records, so
+re-routing a customer whose payment history and ezyVet records haven't
+changed skips the recomputation
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+
+from agents.payment_history import calculate_payment_risk_score, assess_financial_capacity
+from agents.ezyvet_client import assess_medical_urgency
+from agents.retention_scorer import calculate_retention_priority_score
+from utils.telemetry import Counter, get_registry
+
+# Record fields each sub-score reads. The fingerprint of a record is the
+# tuple of these values: it changes exactly when the sub-score's inputs do,
+# and is far cheaper to build than hashing the whole serialized record.
+PAYMENT_RISK_FIELDS = (
+    'total_payments',
+    'failed_payments',
+    'late_payments',
+    'avg_days_to_payment',
+    'declined_transactions_last_6mo',
+    'current_balance_owed'
+)
+FINANCIAL_CAPACITY_FIELDS = ('historical_payment_reliability', 'current_balance_owed')
+MEDICAL_URGENCY_FIELDS = ('continuity_of_care_importance',)
+ADHERENCE_FIELDS = ('adherence_score',)
+
+MAX_ENTRIES_PER_SUBSCORE = 10000
+
+CACHE_LOOKUPS = get_registry().register(Counter(
+    'careloop_router_cache_lookups_total',
+    'Router sub-score cache lookups',
+    ('subscore', 'result')
+))
+
+
+def fingerprint(record: Dict, fields: Tuple[str, ...]) -> tuple:
+    """Version key of a source record, as seen by one sub-score"""
+    return tuple(record.get(field) for field in fields)
+
+
+class SubScoreCache:
+    """Bounded LRU of computed sub-scores with hit/miss counts"""
+
+    def __init__(self, name: str, max_entries: int = MAX_ENTRIES_PER_SUBSCORE):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute: Callable[[], dict]) -> dict:
+        """
+        Cached result for key, computing it on a miss.
+        Results are shared between callers: treat them as read-only.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if result is not None:
+            CACHE_LOOKUPS.inc(subscore=self.name, result='hit')
+            return result
+
+        result = compute()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = result
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        CACHE_LOOKUPS.inc(subscore=self.name, result='miss')
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_caches = {
+    name: SubScoreCache(name)
+    for name in ('payment_risk', 'financial_capacity', 'medical_urgency', 'retention_priority')
+}
+
+
+def payment_risk_score(payment_history: Dict) -> Dict:
+    """calculate_payment_risk_score, memoized on the payment record"""
+    return _caches['payment_risk'].get_or_compute(
+        fingerprint(payment_history, PAYMENT_RISK_FIELDS),
+        lambda: calculate_payment_risk_score(payment_history)
+    )
+
+
+def financial_capacity(payment_history: Dict, payment_risk: Dict) -> Dict:
+    """assess_financial_capacity, memoized on the payment record and risk tier"""
+    key = fingerprint(payment_history, FINANCIAL_CAPACITY_FIELDS) + (payment_risk.get('payment_risk_tier'),)
+    return _caches['financial_capacity'].get_or_compute(
+        key,
+        lambda: assess_financial_capacity(payment_history, payment_risk)
+    )
+
+
+def medical_urgency(medical_history: Dict, adherence_data: Dict) -> Dict:
+    """assess_medical_urgency, memoized on the ezyVet medical and adherence records"""
+    key = fingerprint(medical_history, MEDICAL_URGENCY_FIELDS) + fingerprint(adherence_data, ADHERENCE_FIELDS)
+    return _caches['medical_urgency'].get_or_compute(
+        key,
+        lambda: assess_medical_urgency(medical_history, adherence_data)
+    )
+
+
+def retention_priority_score(
+    medical_urgency_score: float,
+    payment_risk_score: float,
+    medication_adherence_score: int,
+    ltv: float,
+    tenure_months: int
+) -> Dict:
+    """calculate_retention_priority_score, memoized on its inputs"""
+    key = (medical_urgency_score, payment_risk_score, medication_adherence_score, ltv, tenure_months)
+    return _caches['retention_priority'].get_or_compute(
+        key,
+        lambda: calculate_retention_priority_score(*key)
+    )
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Hit/miss counts and hit rate per sub-score"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear_caches():
+    for cache in _caches.values():
+        cache.clear()
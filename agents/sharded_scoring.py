@@ -0,0 +1,152 @@
+"""
+Sharded Cohort Scoring
+Nightly re-score of the whole customer book across a process pool. Customers
+are partitioned by a stable hash of user_id; every worker maps the same
+record store file (utils/record_store.py) read-only, scores its shard, and
+returns only its top `ai_agent_capacity` customers per tier plus counts. The
+shard results are merged into one get_daily_outreach_list result.
+
+Usage (from the repo root):
+    python -m agents.sharded_scoring customers.crs --workers 8 --capacity 50
+"""
+import os
+import json
+import math
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from agents.ingestion import TopK
+from agents.records import ScoredCustomer
+from agents.retention_scorer import build_outreach_list, score_retention_priority
+from utils.record_store import RecordStore
+
+WORKERS_ENV = 'CARELOOP_SCORING_WORKERS'
+
+# Scorer inputs read from the record store, with batch_score_customers' fallbacks
+# for values the store doesn't have (NaN)
+_INPUT_DEFAULTS = {
+    field: ScoredCustomer.DEFAULTS[field]
+    for field in ('medical_urgency_score', 'payment_risk_score', 'medication_adherence_score', 'ltv', 'tenure_months')
+}
+
+
+def default_workers() -> int:
+    return int(os.getenv(WORKERS_ENV, os.cpu_count() or 1))
+
+
+def shard_of(user_id: Union[str, bytes], shards: int) -> int:
+    """Shard for a customer (id as text or UTF-8 bytes): stable across processes and runs (unlike hash())"""
+    if isinstance(user_id, str):
+        user_id = user_id.encode('utf-8')
+    return zlib.crc32(user_id) % shards
+
+
+def score_shard(store_path: str, shard: int, shards: int, ai_agent_capacity: int) -> Dict:
+    """
+    Worker entry point: score one shard of the record store.
+    Returns tier counts and the top-K (score, row, customer dict) per tier.
+    """
+    priority = TopK(ai_agent_capacity)
+    secondary = TopK(ai_agent_capacity)
+    ignore_count = 0
+    scored = 0
+
+    with RecordStore(store_path) as store:
+        columns = {field: store.column(field) for field in _INPUT_DEFAULTS}
+        for encoded_id, row in store.iter_index():
+            if shard_of(encoded_id, shards) != shard:
+                continue
+            user_id = encoded_id.decode('utf-8')
+            inputs = {}
+            for field, column in columns.items():
+                value = column[row]
+                inputs[field] = _INPUT_DEFAULTS[field] if isinstance(value, float) and math.isnan(value) else value
+
+            score = score_retention_priority(**inputs)
+            scored += 1
+            if score.decision == 'IGNORE':
+                ignore_count += 1
+                continue
+
+            customer = ScoredCustomer(
+                user_id=user_id,
+                retention_score=score.retention_priority_score,
+                retention_decision=score.decision,
+                should_engage=score.should_engage_ai,
+                **inputs
+            )
+            # Ties go to the lower row number: the record store keeps the
+            # input order, so this matches batch_score_customers' stable sort
+            tier = priority if score.decision == 'PRIORITY_OUTREACH' else secondary
+            tier.push(score.retention_priority_score, customer, sequence=row)
+
+    return {
+        'scored': scored,
+        'priority_count': priority.count,
+        'secondary_count': secondary.count,
+        'ignore_count': ignore_count,
+        # Records are converted here so results pickle as plain dicts
+        'priority': [(score, row, customer.to_dict()) for score, row, customer in priority.entries()],
+        'secondary': [(score, row, customer.to_dict()) for score, row, customer in secondary.entries()]
+    }
+
+
+def merge_top(shard_entries: List[List[tuple]], k: int) -> List[Dict]:
+    """Global top-k from per-shard top-k lists (best score first, then lowest row)"""
+    merged = [entry for entries in shard_entries for entry in entries]
+    merged.sort(key=lambda entry: (-entry[0], entry[1]))
+    return [customer for _, _, customer in merged[:k]]
+
+
+def sharded_daily_outreach_list(
+    store_path: str,
+    ai_agent_capacity: int = 10,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None
+) -> Dict:
+    """
+    get_daily_outreach_list over every customer in a record store, scored on
+    `workers` processes (one shard per worker unless `shards` is given).
+    IGNORE customers are counted only, so `standard_dunning_list` is empty.
+    """
+    workers = workers or default_workers()
+    shards = shards or workers
+
+    if workers == 1:
+        results = [score_shard(store_path, shard, shards, ai_agent_capacity) for shard in range(shards)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(score_shard, store_path, shard, shards, ai_agent_capacity)
+                for shard in range(shards)
+            ]
+            results = [future.result() for future in futures]
+
+    return build_outreach_list(
+        total_failures=sum(result['scored'] for result in results),
+        priority=merge_top([result['priority'] for result in results], ai_agent_capacity),
+        secondary=merge_top([result['secondary'] for result in results], ai_agent_capacity),
+        priority_count=sum(result['priority_count'] for result in results),
+        secondary_count=sum(result['secondary_count'] for result in results),
+        ignore_count=sum(result['ignore_count'] for result in results),
+        standard_dunning_list=[],
+        ai_agent_capacity=ai_agent_capacity
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Score a customer record store across a process pool')
+    parser.add_argument('store', help='Record store file (python -m utils.record_store)')
+    parser.add_argument('--workers', type=int, default=None, help=f'Worker processes (default ${WORKERS_ENV} or CPU count)')
+    parser.add_argument('--capacity', type=int, default=10, help='Customers the AI agent can handle today')
+    args = parser.parse_args(argv)
+
+    result = sharded_daily_outreach_list(args.store, args.capacity, args.workers)
+    print(json.dumps({key: value for key, value in result.items() if key != 'standard_dunning_list'}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
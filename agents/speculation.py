@@ -0,0 +1,297 @@
+"""
+Speculative Pre-Generation
+The reply to most negotiator messages is predictable: after the Bridge Plan
+explanation it is overwhelmingly accept_bridge or decline_bridge. After a
+message is sent, the speculator predicts the customer's next intent from
+intent transition statistics (which intents followed each negotiation
+strategy so far, on top of a small prior) and generates the follow-up
+messages for the `top_k` most likely ones in the background. When the reply
+arrives with a predicted intent, the negotiator serves the draft instead of
+waiting on a new generation call.
+
+Drafts depend only on the customer and pet names and the conversation
+summary up to the sent message, so they stay valid until the next reply.
+They never see the reply itself: a served draft answers the predicted
+intent, not what the customer wrote ("yes, but only until Friday" gets the
+same draft as "yes"), whereas a normally generated message sees the reply
+through the summary the extractor updates first.
+
+Generation calls are charged to the conversation's campaign when they are
+made; a served draft's calls are attached to the turn that uses it, and the
+tokens of drafts that are never served are reported as wasted. Nothing is
+speculated unless the campaign's budget mode is normal.
+
+Enabled with CARELOOP_SPECULATION=1 (CARELOOP_SPECULATION_TOP_K, default 2).
+Drafts are held in memory only, for at most `ttl_s` and `max_conversations`.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.llm_costs import TOKEN_FIELDS, attach_record, budget_mode, usage_scope, BUDGET_NORMAL
+from utils.telemetry import Counter, get_registry
+
+SPECULATION_ENV = 'CARELOOP_SPECULATION'
+TOP_K_ENV = 'CARELOOP_SPECULATION_TOP_K'
+DEFAULT_TOP_K = 2
+
+# Strategies below this share of predicted replies are never drafted
+DEFAULT_MIN_PROBABILITY = 0.1
+DEFAULT_WORKERS = 8
+DEFAULT_TTL_S = 24 * 3600
+DEFAULT_MAX_CONVERSATIONS = 10000
+
+# Claim outcomes
+HIT = 'hit'  # the reply's strategy had a draft
+MISS = 'miss'  # drafts existed, but not for this strategy
+FAILED = 'failed'  # the draft for this strategy failed; generated normally
+
+# Pseudo-counts of (strategy sent → next intent) before any replies are seen
+PRIOR_TRANSITIONS: Dict[str, Dict[str, float]] = {
+    'initial_outreach_with_bridge_offer': {
+        'financial_hardship': 2, 'ask_for_more_info': 2, 'accept_bridge': 1, 'decline_bridge': 1, 'ask_for_time': 1
+    },
+    'explain_bridge_plan_details': {'accept_bridge': 3, 'decline_bridge': 2},
+    'offer_payment_extension': {'accept_extension': 2, 'ambiguous_acceptance': 2, 'accept_bridge': 1},
+    'request_clarification': {'accept_bridge': 1, 'accept_extension': 1},
+    'offer_payment_update_or_cancel': {'update_payment': 1, 'cancel_request': 1},
+}
+
+SPECULATIONS = get_registry().register(Counter(
+    'careloop_speculation_total',
+    'Replies that arrived while speculative drafts were waiting, by outcome',
+    ('result',)  # hit | miss | failed
+))
+SPECULATIVE_DRAFTS = get_registry().register(Counter(
+    'careloop_speculative_drafts_total',
+    'Follow-up messages generated speculatively, by strategy',
+    ('strategy',)
+))
+WASTED_TOKENS = get_registry().register(Counter(
+    'careloop_speculative_wasted_tokens_total',
+    'Tokens spent on speculative drafts that were never served'
+))
+
+# (generate(state) -> message, strategy) for an intent, or None when the
+# negotiator has nothing to generate for it
+Plan = Callable[[str], Optional[Tuple[Callable[[dict], str], str]]]
+
+
+class TransitionStats:
+    """Counts of which intent followed each negotiation strategy"""
+
+    def __init__(self, prior: Optional[Dict[str, Dict[str, float]]] = None):
+        self._counts: Dict[str, Dict[str, float]] = {
+            strategy: dict(intents) for strategy, intents in (prior or PRIOR_TRANSITIONS).items()
+        }
+        self._lock = threading.Lock()
+
+    def observe(self, strategy: str, intent: str):
+        with self._lock:
+            intents = self._counts.setdefault(strategy, {})
+            intents[intent] = intents.get(intent, 0) + 1
+
+    def predict(self, strategy: str) -> List[Tuple[str, float]]:
+        """(intent, probability) after `strategy`, most likely first"""
+        with self._lock:
+            intents = dict(self._counts.get(strategy, {}))
+        total = sum(intents.values())
+        if not total:
+            return []
+        return sorted(((intent, count / total) for intent, count in intents.items()), key=lambda item: -item[1])
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {strategy: dict(intents) for strategy, intents in self._counts.items()}
+
+
+class _Drafts:
+    """Speculative follow-ups for one sent message"""
+    __slots__ = ('after_message', 'strategy', 'created', 'futures')
+
+    def __init__(self, after_message: str, strategy: str):
+        self.after_message = after_message  # the sent message the drafts follow
+        self.strategy = strategy  # its negotiation strategy
+        self.created = time.monotonic()
+        self.futures: Dict[str, Future] = {}  # draft strategy → (message, usage records)
+
+
+class Speculator:
+    """
+    Background drafts of the likely next negotiator messages per conversation.
+
+    - speculate(state): after a message is sent, draft the follow-ups for the
+      `top_k` most likely next strategies
+    - claim(state, strategy): when the reply arrives, record the transition
+      and return the draft for the strategy the negotiator chose, if any
+    """
+
+    def __init__(
+        self,
+        plan: Plan,
+        top_k: int = DEFAULT_TOP_K,
+        min_probability: float = DEFAULT_MIN_PROBABILITY,
+        max_workers: int = DEFAULT_WORKERS,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_conversations: int = DEFAULT_MAX_CONVERSATIONS,
+        transitions: Optional[TransitionStats] = None
+    ):
+        self.plan = plan
+        self.top_k = top_k
+        self.min_probability = min_probability
+        self.ttl_s = ttl_s
+        self.max_conversations = max_conversations
+        self.transitions = transitions or TransitionStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculation')
+        # conversation_id → drafts, oldest first
+        self._pending: "OrderedDict[str, _Drafts]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {'drafts': 0, HIT: 0, MISS: 0, FAILED: 0, 'used_tokens': 0, 'wasted_tokens': 0}
+        self._wasted_cost_usd = 0.0
+
+    def predicted_strategies(self, strategy: str) -> List[Tuple[str, str, float]]:
+        """(next strategy, intent, probability) worth drafting after `strategy`, most likely first"""
+        by_strategy: Dict[str, Tuple[str, float]] = {}
+        for intent, probability in self.transitions.predict(strategy):
+            planned = self.plan(intent)
+            if planned is None:
+                continue
+            _, next_strategy = planned
+            best_intent, total = by_strategy.get(next_strategy, (intent, 0.0))
+            by_strategy[next_strategy] = (best_intent, total + probability)
+        ranked = sorted(by_strategy.items(), key=lambda item: -item[1][1])
+        return [
+            (next_strategy, intent, probability)
+            for next_strategy, (intent, probability) in ranked[:self.top_k]
+            if probability >= self.min_probability
+        ]
+
+    def speculate(self, state: dict):
+        """Draft the likely follow-ups to the message just sent in `state`"""
+        campaign_id = state.get('campaign_id')
+        if budget_mode(campaign_id) != BUDGET_NORMAL:
+            return
+        strategy = state.get('negotiation_strategy')
+        predicted = self.predicted_strategies(strategy) if strategy else []
+        if not predicted:
+            return
+
+        drafts = _Drafts(state['messages'][-1]['content'], strategy)
+        snapshot = {key: state.get(key) for key in ('user_id', 'user_name', 'pet_name', 'pet_condition', 'campaign_id',
+                                                    'conversation_summary')}
+        for next_strategy, intent, _ in predicted:
+            generate, _ = self.plan(intent)
+            drafts.futures[next_strategy] = self._executor.submit(self._draft, generate, snapshot)
+            SPECULATIVE_DRAFTS.inc(strategy=next_strategy)
+
+        with self._lock:
+            self._counts['drafts'] += len(drafts.futures)
+            replaced = self._pending.pop(state['user_id'], None)
+            self._pending[state['user_id']] = drafts
+            evicted = [replaced] if replaced is not None else []
+            while len(self._pending) > self.max_conversations:
+                evicted.append(self._pending.popitem(last=False)[1])
+        for stale in evicted:
+            self._discard(stale.futures.values())
+
+    @staticmethod
+    def _draft(generate: Callable[[dict], str], state: dict) -> Tuple[str, List[dict]]:
+        with usage_scope(state.get('campaign_id')) as usage:
+            message = generate(state)
+        return message, usage.calls
+
+    def claim(self, state: dict, strategy: str) -> Optional[str]:
+        """
+        Take the conversation's drafts for the reply in `state`: records the
+        transition, returns the draft for `strategy` (waiting for it if it is
+        still being generated, with its calls attached to the active usage
+        scope) or None, and discards the others
+        """
+        with self._lock:
+            drafts = self._pending.pop(state['user_id'], None)
+        sent = [m for m in state['messages'] if m['role'] == 'assistant']
+        sent_strategy = state.get('negotiation_strategy')
+        if sent_strategy and state.get('current_intent'):
+            self.transitions.observe(sent_strategy, state['current_intent'])
+        if drafts is None:
+            return None
+
+        stale = (not sent or sent[-1]['content'] != drafts.after_message
+                 or time.monotonic() - drafts.created > self.ttl_s)
+        future = None if stale else drafts.futures.pop(strategy, None)
+        self._discard(drafts.futures.values())
+        if stale:
+            return None
+        if future is None:
+            self._count(MISS)
+            return None
+
+        try:
+            message, records = future.result()
+        except Exception:
+            self._count(FAILED)
+            return None
+        for record in records:
+            attach_record(record)
+        self._count(HIT, used_tokens=_tokens(records))
+        return message
+
+    def _count(self, result: str, used_tokens: int = 0):
+        SPECULATIONS.inc(result=result)
+        with self._lock:
+            self._counts[result] += 1
+            self._counts['used_tokens'] += used_tokens
+
+    def _discard(self, futures):
+        """Count unserved drafts as wasted (once their generation finishes)"""
+        for future in futures:
+            future.add_done_callback(self._wasted)
+
+    def _wasted(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        _, records = future.result()
+        tokens = _tokens(records)
+        WASTED_TOKENS.inc(tokens)
+        with self._lock:
+            self._counts['wasted_tokens'] += tokens
+            self._wasted_cost_usd += sum(record['cost_usd'] for record in records)
+
+    def stats(self) -> dict:
+        """Speculative hit rate and the tokens spent on drafts nobody read"""
+        with self._lock:
+            counts = dict(self._counts)
+            wasted_cost = self._wasted_cost_usd
+            pending = len(self._pending)
+        claims = counts[HIT] + counts[MISS] + counts[FAILED]
+        spent = counts['used_tokens'] + counts['wasted_tokens']
+        return {
+            'top_k': self.top_k,
+            'pending_conversations': pending,
+            'drafts': counts['drafts'],
+            'hits': counts[HIT],
+            'misses': counts[MISS],
+            'failed': counts[FAILED],
+            'hit_rate': round(counts[HIT] / claims, 4) if claims else 0.0,
+            'used_tokens': counts['used_tokens'],
+            'wasted_tokens': counts['wasted_tokens'],
+            'wasted_token_fraction': round(counts['wasted_tokens'] / spent, 4) if spent else 0.0,
+            'wasted_cost_usd': round(wasted_cost, 6)
+        }
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def _tokens(records: List[dict]) -> int:
+    return sum(record.get(field, 0) for record in records for field in TOKEN_FIELDS)
+
+
+def speculator_from_env(plan: Plan) -> Optional[Speculator]:
+    """A Speculator configured from the environment, or None when speculation is off"""
+    if os.getenv(SPECULATION_ENV, '').strip().lower() not in ('1', 'true', 'yes', 'on'):
+        return None
+    return Speculator(plan, top_k=int(os.getenv(TOP_K_ENV, DEFAULT_TOP_K)))
@@ -2,12 +2,22 @@
 Mock API Tools: Stripe, Email, Database Operations
 These simulate real API calls for the demo
 """
+import os
 import json
 import time
+import threading
 from datetime import datetime
 from typing import Dict, Any
+from utils.tracing import traced_call
+from utils.telemetry import PLAN_CHANGES, record_revenue_impact
 
+MOCK_DB_PATH = 'data/mock_db.json'
 
+# Turns run on a worker pool: serialize read-modify-write of the mock database
+_db_lock = threading.Lock()
+
+
+@traced_call('stripe.update_subscription', kind='stripe')
 def mock_stripe_update_subscription(user_id: str, new_plan: str) -> Dict[str, Any]:
     """
     Mock Stripe API call to change subscription plan
@@ -29,6 +39,7 @@ def mock_stripe_update_subscription(user_id: str, new_plan: str) -> Dict[str, An
     }
 
 
+@traced_call('stripe.retry_payment', kind='stripe')
 def mock_stripe_retry_payment(user_id: str) -> Dict[str, Any]:
     """
     Mock Stripe payment retry
@@ -57,6 +68,7 @@ def mock_stripe_retry_payment(user_id: str) -> Dict[str, Any]:
         }
 
 
+@traced_call('stripe.cancel_subscription', kind='stripe')
 def mock_stripe_cancel_subscription(user_id: str) -> Dict[str, Any]:
     """
     Mock subscription cancellation
@@ -71,34 +83,38 @@ def mock_stripe_cancel_subscription(user_id: str) -> Dict[str, Any]:
     }
 
 
+@traced_call('db.update_user', kind='db')
 def update_user_database(user_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Mock database update
+    Mock database update. Concurrent updates are serialized, and the file is
+    replaced atomically so readers never see a half-written database.
     """
-    # Load current data
-    with open('data/mock_db.json', 'r') as f:
-        db = json.load(f)
+    with _db_lock:
+        # Load current data
+        with open(MOCK_DB_PATH, 'r') as f:
+            db = json.load(f)
 
-    # Update user
-    if user_id in db['users']:
-        db['users'][user_id].update(updates)
+        if user_id not in db['users']:
+            return {
+                'status': 'error',
+                'message': f'User {user_id} not found'
+            }
 
-        # Save back
-        with open('data/mock_db.json', 'w') as f:
+        # Update user and save back
+        db['users'][user_id].update(updates)
+        tmp_path = f'{MOCK_DB_PATH}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
             json.dump(db, f, indent=2)
+        os.replace(tmp_path, MOCK_DB_PATH)
 
-        return {
-            'status': 'success',
-            'user_id': user_id,
-            'updated_fields': list(updates.keys())
-        }
-    else:
-        return {
-            'status': 'error',
-            'message': f'User {user_id} not found'
-        }
+    return {
+        'status': 'success',
+        'user_id': user_id,
+        'updated_fields': list(updates.keys())
+    }
 
 
+@traced_call('email.send', kind='email')
 def send_email(to_email: str, subject: str, body: str) -> Dict[str, Any]:
     """
     Mock email sending (in real system, would use SendGrid/Mailgun)
@@ -142,6 +158,9 @@ def tool_executor_node(state: dict) -> dict:
             'result': db_result
         })
 
+        PLAN_CHANGES.inc(to_plan='bridge')
+        record_revenue_impact(450.00)
+
         # Update state
         return {
             'current_plan': 'bridge',
@@ -161,6 +180,8 @@ def tool_executor_node(state: dict) -> dict:
         })
 
         if result['status'] == 'success':
+            PLAN_CHANGES.inc(to_plan='premium')
+            record_revenue_impact(50.00)
             return {
                 'current_plan': 'premium',
                 'churn_prevented': True,
@@ -182,6 +203,9 @@ def tool_executor_node(state: dict) -> dict:
             'result': result
         })
 
+        PLAN_CHANGES.inc(to_plan='cancelled')
+        record_revenue_impact(-12000.00)
+
         return {
             'current_plan': 'cancelled',
             'churn_prevented': False,
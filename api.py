@@ -0,0 +1,339 @@
+"""
+Headless Conversation API
+ASGI service for payment-failure events and inbound customer replies
+(email/SMS webhooks), running the same LangGraph flows as the Streamlit app
+
+Run:
+    uvicorn api:app --port 8000
+
+Endpoints:
+    POST /failures                      payment failure(s) → initial outreach turn
+    POST /conversations/{id}/reply      customer reply(ies) → response turn
+    GET  /conversations/{id}            conversation status and messages
+    GET  /healthz                       queue depth / capacity / intent batching
+"""
+import os
+import json
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from state import build_initial_state
+from jobs import JobRunner, TURN_INITIAL, TURN_RESPONSE, JOB_FAILED
+from agents.extractor import get_intent_batcher
+from agents.intent_cache import get_intent_cache
+from agents.negotiator import get_speculator
+from utils.metrics import load_mock_data
+
+# Backpressure: events accepted but not yet processed, across all conversations
+MAX_PENDING_ENV = 'CARELOOP_API_MAX_PENDING'
+DEFAULT_MAX_PENDING = 1000
+# Unprocessed events allowed per conversation before replies are refused
+MAX_CONVERSATION_BACKLOG = 20
+RETRY_AFTER_S = 1
+
+MAX_BODY_BYTES = 1024 * 1024
+
+EVENT_FAILURE = 'failure'
+EVENT_REPLY = 'reply'
+
+# Customer fields build_initial_state reads from a failure's inline 'user'
+USER_FIELDS = ('name', 'email', 'pet_name', 'pet_condition', 'medical_risk_tier', 'ltv', 'tenure_months',
+               'current_plan')
+
+
+class ApiError(Exception):
+    """Request error returned to the client as {'error': message}"""
+
+    def __init__(self, status: int, message: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+
+
+def too_busy(message: str) -> ApiError:
+    return ApiError(429, message, [(b'retry-after', str(RETRY_AFTER_S).encode())])
+
+
+class Conversation:
+    """Latest agent state for one conversation plus its unprocessed events"""
+
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.state: Optional[dict] = None
+        self.inbox = deque()  # (event kind, payload) in arrival order
+        self.draining = False
+        self.replies_received = 0
+        self.replies_processed = 0
+        self.turns = 0
+        self.last_error: Optional[str] = None
+
+    def summary(self) -> dict:
+        state = self.state or {}
+        return {
+            'conversation_id': self.conversation_id,
+            'conversation_stage': state.get('conversation_stage'),
+            'current_plan': state.get('current_plan'),
+            'current_intent': state.get('current_intent'),
+            'churn_prevented': state.get('churn_prevented', False),
+            'pending_events': len(self.inbox),
+            'replies_received': self.replies_received,
+            'replies_processed': self.replies_processed,
+            'turns': self.turns,
+            'last_error': self.last_error,
+            'messages': state.get('messages', [])
+        }
+
+
+class ConversationService:
+    """
+    Orders and batches inbound events per conversation and runs graph turns
+    on the worker pool.
+
+    - Ordering: each conversation drains its inbox in arrival order, one turn
+      at a time, so every turn sees the state produced by the previous one.
+    - Batching: replies that pile up while a turn is running are merged into
+      a single customer message and handled by one response turn.
+    - Backpressure: new events are refused (429 + Retry-After) once the
+      global or per-conversation backlog is full.
+
+    All bookkeeping runs on the event loop thread; only graph turns leave it.
+    """
+
+    def __init__(self, runner: Optional[JobRunner] = None, max_pending: Optional[int] = None):
+        self.runner = runner or JobRunner()
+        self.max_pending = max_pending or int(os.getenv(MAX_PENDING_ENV, DEFAULT_MAX_PENDING))
+        self.conversations: Dict[str, Conversation] = {}
+        self.pending = 0
+        self.users = load_mock_data()['users']
+
+    def submit_failures(self, failures: List[dict]) -> List[str]:
+        """Queue initial outreach for each payment failure; returns conversation ids"""
+        self._reserve(len(failures))
+        events = []
+        for failure in failures:
+            user_id = failure.get('user_id')
+            if not user_id or not isinstance(user_id, str):
+                raise ApiError(400, "Each failure needs a user_id string")
+            campaign_id = failure.get('campaign_id')
+            if campaign_id is not None and not isinstance(campaign_id, str):
+                raise ApiError(400, "campaign_id must be a string")
+            user_data = failure.get('user') or self.users.get(user_id)
+            if user_data is None:
+                raise ApiError(404, f"Unknown user: {user_id}")
+            if not isinstance(user_data, dict):
+                raise ApiError(400, f"'user' for {user_id} must be an object")
+            missing = [field for field in USER_FIELDS if field not in user_data]
+            if missing:
+                raise ApiError(400, f"'user' for {user_id} is missing: {', '.join(missing)}")
+            events.append((user_id, build_initial_state(user_id, user_data, campaign_id)))
+
+        for conversation_id, state in events:
+            conversation = self.conversations.setdefault(conversation_id, Conversation(conversation_id))
+            self._enqueue(conversation, EVENT_FAILURE, state)
+        return [conversation_id for conversation_id, _ in events]
+
+    def submit_replies(self, conversation_id: str, replies: List[dict]) -> int:
+        """Queue customer replies for a conversation; returns how many were accepted"""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            raise ApiError(404, f"Unknown conversation: {conversation_id}")
+        if len(conversation.inbox) + len(replies) > MAX_CONVERSATION_BACKLOG:
+            raise too_busy(f"Conversation {conversation_id} has too many unprocessed replies")
+        self._reserve(len(replies))
+
+        messages = []
+        for reply in replies:
+            content = reply.get('message') or reply.get('content') or reply.get('text')
+            if not isinstance(content, str) or not content.strip():
+                raise ApiError(400, "Each reply needs a non-empty 'message'")
+            messages.append({
+                'role': 'user',
+                'content': content,
+                'timestamp': reply.get('received_at') or datetime.now().isoformat(),
+                'channel': reply.get('channel', 'email')
+            })
+
+        for message in messages:
+            conversation.replies_received += 1
+            self._enqueue(conversation, EVENT_REPLY, message)
+        return len(messages)
+
+    def health(self) -> dict:
+        batcher = get_intent_batcher()
+        cache = get_intent_cache()
+        speculator = get_speculator()
+        return {
+            'status': 'ok',
+            'pending_events': self.pending,
+            'max_pending': self.max_pending,
+            'conversations': len(self.conversations),
+            'active_jobs': self.runner.active_jobs(),
+            'scheduler': self.runner.scheduler.stats(),
+            'intent_batching': batcher.stats() if batcher is not None else None,
+            'intent_cache': cache.stats() if cache is not None else None,
+            'speculation': speculator.stats() if speculator is not None else None
+        }
+
+    def _reserve(self, count: int):
+        if self.pending + count > self.max_pending:
+            raise too_busy(f"{self.pending} events pending (limit {self.max_pending})")
+
+    def _enqueue(self, conversation: Conversation, kind: str, payload):
+        conversation.inbox.append((kind, payload))
+        self.pending += 1
+        if not conversation.draining:
+            conversation.draining = True
+            asyncio.get_running_loop().create_task(self._drain(conversation))
+
+    async def _drain(self, conversation: Conversation):
+        try:
+            while conversation.inbox:
+                kind, payload = conversation.inbox.popleft()
+                batch = [payload]
+                try:
+                    if kind == EVENT_FAILURE:
+                        await self._run_turn(conversation, TURN_INITIAL, payload)
+                        continue
+
+                    # Merge every reply already waiting into one customer message
+                    while conversation.inbox and conversation.inbox[0][0] == EVENT_REPLY:
+                        batch.append(conversation.inbox.popleft()[1])
+
+                    state = dict(conversation.state)
+                    state['messages'] = state['messages'] + [merge_replies(batch)]
+                    if state.get('conversation_stage') == 'completed':
+                        # Nothing left to negotiate; keep the reply on record only
+                        conversation.state = state
+                    else:
+                        await self._run_turn(conversation, TURN_RESPONSE, state)
+                    conversation.replies_processed += len(batch)
+                except Exception as e:
+                    # Record it and move on to the next event rather than stall the inbox
+                    conversation.last_error = f"{type(e).__name__}: {e}"
+                finally:
+                    # Released even when the turn failed, so the backlog can't fill up for good
+                    self.pending -= len(batch)
+        finally:
+            conversation.draining = False
+
+    async def _run_turn(self, conversation: Conversation, kind: str, state: dict):
+        job = await asyncio.wrap_future(self.runner.run_turn(kind, state))
+        conversation.turns += 1
+        if job['status'] == JOB_FAILED:
+            # Keep the inbound message on record even though the turn failed
+            conversation.state = state
+            conversation.last_error = job['error']
+        else:
+            conversation.state = job['state']
+            conversation.last_error = None
+
+
+def merge_replies(messages: List[dict]) -> dict:
+    """One customer message from several replies received back to back"""
+    if len(messages) == 1:
+        return messages[0]
+    return {
+        **messages[-1],
+        'content': '\n'.join(message['content'] for message in messages),
+        'parts': len(messages)
+    }
+
+
+# ---------------------------------------------------------------------------
+# ASGI application
+# ---------------------------------------------------------------------------
+
+_service: Optional[ConversationService] = None
+
+
+def get_service() -> ConversationService:
+    global _service
+    if _service is None:
+        _service = ConversationService()
+    return _service
+
+
+async def read_json(receive) -> object:
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        more_body = message.get('more_body', False)
+    try:
+        return json.loads(body or b'null')
+    except ValueError:
+        raise ApiError(400, "Request body must be JSON")
+
+
+def as_list(payload) -> List[dict]:
+    """Webhook bodies may carry one event (object) or a batch (array)"""
+    items = payload if isinstance(payload, list) else [payload]
+    if not items or not all(isinstance(item, dict) for item in items):
+        raise ApiError(400, "Expected a JSON object or a non-empty array of objects")
+    return items
+
+
+async def send_json(send, status: int, payload: dict, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+    body = json.dumps(payload, default=str).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())] + (headers or [])
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def handle_request(method: str, path: str, receive) -> Tuple[int, dict]:
+    service = get_service()
+    parts = [part for part in path.split('/') if part]
+
+    if parts == ['healthz'] and method == 'GET':
+        return 200, service.health()
+
+    if parts == ['failures'] and method == 'POST':
+        conversation_ids = service.submit_failures(as_list(await read_json(receive)))
+        return 202, {'accepted': len(conversation_ids), 'conversation_ids': conversation_ids}
+
+    if len(parts) == 3 and parts[0] == 'conversations' and parts[2] == 'reply' and method == 'POST':
+        accepted = service.submit_replies(parts[1], as_list(await read_json(receive)))
+        return 202, {'accepted': accepted, 'conversation_id': parts[1]}
+
+    if len(parts) == 2 and parts[0] == 'conversations' and method == 'GET':
+        conversation = service.conversations.get(parts[1])
+        if conversation is None:
+            raise ApiError(404, f"Unknown conversation: {parts[1]}")
+        return 200, conversation.summary()
+
+    raise ApiError(404, f"No route for {method} {path}")
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                get_service()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if _service is not None:
+                    _service.runner.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    try:
+        status, payload = await handle_request(scope['method'], scope['path'], receive)
+        await send_json(send, status, payload)
+    except ApiError as e:
+        await send_json(send, e.status, {'error': e.message}, e.headers)
+    except Exception as e:
+        await send_json(send, 500, {'error': f"Internal error: {type(e).__name__}"})
@@ -2,12 +2,13 @@
 CareLoop - Keeping Pets in Care, Revenue in Loop
 Main Streamlit Application
 """
+import os
 import streamlit as st
 import json
 import time
 from datetime import datetime
-from graph import create_petdunning_graph, create_response_graph
-from state import AgentState
+from jobs import JobRunner, TURN_INITIAL, TURN_RESPONSE, JOB_DONE, JOB_FAILED
+from state import build_initial_state
 from utils.ui_components import (
     gmail_style_message,
     typing_indicator,
@@ -17,6 +18,8 @@ from utils.ui_components import (
     flowchart_visualization
 )
 from utils.metrics import calculate_revenue_saved, format_currency
+from utils.customer_store import CustomerStore, DEFAULT_PAGE_SIZE
+from utils.telemetry import start_metrics_server, METRICS_PORT_ENV
 
 # Page config
 st.set_page_config(
@@ -100,6 +103,11 @@ if 'initialized' not in st.session_state:
     st.session_state.users_processed = 0
     st.session_state.churn_prevented_count = 0
     st.session_state.show_typing = False
+    st.session_state.pending_job = None
+
+# Process-wide Prometheus endpoint (opt-in; idempotent across reruns)
+if os.getenv(METRICS_PORT_ENV):
+    start_metrics_server()
 
 # Load data
 @st.cache_data
@@ -109,6 +117,27 @@ def load_data():
 
 data = load_data()
 
+
+# Indexed customer table (built once per process; pages are queried on demand)
+@st.cache_resource
+def load_customer_store():
+    store = CustomerStore()
+    store.load_users(load_data()['users'])
+    return store
+
+customer_store = load_customer_store()
+
+
+# Graph turns run on a shared worker pool (one per process, across all sessions)
+@st.cache_resource
+def load_job_runner():
+    return JobRunner()
+
+job_runner = load_job_runner()
+
+# Seconds between job status polls while a turn is running
+JOB_POLL_INTERVAL = 0.5
+
 # Header
 st.markdown('<div class="main-header">🔄 CareLoop</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Keeping Pets in Care, Revenue in Loop | AI-Powered Retention for Veterinary Networks</div>', unsafe_allow_html=True)
@@ -154,21 +183,54 @@ st.divider()
 # Multi-User Table
 st.markdown("### 📋 At-Risk Customers")
 
-# Build users list
-users_list = []
-for user_id, user_data in data['users'].items():
-    users_list.append({
-        'User': user_data['name'],
-        'Pet': f"{user_data['pet_name']} ({user_data['pet_condition']})",
-        'LTV': user_data['ltv'],
-        'Tenure': f"{user_data['tenure_months']} mo",
-        'Risk': user_data['medical_risk_tier'].upper(),
-        'Status': user_data['current_plan'].upper()
-    })
+# Filters, sort and paging run in the customer store; only the visible page is built
+filter_col1, filter_col2, filter_col3, filter_col4 = st.columns([2, 2, 2, 1])
+
+with filter_col1:
+    risk_filter = st.multiselect(
+        "Risk Tier",
+        options=customer_store.distinct_values('risk_tier'),
+        format_func=str.upper,
+        key="table_risk_filter"
+    )
+
+with filter_col2:
+    status_filter = st.multiselect(
+        "Status",
+        options=customer_store.distinct_values('status'),
+        format_func=str.upper,
+        key="table_status_filter"
+    )
+
+with filter_col3:
+    table_sort_options = {
+        "LTV (high → low)": ('ltv', True),
+        "Retention Score (high → low)": ('retention_score', True),
+        "LTV (low → high)": ('ltv', False),
+        "Retention Score (low → high)": ('retention_score', False)
+    }
+    sort_label = st.selectbox("Sort By", options=list(table_sort_options.keys()), key="table_sort")
+
+sort_by, descending = table_sort_options[sort_label]
+page_count = max(1, -(-customer_store.count(risk_filter, status_filter) // DEFAULT_PAGE_SIZE))
+
+with filter_col4:
+    page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="table_page")
+
+customer_page = customer_store.query(
+    risk_tiers=risk_filter,
+    statuses=status_filter,
+    sort_by=sort_by,
+    descending=descending,
+    page=int(page_number)
+)
 
 # Display table with container for better spacing
 with st.container():
-    user_table(users_list)
+    user_table(customer_page['rows'])
+    st.caption(
+        f"{customer_page['total']:,} customers · page {customer_page['page']} of {customer_page['pages']}"
+    )
 
 st.divider()
 
@@ -195,50 +257,13 @@ with st.sidebar:
         # Initialize agent state
         user_data = data['users'][selected_user_id]
 
-        st.session_state.agent_state = AgentState(
-            user_id=selected_user_id,
-            user_name=user_data['name'],
-            user_email=user_data['email'],
-            pet_name=user_data['pet_name'],
-            pet_condition=user_data['pet_condition'],
-            medical_risk_tier=user_data['medical_risk_tier'],
-            risk_score=0.0,
-            ltv=user_data['ltv'],
-            tenure_months=user_data['tenure_months'],
-            # Payment history data (will be populated by router)
-            payment_history=None,
-            payment_risk_score=None,
-            payment_risk_tier=None,
-            failure_rate=None,
-            late_payment_rate=None,
-            payment_reliability=None,
-            # Medical data (will be populated by router)
-            medical_history=None,
-            medication_adherence_score=None,
-            medical_urgency_score=None,
-            medical_urgency_tier=None,
-            continuity_of_care_importance=None,
-            # Retention priority (will be populated by router)
-            retention_priority_score=None,
-            retention_decision=None,
-            should_engage_ai=None,
-            # Conversation data
-            messages=[],
-            current_intent=None,
-            conversation_stage='initial',
-            current_plan=user_data['current_plan'],
-            target_plan=None,
-            router_decision=None,
-            negotiation_strategy=None,
-            tool_calls=[],
-            revenue_impact=0.0,
-            churn_prevented=False
-        )
+        st.session_state.agent_state = build_initial_state(selected_user_id, user_data)
 
         st.session_state.conversation_active = True
         st.session_state.current_user = selected_user_id
         st.session_state.users_processed += 1
         st.session_state.show_typing = True
+        st.session_state.pending_job = job_runner.submit_turn(TURN_INITIAL, st.session_state.agent_state)
         st.rerun()
 
     st.divider()
@@ -257,6 +282,23 @@ with st.sidebar:
 
 # Main Content - Split Screen
 if st.session_state.conversation_active:
+    # Pick up the running turn's latest state (nodes land as they finish)
+    if st.session_state.pending_job:
+        job = job_runner.get(st.session_state.pending_job)
+        if job is None or job['status'] == JOB_FAILED:
+            st.error(f"AI Agent turn failed: {job['error'] if job else 'job expired'}")
+            st.session_state.pending_job = None
+            st.session_state.show_typing = False
+        else:
+            st.session_state.agent_state = job['state']
+            if job['status'] == JOB_DONE:
+                # Update metrics if conversation completed
+                if job['kind'] == TURN_RESPONSE and st.session_state.agent_state.get('churn_prevented'):
+                    st.session_state.churn_prevented_count += 1
+                    st.session_state.total_revenue_saved += st.session_state.agent_state.get('revenue_impact', 0)
+                st.session_state.pending_job = None
+                st.session_state.show_typing = False
+
     col_left, col_right = st.columns([1, 1])
 
     # LEFT PANEL: Email Interface
@@ -269,23 +311,6 @@ if st.session_state.conversation_active:
         with email_container:
             st.markdown('<div class="email-container">', unsafe_allow_html=True)
 
-            # Run initial agent workflow if no messages yet
-            if len(st.session_state.agent_state['messages']) == 0:
-                with st.spinner("AI Agent analyzing risk..."):
-                    # Create and run graph
-                    graph = create_petdunning_graph()
-
-                    # Stream through the graph
-                    for event in graph.stream(st.session_state.agent_state):
-                        # Update state with each event
-                        for key, value in event.items():
-                            if isinstance(value, dict):
-                                st.session_state.agent_state.update(value)
-
-                    time.sleep(1)  # Simulate processing time
-                    st.session_state.show_typing = False
-                    st.rerun()
-
             # Display conversation history
             for msg in st.session_state.agent_state['messages']:
                 gmail_style_message(msg, is_user=(msg['role'] == 'user'))
@@ -309,29 +334,9 @@ if st.session_state.conversation_active:
                 }
                 st.session_state.agent_state['messages'].append(user_message)
 
-                # Show typing indicator
+                # Show typing indicator while the response turn runs in the background
                 st.session_state.show_typing = True
-                st.rerun()
-
-        # Process user response
-        if st.session_state.show_typing and len([m for m in st.session_state.agent_state['messages'] if m['role'] == 'user']) > 0:
-            with st.spinner("AI Agent thinking..."):
-                time.sleep(1.5)  # Simulate thinking time
-
-                # Run response graph
-                response_graph = create_response_graph()
-
-                for event in response_graph.stream(st.session_state.agent_state):
-                    for key, value in event.items():
-                        if isinstance(value, dict):
-                            st.session_state.agent_state.update(value)
-
-                # Update metrics if conversation completed
-                if st.session_state.agent_state.get('churn_prevented'):
-                    st.session_state.churn_prevented_count += 1
-                    st.session_state.total_revenue_saved += st.session_state.agent_state.get('revenue_impact', 0)
-
-                st.session_state.show_typing = False
+                st.session_state.pending_job = job_runner.submit_turn(TURN_RESPONSE, st.session_state.agent_state)
                 st.rerun()
 
     # RIGHT PANEL: Glass Box
@@ -392,8 +397,11 @@ if st.session_state.conversation_active:
                         st.metric("Outreach Strategy", decision,
                                  help="Offer type based on medical urgency + payment risk profile")
                 with col12:
-                    # Empty column for alignment consistency
-                    pass
+                    llm_usage = st.session_state.agent_state.get('llm_usage') or {}
+                    st.metric("🤖 LLM Spend", f"${st.session_state.agent_state.get('llm_cost_usd', 0.0):.4f}",
+                             help=f"{llm_usage.get('calls', 0)} Claude calls, "
+                                  f"{llm_usage.get('input_tokens', 0):,} input / {llm_usage.get('output_tokens', 0):,} output tokens, "
+                                  f"{llm_usage.get('cache_read_input_tokens', 0):,} read from prompt cache")
 
             st.divider()
 
@@ -414,3 +422,9 @@ else:
 # Footer
 st.divider()
 st.caption("Built with ❤️ using Claude Sonnet 4.5, LangGraph, and Streamlit | CareLoop - Demo for Mars Veterinary Health")
+
+# Poll the running turn: rerun shortly to pick up its progress. Only this
+# session reruns; the turn itself keeps running on the worker pool.
+if st.session_state.pending_job:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Micro-batched intent extraction (agents/intent_batcher.py) under a reply burst
+
+Usage (from the repo root):
+    python -m benchmarks.batch_intents --stub                      # offline, simulated latency
+    python -m benchmarks.batch_intents --stub --replies 2000 --rate 400 --window-ms 50 100 200
+    python -m benchmarks.batch_intents --json out.json             # live Claude calls (needs ANTHROPIC_API_KEY)
+
+Replays recorded replies (cycled to --replies) arriving at --rate per second,
+each handled on its own worker as extractor_node would. Runs once with one
+call per reply and once per batching window, and reports Claude calls, mean
+batch size, cost per reply, per-reply latency, the queueing latency added by
+batching, and agreement with the unbatched intents.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UNBATCHED = 'unbatched'
+
+# Simulated fast-tier latency for --stub runs: per call, plus per output token
+STUB_CALL_LATENCY_S = 0.15
+STUB_TOKEN_LATENCY_S = 0.002
+
+
+def arrival_offsets(count: int, rate: float, seed: int = 7) -> List[float]:
+    """Poisson arrival times (seconds from start) for `count` replies at `rate` per second"""
+    rng = random.Random(seed)
+    offsets, now = [], 0.0
+    for _ in range(count):
+        now += rng.expovariate(rate)
+        offsets.append(now)
+    return offsets
+
+
+def run_burst(replies: List[dict], offsets: List[float], concurrency: int, window_ms: Optional[float],
+              batch_size: int) -> Dict:
+    """Classify every reply as it arrives; window_ms=None makes one call per reply"""
+    from agents.extractor import classify_batch, extract_intent, extract_intent_batched
+    from agents.intent_batcher import IntentBatcher
+    from benchmarks.workloads import percentile
+    from utils.llm_costs import usage_scope
+    from utils.tracing import get_histogram
+
+    get_histogram('intent_batch.wait').reset()
+    batcher = IntentBatcher(classify_batch, window_ms, batch_size) if window_ms is not None else None
+    started = time.perf_counter()
+
+    def handle(reply: dict, offset: float):
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        arrived = time.perf_counter()
+        args = (reply['reply'], reply.get('context', ''), reply.get('last_assistant_message', ''))
+        with usage_scope() as usage:
+            if batcher is None:
+                result = extract_intent(*args)
+            else:
+                result = extract_intent_batched(batcher, *args)
+        return result['intent'], (time.perf_counter() - arrived) * 1000, usage.cost_usd
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(handle, replies, offsets))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency, _ in outcomes]
+    result = {
+        'replies': len(replies),
+        'seconds': round(elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'mean_cost_usd': round(sum(cost for _, _, cost in outcomes) / len(outcomes), 7),
+        'intents': [intent for intent, _, _ in outcomes]
+    }
+    if batcher is None:
+        result.update({'claude_calls': len(replies), 'mean_batch_size': 1.0, 'wait_p50_ms': 0.0, 'wait_p95_ms': 0.0})
+    else:
+        stats = batcher.stats()
+        batcher.close()
+        result.update({
+            'claude_calls': stats['batches'] + sum(stats['fallbacks'].values()),
+            'mean_batch_size': stats['mean_batch_size'],
+            'wait_p50_ms': stats['wait_p50_ms'],
+            'wait_p95_ms': stats['wait_p95_ms']
+        })
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare per-reply and micro-batched intent extraction')
+    parser.add_argument('--stub', action='store_true', help='Use the offline Claude stub instead of the API')
+    parser.add_argument('--replies', type=int, default=1000, help='Replies in the burst')
+    parser.add_argument('--rate', type=float, default=200.0, help='Mean arrivals per second')
+    parser.add_argument('--concurrency', type=int, default=64, help='Replies processed at once (agent workers)')
+    parser.add_argument('--window-ms', type=float, nargs='+', default=[25.0, 50.0, 100.0])
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from benchmarks.replay_model_tiers import load_recorded_replies
+
+    if args.stub:
+        from benchmarks.stubs import install_llm_stub
+        install_llm_stub(STUB_CALL_LATENCY_S, STUB_TOKEN_LATENCY_S)
+    elif not os.getenv('ANTHROPIC_API_KEY'):
+        print('ANTHROPIC_API_KEY is not set; use --stub for an offline run')
+        return 1
+
+    recorded = load_recorded_replies()
+    replies = [recorded[i % len(recorded)] for i in range(args.replies)]
+    offsets = arrival_offsets(args.replies, args.rate)
+
+    results = {UNBATCHED: run_burst(replies, offsets, args.concurrency, None, args.batch_size)}
+    for window_ms in args.window_ms:
+        results[f'{window_ms:g}ms'] = run_burst(replies, offsets, args.concurrency, window_ms, args.batch_size)
+
+    baseline = results[UNBATCHED]['intents']
+    print(f"{args.replies} replies at {args.rate:g}/s, {args.concurrency} concurrent, batches of up to {args.batch_size}")
+    header = (f"{'mode':<10}{'calls':>7}{'batch':>7}{'$/reply':>11}{'p50 ms':>9}{'p95 ms':>9}"
+              f"{'wait p50':>10}{'wait p95':>10}{'agree':>7}")
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        r['agreement'] = round(sum(a == b for a, b in zip(r['intents'], baseline)) / len(baseline), 3)
+        print(f"{mode:<10}{r['claude_calls']:>7}{r['mean_batch_size']:>7.1f}{r['mean_cost_usd']:>11.7f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['wait_p50_ms']:>10.1f}{r['wait_p95_ms']:>10.1f}"
+              f"{r['agreement']:>7.1%}")
+
+    if args.json_path:
+        for r in results.values():
+            del r['intents']
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Real-time vs Message Batches generation of first outreach messages (campaign.py)
+
+Usage (from the repo root):
+    python -m benchmarks.deferred_outreach                          # 200 SECONDARY_OUTREACH customers
+    python -m benchmarks.deferred_outreach --customers 1000 --batch-turnaround 10 --json out.json
+
+Offline: the Claude client is the benchmark stub, whose fake Message Batches
+endpoint ends a batch --batch-turnaround seconds after submission (the real
+API takes minutes to hours). Reports time until every message is dispatched,
+synchronous Claude calls, cost per message and conversation store counts for
+a campaign run with every first message generated in real time on the job
+runner, and with deferred generation.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Simulated synchronous latency of a generation call on the standard tier (seconds)
+STUB_GENERATION_LATENCY_S = 0.6
+
+
+def synthetic_users(count: int) -> Dict[str, Dict]:
+    """`count` customers cloned from the mock database profiles"""
+    from utils.metrics import load_mock_data
+
+    profiles = list(load_mock_data()['users'].values())
+    return {f'user_{i:06d}': dict(profiles[i % len(profiles)]) for i in range(count)}
+
+
+def run_campaign(mode: str, users: Dict[str, Dict], workers: int) -> Dict:
+    from campaign import CampaignRunner
+    from jobs import JobRunner
+    from agents import llm
+    from utils.conversation_store import ConversationStore
+    from utils.llm_costs import ledger
+
+    campaign_id = f'bench-{mode}'
+    outreach_list = [{'user_id': user_id, 'retention_decision': 'SECONDARY_OUTREACH'} for user_id in users]
+    runner = JobRunner(max_workers=workers)
+    campaign = CampaignRunner(ConversationStore(), runner=runner, users=users,
+                              send=lambda *message: None, defer_secondary=(mode == 'deferred'))
+
+    sync_calls_before = llm.client.messages.calls
+    started = time.perf_counter()
+    summary = campaign.run(campaign_id, outreach_list, poll_interval_s=0.25)
+    elapsed = time.perf_counter() - started
+    runner.shutdown()
+
+    spend = ledger.summary(campaign_id)
+    return {
+        'customers': len(users),
+        'seconds': round(elapsed, 2),
+        'messages_per_sec': round(summary['dispatched'] / elapsed, 1),
+        'sync_claude_calls': llm.client.messages.calls - sync_calls_before,
+        'cost_per_message_usd': round(spend['cost_usd'] / max(1, summary['dispatched']), 6),
+        'dispatched': summary['dispatched'],
+        'status_counts': summary['status_counts']
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare real-time and batched first-outreach generation')
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4, help='Job runner workers for real-time turns')
+    parser.add_argument('--batch-turnaround', type=float, default=5.0, help='Seconds until the stub batch ends')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from benchmarks.stubs import install_llm_stub, disable_simulated_latency
+
+    install_llm_stub(STUB_GENERATION_LATENCY_S, batch_turnaround_s=args.batch_turnaround)
+    disable_simulated_latency()
+
+    users = synthetic_users(args.customers)
+    results = {mode: run_campaign(mode, users, args.workers) for mode in ('realtime', 'deferred')}
+
+    print(f"{args.customers} SECONDARY_OUTREACH customers, {args.workers} workers, "
+          f"batch turnaround {args.batch_turnaround:g}s")
+    header = f"{'mode':<10}{'seconds':>9}{'msg/s':>8}{'sync calls':>12}{'$/message':>12}{'dispatched':>12}"
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['seconds']:>9.2f}{r['messages_per_sec']:>8.1f}{r['sync_claude_calls']:>12}"
+              f"{r['cost_per_message_usd']:>12.6f}{r['dispatched']:>12}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
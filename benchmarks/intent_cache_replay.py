@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Intent cache (agents/intent_cache.py) on a stream of repetitive customer replies
+
+Usage (from the repo root):
+    python -m benchmarks.intent_cache_replay --stub                # offline
+    python -m benchmarks.intent_cache_replay --replies 20000 --json out.json
+
+Builds a reply stream from benchmarks/recorded_replies.jsonl: each reply is
+drawn with a skewed (Zipf-like) popularity and rewritten the way customers
+vary it (case, punctuation, politeness, an extra word). Every reply goes
+through extractor_node twice: without the cache and with it. Reports the
+fraction of replies that skipped the LLM per tier, Claude calls, agreement
+with the uncached intents, and the hit rate after a simulated restart that
+reloads the persisted cache.
+"""
+import os
+import re
+import sys
+import json
+import random
+import shutil
+import argparse
+import tempfile
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# How customers vary the same reply
+_VARIATIONS = (
+    lambda text: text,
+    lambda text: text.capitalize(),
+    lambda text: text.upper(),
+    lambda text: text + '!',
+    lambda text: text + '.',
+    lambda text: text + ' please',
+    lambda text: 'thanks, ' + text,
+    lambda text: text + ' ok',
+    lambda text: text.replace(' ', '  '),
+)
+
+
+def reply_stream(recorded: List[dict], count: int, seed: int = 7) -> List[dict]:
+    """`count` recorded replies with skewed popularity, each with a random variation"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(recorded))]
+    stream = []
+    for reply in rng.choices(recorded, weights=weights, k=count):
+        stream.append({**reply, 'reply': rng.choice(_VARIATIONS)(reply['reply'])})
+    return stream
+
+
+def reply_state(reply: dict) -> dict:
+    from benchmarks.workloads import make_reply_state
+
+    state = make_reply_state(reply['reply'])
+    state['messages'][0]['content'] = reply.get('last_assistant_message', '')
+    match = re.search(r'Recommendation: (\w+)', reply.get('context', ''))
+    state['router_decision'] = match.group(1) if match else None
+    return state
+
+
+def replay(stream: List[dict], cache) -> Dict:
+    """Run the stream through extractor_node with `cache` (None: no cache)"""
+    from agents import extractor
+
+    extractor._batcher_loaded = True  # keep micro-batching off
+    original = extractor.get_intent_cache
+    extractor.get_intent_cache = lambda: cache
+    try:
+        intents, calls = [], 0
+        for reply in stream:
+            update = extractor.extractor_node(reply_state(reply))
+            intents.append(update['current_intent'])
+            calls += len(update['tool_calls'][-1]['llm_calls'])
+    finally:
+        extractor.get_intent_cache = original
+    return {'intents': intents, 'claude_calls': calls}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Measure intent cache hit rates on a repetitive reply stream')
+    parser.add_argument('--stub', action='store_true', help='Use the offline Claude stub instead of the API')
+    parser.add_argument('--replies', type=int, default=5000)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    if args.stub:
+        from benchmarks.stubs import install_llm_stub
+        install_llm_stub()
+    elif not os.getenv('ANTHROPIC_API_KEY'):
+        print('ANTHROPIC_API_KEY is not set; use --stub for an offline run')
+        return 1
+
+    from agents.intent_cache import IntentCache
+    from benchmarks.replay_model_tiers import load_recorded_replies
+
+    recorded = load_recorded_replies()
+    stream = reply_stream(recorded, args.replies)
+    uncached = replay(stream, None)
+
+    scratch = tempfile.mkdtemp(prefix='careloop-intent-cache-')
+    try:
+        path = os.path.join(scratch, 'intent_cache.jsonl')
+        cache = IntentCache(path=path)
+        cached = replay(stream, cache)
+        first_run = cache.stats()
+        cache.save()
+
+        # A fresh process: reload the persisted entries, replay a new stream
+        restarted_cache = IntentCache(path=path)
+        replay(reply_stream(recorded, args.replies, seed=8), restarted_cache)
+        restarted = restarted_cache.stats()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    agreement = sum(a == b for a, b in zip(uncached['intents'], cached['intents'])) / len(stream)
+    results = {
+        'replies': len(stream),
+        'claude_calls_uncached': uncached['claude_calls'],
+        'claude_calls_cached': cached['claude_calls'],
+        'cache': first_run,
+        'agreement_with_uncached': round(agreement, 4),
+        'after_restart': restarted
+    }
+
+    print(f"{len(stream)} replies ({len(recorded)} distinct recorded replies with variations)")
+    print(f"  Claude calls          {uncached['claude_calls']:>7} uncached → {cached['claude_calls']} cached")
+    print(f"  skipped the LLM       {first_run['skip_llm_fraction']:>7.1%}  "
+          f"(exact {first_run['exact_hits']}, similar {first_run['similar_hits']}, miss {first_run['misses']})")
+    print(f"  agreement             {agreement:>7.1%}  with the uncached intents")
+    print(f"  entries               {first_run['entries']:>7}")
+    print(f"  after restart         {restarted['skip_llm_fraction']:>7.1%}  skipped the LLM on a new stream")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
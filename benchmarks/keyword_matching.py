@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Compiled keyword matcher (agents/keyword_matcher.py) vs the per-phrase
+substring scans it replaced in the extractor's keyword fallback
+
+Usage (from the repo root):
+    python -m benchmarks.keyword_matching                     # 50,000 replies
+    python -m benchmarks.keyword_matching --replies 200000 --json out.json
+
+Offline, no Claude calls. Builds a reply corpus from
+benchmarks/recorded_replies.jsonl and the sample replies (varied the way
+customers vary them, a share padded into longer paragraphs) and a corpus of
+assistant messages (the template messages plus the recorded last messages).
+Times keyword_intent and offers_multiple_options both ways, and reports where
+the two disagree (substring hits inside other words such as 'or' in "for")
+and the keyword fallback's accuracy on the labelled recorded replies. Then
+scales the phrase list (real phrases plus random words) to show how the cost
+of each approach grows with the number of phrases.
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+from collections import Counter
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sentences some customers wrap their answer in
+_PADDING = (
+    "Hi, thanks for getting in touch about this.",
+    "It has been a rough couple of months with the vet visits.",
+    "My partner handles most of the bills so I'm not sure about the details.",
+    "Sorry for the slow reply, work has been crazy.",
+    "Our dog has been doing better lately, which is a relief.",
+)
+
+PHRASE_COUNTS = (35, 100, 300, 1000)
+
+# Inflected forms whole-word matching has to list explicitly, with the intent
+# the keyword fallback should give them: (reply, options offered, intent)
+INFLECTED_REPLIES = (
+    ('I want it cancelled', False, 'cancel_request'),
+    ('Please get it canceled today', False, 'cancel_request'),
+    ('Go ahead with the cancellation', False, 'cancel_request'),
+    ('I am cancelling', False, 'cancel_request'),
+    ('I stopped using the app months ago', False, 'cancel_request'),
+    ('Stopping this now', False, 'cancel_request'),
+    ('I already unsubscribed', False, 'cancel_request'),
+    ('Okay', False, 'accept_bridge'),
+    ('okay let\'s do that', True, 'ambiguous_acceptance'),
+    ('Okay, the keeper one', True, 'accept_bridge'),
+    ('Yes, one of the extensions please', True, 'accept_extension'),
+    ('Sure, the 14-day one', True, 'accept_extension'),
+)
+
+
+# ---------------------------------------------------------------------------
+# The substring scans the compiled matcher replaced, kept as the reference
+# ---------------------------------------------------------------------------
+
+def legacy_offers_multiple_options(last_assistant_message: str) -> bool:
+    if not last_assistant_message:
+        return False
+    option_indicators = ['which option', 'or', 'prefer', 'choose between', 'two options', 'either']
+    return any(indicator in last_assistant_message.lower() for indicator in option_indicators)
+
+
+def legacy_keyword_intent(user_message: str, multiple_options_offered: bool = False) -> dict:
+    from state import ExtractorOutput, EXTRACTION_KEYWORD
+
+    intent = _legacy_intent(user_message, multiple_options_offered)
+    return ExtractorOutput(intent=intent, confidence=0.7, extracted_entities={}, reasoning='Keyword match',
+                           source=EXTRACTION_KEYWORD)
+
+
+def _legacy_intent(user_message: str, multiple_options_offered: bool) -> str:
+    msg_lower = user_message.lower()
+    if any(word in msg_lower for word in ['yes', 'sure', 'ok', 'do it', 'sounds good', 'that works']):
+        if multiple_options_offered and not any(specific in msg_lower for specific in ['bridge', 'keeper', 'extension', '$4.99', '$5', '14 day', 'premium', 'plan']):
+            return 'ambiguous_acceptance'
+        elif 'keeper' in msg_lower or '$4.99' in msg_lower or '$5' in msg_lower:
+            return 'accept_bridge'
+        elif 'extension' in msg_lower or 'premium' in msg_lower or '14' in msg_lower:
+            return 'accept_extension'
+        return 'accept_bridge'
+    elif any(word in msg_lower for word in ['no money', "don't have", "can't afford", "tight", 'broke', 'options']):
+        return 'financial_hardship'
+    elif any(word in msg_lower for word in ['friday', 'next week', 'few days', 'pay later']):
+        return 'ask_for_time'
+    elif any(word in msg_lower for word in ['cancel', 'stop', 'unsubscribe']):
+        return 'cancel_request'
+    elif any(word in msg_lower for word in ['what', 'how', 'details', 'tell me more', 'included']):
+        return 'ask_for_more_info'
+    return 'financial_hardship'
+
+
+# ---------------------------------------------------------------------------
+# Corpora
+# ---------------------------------------------------------------------------
+
+def reply_corpus(count: int, long_share: float, seed: int = 7) -> List[dict]:
+    """Recorded and sample replies with customer variations; `long_share` padded into paragraphs"""
+    from benchmarks.intent_cache_replay import reply_stream
+    from benchmarks.replay_model_tiers import load_recorded_replies
+    from benchmarks.workloads import SAMPLE_REPLIES
+
+    rng = random.Random(seed)
+    recorded = load_recorded_replies()
+    recorded += [{'reply': reply, 'last_assistant_message': rng.choice(recorded)['last_assistant_message']}
+                 for reply in SAMPLE_REPLIES]
+    corpus = []
+    for reply in reply_stream(recorded, count, seed):
+        if rng.random() < long_share:
+            before, after = rng.sample(_PADDING, 2)
+            reply = {**reply, 'reply': f"{before} {reply['reply']} {after}"}
+        corpus.append(reply)
+    return corpus
+
+
+def assistant_messages() -> List[str]:
+    from agents.negotiator import TEMPLATE_MESSAGES
+    from benchmarks.replay_model_tiers import load_recorded_replies
+
+    messages = [template.format(user_name='Maria', pet_name='Bella') for template in TEMPLATE_MESSAGES.values()]
+    messages += sorted({reply['last_assistant_message'] for reply in load_recorded_replies()})
+    return messages
+
+
+def phrase_scaling(texts: List[str], seed: int = 3) -> List[Dict]:
+    """Microseconds per text to find every phrase, as the phrase list grows"""
+    from agents.extractor import REPLY_PHRASES
+    from agents.keyword_matcher import KeywordMatcher
+
+    rng = random.Random(seed)
+    base = sorted({phrase for phrases in REPLY_PHRASES.values() for phrase in phrases})
+    rows = []
+    for count in PHRASE_COUNTS:
+        phrases = base + [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                          for _ in range(max(0, count - len(base)))]
+        matcher = KeywordMatcher({'phrase': phrases})
+
+        def substring_scan(text):
+            text = text.lower()
+            return [phrase for phrase in phrases if phrase in text]
+
+        items = [(text,) for text in texts]
+        rows.append({
+            'phrases': len(phrases),
+            'substring_us': round(time_per_item(substring_scan, items), 3),
+            'compiled_us': round(time_per_item(matcher.labels, items), 3)
+        })
+    return rows
+
+
+def time_per_item(function: Callable, items: List, repeat: int = 3) -> float:
+    """Best-of-`repeat` microseconds per item"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            function(*item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items) * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare the compiled keyword matcher with per-phrase substring scans')
+    parser.add_argument('--replies', type=int, default=50000)
+    parser.add_argument('--long-share', type=float, default=0.2, help='Share of replies padded into paragraphs')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from agents.extractor import keyword_intent, offers_multiple_options
+    from benchmarks.replay_model_tiers import load_recorded_replies
+
+    corpus = reply_corpus(args.replies, args.long_share)
+    offered = [(reply['last_assistant_message'],) for reply in corpus]
+    messages = [(message,) for message in assistant_messages()]
+
+    legacy_calls = [(reply['reply'], legacy_offers_multiple_options(reply['last_assistant_message']))
+                    for reply in corpus]
+    compiled_calls = [(reply['reply'], offers_multiple_options(reply['last_assistant_message']))
+                      for reply in corpus]
+    results: Dict = {
+        'replies': len(corpus),
+        'mean_reply_chars': round(sum(len(reply['reply']) for reply in corpus) / len(corpus), 1),
+        'keyword_intent_us': {
+            'substring': round(time_per_item(legacy_keyword_intent, legacy_calls), 3),
+            'compiled': round(time_per_item(keyword_intent, compiled_calls), 3)
+        },
+        'offers_multiple_options_us': {
+            'substring': round(time_per_item(legacy_offers_multiple_options, offered), 3),
+            'compiled': round(time_per_item(offers_multiple_options, offered), 3)
+        }
+    }
+
+    # Where the two disagree (end to end: options check feeding the intent)
+    flips = Counter()
+    for legacy_call, compiled_call in zip(legacy_calls, compiled_calls):
+        before, after = legacy_keyword_intent(*legacy_call)['intent'], keyword_intent(*compiled_call)['intent']
+        if before != after:
+            flips[(before, after)] += 1
+    results['intent_changed'] = round(sum(flips.values()) / len(corpus), 4)
+    results['top_changes'] = [{'substring': before, 'compiled': after, 'replies': count}
+                              for (before, after), count in flips.most_common(5)]
+    results['multiple_options_detected'] = {
+        'substring': sum(legacy_offers_multiple_options(*message) for message in messages),
+        'compiled': sum(offers_multiple_options(*message) for message in messages),
+        'messages': len(messages)
+    }
+
+    labelled = load_recorded_replies()
+    results['recorded_accuracy'] = {
+        'substring': round(sum(
+            legacy_keyword_intent(reply['reply'], legacy_offers_multiple_options(reply['last_assistant_message']))['intent']
+            == reply['expected_intent'] for reply in labelled) / len(labelled), 3),
+        'compiled': round(sum(
+            keyword_intent(reply['reply'], offers_multiple_options(reply['last_assistant_message']))['intent']
+            == reply['expected_intent'] for reply in labelled) / len(labelled), 3)
+    }
+    results['inflected_accuracy'] = {
+        'substring': round(sum(legacy_keyword_intent(reply, offered)['intent'] == expected
+                               for reply, offered, expected in INFLECTED_REPLIES) / len(INFLECTED_REPLIES), 3),
+        'compiled': round(sum(keyword_intent(reply, offered)['intent'] == expected
+                              for reply, offered, expected in INFLECTED_REPLIES) / len(INFLECTED_REPLIES), 3)
+    }
+    results['phrase_scaling'] = phrase_scaling(sorted({reply['reply'] for reply in corpus}))
+
+    print(f"{len(corpus)} replies (mean {results['mean_reply_chars']} chars, "
+          f"{args.long_share:.0%} padded into paragraphs), {len(messages)} assistant messages")
+    header = f"{'':<28}{'substring':>11}{'compiled':>11}"
+    print(header)
+    print('-' * len(header))
+    for name, key in (('keyword_intent µs', 'keyword_intent_us'), ('offers_multiple_options µs', 'offers_multiple_options_us')):
+        print(f"{name:<28}{results[key]['substring']:>11.2f}{results[key]['compiled']:>11.2f}")
+    detected = results['multiple_options_detected']
+    print(f"{'multiple options detected':<28}{detected['substring']:>11}{detected['compiled']:>11}"
+          f"  (of {detected['messages']})")
+    accuracy = results['recorded_accuracy']
+    print(f"{'recorded reply accuracy':<28}{accuracy['substring']:>11.1%}{accuracy['compiled']:>11.1%}")
+    accuracy = results['inflected_accuracy']
+    print(f"{'inflected form accuracy':<28}{accuracy['substring']:>11.1%}{accuracy['compiled']:>11.1%}"
+          f"  (of {len(INFLECTED_REPLIES)})")
+    print(f"\nIntent changed on {results['intent_changed']:.1%} of replies")
+    for change in results['top_changes']:
+        print(f"  {change['substring']:>22} → {change['compiled']:<22}{change['replies']:>7}")
+
+    print(f"\nFinding every phrase in a reply, µs")
+    header = f"{'phrases':>8}{'substring':>11}{'compiled':>11}"
+    print(header)
+    print('-' * len(header))
+    for row in results['phrase_scaling']:
+        print(f"{row['phrases']:>8}{row['substring_us']:>11.2f}{row['compiled_us']:>11.2f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Load test for the headless conversation API (api.py)
+
+Usage (from the repo root):
+    python -m benchmarks.load_test_api --spawn                      # start a stubbed server and test it
+    python -m benchmarks.load_test_api --url http://127.0.0.1:8000  # test a running server
+    python -m benchmarks.load_test_api --spawn --conversations 500 --replies 3 --concurrency 100
+
+Each simulated conversation posts a payment failure, then its replies back to
+back (as an SMS burst would arrive). Reports request throughput and latency,
+429 backpressure responses, and how long until every reply was processed.
+
+--spawn runs `uvicorn api:app` in a child process with the Claude client
+replaced by benchmarks.stubs.StubAnthropic (with --llm-latency seconds per
+call) and the mock Stripe/email latency removed.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPLY_SCRIPT = [
+    "what's included?",
+    "ok do the $4.99 keeper one",
+    "thanks",
+]
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 JSON client (one connection per request) on asyncio streams"""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, dict]:
+        body = json.dumps(payload).encode() if payload is not None else b''
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            raw = await reader.read()
+        finally:
+            writer.close()
+        head, _, response_body = raw.partition(b'\r\n\r\n')
+        status = int(head.split(b' ', 2)[1])
+        return status, json.loads(response_body or b'{}')
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies_ms: Dict[str, List[float]] = {'failure': [], 'reply': []}
+        self.statuses: Dict[int, int] = {}
+        self.throttled_retries = 0
+
+    def record(self, kind: str, status: int, latency_ms: float):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status == 202:
+            self.latencies_ms[kind].append(latency_ms)
+
+
+async def post_with_retry(client: HttpClient, stats: LoadStats, kind: str, path: str, payload) -> int:
+    """POST, backing off on 429 the way a webhook sender would"""
+    while True:
+        started = time.perf_counter()
+        status, _ = await client.request('POST', path, payload)
+        stats.record(kind, status, (time.perf_counter() - started) * 1000)
+        if status != 429:
+            return status
+        stats.throttled_retries += 1
+        await asyncio.sleep(0.2)
+
+
+async def run_conversation(client: HttpClient, stats: LoadStats, index: int, replies: int, semaphore):
+    user_id = f'load_{index:06d}'
+    user = {
+        'name': f'Load Customer {index}',
+        'email': f'load{index}@example.com',
+        'pet_name': 'Bella',
+        'pet_species': 'Dog',
+        'pet_condition': 'Diabetes (Insulin Dependent)',
+        'medical_risk_tier': 'high',
+        'plan_cost': 50.0,
+        'tenure_months': 24,
+        'ltv': 8000,
+        'current_plan': 'premium'
+    }
+    async with semaphore:
+        await post_with_retry(client, stats, 'failure', '/failures', {'user_id': user_id, 'user': user})
+        for i in range(replies):
+            await post_with_retry(
+                client, stats, 'reply', f'/conversations/{user_id}/reply',
+                {'message': REPLY_SCRIPT[i % len(REPLY_SCRIPT)], 'channel': 'sms'}
+            )
+    return user_id
+
+
+async def wait_until_processed(client: HttpClient, conversation_ids: List[str], replies: int, timeout_s: float) -> bool:
+    deadline = time.perf_counter() + timeout_s
+    remaining = set(conversation_ids)
+    while remaining and time.perf_counter() < deadline:
+        for conversation_id in list(remaining):
+            status, summary = await client.request('GET', f'/conversations/{conversation_id}')
+            if status == 200 and summary['replies_processed'] >= replies and summary['pending_events'] == 0 \
+                    and summary['turns'] > 0:
+                remaining.discard(conversation_id)
+        if remaining:
+            await asyncio.sleep(0.2)
+    return not remaining
+
+
+async def run_load(base_url: str, conversations: int, replies: int, concurrency: int, timeout_s: float) -> dict:
+    from benchmarks.workloads import percentile
+
+    client = HttpClient(base_url)
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    started = time.perf_counter()
+    conversation_ids = await asyncio.gather(*[
+        run_conversation(client, stats, i, replies, semaphore) for i in range(conversations)
+    ])
+    submitted_s = time.perf_counter() - started
+    all_processed = await wait_until_processed(client, conversation_ids, replies, timeout_s)
+    processed_s = time.perf_counter() - started
+
+    _, health = await client.request('GET', '/healthz')
+    requests = sum(stats.statuses.values())
+    return {
+        'conversations': conversations,
+        'replies_per_conversation': replies,
+        'concurrency': concurrency,
+        'requests': requests,
+        'status_counts': stats.statuses,
+        'throttled_retries': stats.throttled_retries,
+        'submit_seconds': round(submitted_s, 2),
+        'requests_per_sec': round(requests / submitted_s, 1),
+        'failure_p50_ms': round(percentile(stats.latencies_ms['failure'], 50), 2),
+        'failure_p99_ms': round(percentile(stats.latencies_ms['failure'], 99), 2),
+        'reply_p50_ms': round(percentile(stats.latencies_ms['reply'], 50), 2),
+        'reply_p99_ms': round(percentile(stats.latencies_ms['reply'], 99), 2),
+        'all_processed': all_processed,
+        'seconds_until_processed': round(processed_s, 2),
+        'server': health
+    }
+
+
+# ---------------------------------------------------------------------------
+# Stubbed server (--spawn)
+# ---------------------------------------------------------------------------
+
+def serve(port: int, llm_latency_s: float):
+    """Run api.app under uvicorn with the Claude client and tool latency stubbed"""
+    import uvicorn
+    from benchmarks.stubs import install_llm_stub, disable_simulated_latency
+
+    install_llm_stub(llm_latency_s)
+    disable_simulated_latency()
+    from api import app
+
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout_s: float = 30.0):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"API server did not start on port {port}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load test the CareLoop conversation API')
+    parser.add_argument('--url', help='Base URL of a running API server')
+    parser.add_argument('--spawn', action='store_true', help='Start a stubbed API server for the test')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Stub Claude latency per call (seconds)')
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--replies', type=int, default=3, help='Replies posted per conversation')
+    parser.add_argument('--concurrency', type=int, default=50, help='Conversations in flight at once')
+    parser.add_argument('--timeout', type=float, default=300.0, help='Seconds to wait for processing')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    if args.serve:
+        serve(args.port, args.llm_latency)
+        return 0
+
+    server: Optional[subprocess.Popen] = None
+    base_url = args.url
+    if args.spawn:
+        port = args.port or free_port()
+        server = subprocess.Popen([
+            sys.executable, '-m', 'benchmarks.load_test_api', '--serve',
+            '--port', str(port), '--llm-latency', str(args.llm_latency)
+        ])
+        wait_for_port(port)
+        base_url = f'http://127.0.0.1:{port}'
+    elif not base_url:
+        parser.error('pass --url or --spawn')
+
+    try:
+        results = asyncio.run(run_load(base_url, args.conversations, args.replies, args.concurrency, args.timeout))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(results, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0 if results['all_processed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Nightly precomputed initial outreach (agents/outreach_precompute.py) vs
+generating it when the failure arrives
+
+Usage (from the repo root):
+    python -m benchmarks.precomputed_outreach                       # 3000 customers
+    python -m benchmarks.precomputed_outreach --customers 10000 --min-probability 0.1 --json out.json
+
+Offline: the Claude client is the benchmark stub (simulated generation
+latency; the fake Message Batches endpoint ends immediately). Builds a
+customer book with random billing days and payment histories, runs the
+nightly precompute for tomorrow, then simulates tomorrow's failures (each
+customer due tomorrow fails at their simulated, unobserved failure rate) and handles
+each one with negotiator_node, once without the draft store and once with
+it. Reports time to first message, draft coverage of the actual failures,
+drafts that were never used, and spend.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Simulated synchronous latency of a generation call (seconds)
+STUB_GENERATION_LATENCY_S = 0.6
+
+TODAY = date(2025, 12, 3)
+
+
+def customer_book(count: int, seed: int = 7) -> Dict[str, Dict]:
+    """Mock database profiles with random billing days and 6-month payment histories"""
+    from utils.metrics import load_mock_data
+
+    rng = random.Random(seed)
+    profiles = list(load_mock_data()['users'].values())
+    users = {}
+    for i in range(count):
+        reliability = rng.choice([0.97, 0.9, 0.75, 0.5])
+        last_payment = TODAY - timedelta(days=rng.randint(1, 31))
+        history = [
+            {'date': (last_payment - timedelta(days=30 * month)).isoformat(),
+             'status': 'success' if rng.random() < reliability else 'failed', 'amount': 50.0}
+            for month in range(1, 7)
+        ]
+        users[f'user_{i:06d}'] = {
+            **profiles[i % len(profiles)],
+            'current_plan': 'premium',
+            'last_payment_date': last_payment.isoformat(),
+            'last_payment_status': 'success' if rng.random() < reliability else 'failed',
+            'payment_history': history,
+            '_reliability': reliability
+        }
+    return users
+
+
+def tomorrows_failures(users: Dict[str, Dict], seed: int = 8) -> List[str]:
+    """Customers due tomorrow whose payment actually fails"""
+    from agents.outreach_precompute import next_due_date
+
+    rng = random.Random(seed)
+    tomorrow = TODAY + timedelta(days=1)
+    return [
+        user_id for user_id, user_data in users.items()
+        if next_due_date(user_data['last_payment_date'], TODAY) == tomorrow
+        and rng.random() > user_data['_reliability']
+    ]
+
+
+def handle_failures(users: Dict[str, Dict], failures: List[str], campaign_id: str, concurrency: int) -> Dict:
+    """First message for every failure, as the failure handler would send it"""
+    from agents.negotiator import negotiator_node
+    from agents.router import router_node
+    from benchmarks.workloads import percentile
+    from state import build_initial_state
+    from utils.llm_costs import ledger
+
+    def handle(user_id: str) -> float:
+        state = build_initial_state(user_id, users[user_id], campaign_id)
+        state.update(router_node(state))
+        started = time.perf_counter()
+        negotiator_node(state)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(handle, failures))
+    return {
+        'failures': len(failures),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'failure_time_cost_usd': round(ledger.summary(campaign_id)['cost_usd'], 6)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare precomputed and on-failure initial outreach')
+    parser.add_argument('--customers', type=int, default=3000)
+    parser.add_argument('--min-probability', type=float, default=None, help='Precompute threshold')
+    parser.add_argument('--concurrency', type=int, default=16, help='Failures handled at once')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from benchmarks.stubs import install_llm_stub, disable_simulated_latency
+    from agents import outreach_precompute
+    from utils import draft_store
+    from utils.draft_store import DraftStore
+    from utils.llm_costs import ledger
+
+    install_llm_stub(STUB_GENERATION_LATENCY_S)
+    disable_simulated_latency()
+
+    users = customer_book(args.customers)
+    failures = tomorrows_failures(users)
+    min_probability = (args.min_probability if args.min_probability is not None
+                       else outreach_precompute.DEFAULT_MIN_FAILURE_PROBABILITY)
+
+    draft_store._store, draft_store._store_loaded = None, True
+    on_failure = handle_failures(users, failures, 'bench-on-failure', args.concurrency)
+
+    store = DraftStore()
+    started = time.perf_counter()
+    nightly = outreach_precompute.precompute_outreach(store, users, today=TODAY, min_probability=min_probability,
+                                                      campaign_id='bench-nightly', poll_interval_s=0.1)
+    nightly_seconds = time.perf_counter() - started
+    drafted = nightly['drafted']
+
+    draft_store._store = store
+    precomputed = handle_failures(users, failures, 'bench-precomputed', args.concurrency)
+    unused = len(store)
+    draft_store._store, draft_store._store_loaded = None, False
+
+    covered = drafted - unused
+    precomputed.update(
+        nightly_drafts=drafted,
+        nightly_seconds=round(nightly_seconds, 2),
+        nightly_cost_usd=round(ledger.summary('bench-nightly')['cost_usd'], 6),
+        covered_failures=covered,
+        coverage=round(covered / len(failures), 4) if failures else 0.0,
+        unused_drafts=unused
+    )
+    results = {'on_failure': on_failure, 'precomputed': precomputed}
+
+    print(f"{args.customers} customers, {len(failures)} failures tomorrow, "
+          f"{drafted} drafted overnight (failure probability ≥ {min_probability:g})")
+    header = f"{'mode':<13}{'p50 ms':>9}{'p95 ms':>9}{'coverage':>10}{'unused':>8}{'$ at failure':>14}{'$ nightly':>11}"
+    print(header)
+    print('-' * len(header))
+    print(f"{'on failure':<13}{on_failure['p50_ms']:>9.1f}{on_failure['p95_ms']:>9.1f}{'-':>10}{'-':>8}"
+          f"{on_failure['failure_time_cost_usd']:>14.6f}{'-':>11}")
+    print(f"{'precomputed':<13}{precomputed['p50_ms']:>9.1f}{precomputed['p95_ms']:>9.1f}"
+          f"{precomputed['coverage']:>10.1%}{unused:>8}{precomputed['failure_time_cost_usd']:>14.6f}"
+          f"{precomputed['nightly_cost_usd']:>11.6f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
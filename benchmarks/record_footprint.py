@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Per-customer memory footprint of scoring results: dicts vs slotted records
+
+Usage (from the repo root):
+    python -m benchmarks.record_footprint                  # 1M rows
+    python -m benchmarks.record_footprint --rows 200000 --json out.json
+
+Each representation is built for every row of a synthetic cohort and kept
+alive, in its own spawned process. Reports traced bytes and allocated blocks
+per customer (tracemalloc), build time, and peak RSS.
+
+    scored_dict     batch_score_customers rows ({**customer, score fields})
+    scored_record   batch_score_records rows (ScoredCustomer)
+    score_dict      calculate_retention_priority_score results (+ breakdown dict)
+    score_record    score_retention_priority results (RetentionScore + ScoreBreakdown)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from typing import Dict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ('scored_dict', 'scored_record', 'score_dict', 'score_record')
+
+
+def _builder(mode: str):
+    from agents.records import ScoredCustomer
+    from agents.retention_scorer import calculate_retention_priority_score, score_retention_priority
+
+    def score(customer, fn):
+        return fn(
+            customer['medical_urgency_score'],
+            customer['payment_risk_score'],
+            customer['medication_adherence_score'],
+            customer['ltv'],
+            customer['tenure_months']
+        )
+
+    if mode == 'scored_dict':
+        def build(customer):
+            result = score(customer, score_retention_priority)
+            return {
+                **customer,
+                'retention_score': result.retention_priority_score,
+                'retention_decision': result.decision,
+                'should_engage': result.should_engage_ai
+            }
+    elif mode == 'scored_record':
+        def build(customer):
+            result = score(customer, score_retention_priority)
+            row = ScoredCustomer.from_dict(customer)
+            row.retention_score = result.retention_priority_score
+            row.retention_decision = result.decision
+            row.should_engage = result.should_engage_ai
+            return row
+    elif mode == 'score_dict':
+        def build(customer):
+            return score(customer, calculate_retention_priority_score)
+    else:
+        def build(customer):
+            return score(customer, score_retention_priority)
+    return build
+
+
+def measure_mode(mode: str, rows: int) -> Dict:
+    """Child-process entry point: build `rows` results in one representation"""
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+    import tracemalloc
+    from benchmarks.run_benchmarks import peak_rss_mb
+    from benchmarks.workloads import iter_cohort
+
+    build = _builder(mode)
+    kept = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    # Inputs are generated on the fly, so what stays allocated is the kept
+    # results plus the field values they reference
+    for customer in iter_cohort(rows):
+        kept.append(build(customer))
+    elapsed = time.perf_counter() - started
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = snapshot.statistics('filename')
+    traced_bytes = sum(stat.size for stat in stats)
+    blocks = sum(stat.count for stat in stats)
+    return {
+        'rows': rows,
+        'bytes_per_customer': round(traced_bytes / rows, 1),
+        'blocks_per_customer': round(blocks / rows, 2),
+        'total_mb': round(traced_bytes / 1024 / 1024, 1),
+        'build_seconds': round(elapsed, 2),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare dict and slotted-record footprints for scoring results')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--only', nargs='+', choices=MODES)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for mode in args.only or MODES:
+        with ctx.Pool(processes=1) as pool:
+            results[mode] = pool.apply(measure_mode, (mode, args.rows))
+
+    print(f"{'representation':<16}{'bytes/cust':>12}{'blocks/cust':>13}{'total MB':>10}{'build s':>9}{'RSS MB':>9}")
+    print('-' * 69)
+    for mode, r in results.items():
+        print(f"{mode:<16}{r['bytes_per_customer']:>12.1f}{r['blocks_per_customer']:>13.2f}"
+              f"{r['total_mb']:>10.1f}{r['build_seconds']:>9.2f}{r['peak_rss_mb']:>9.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
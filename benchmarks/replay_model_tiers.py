@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Replay recorded customer replies through the intent extractor on each model tier
+
+Usage (from the repo root):
+    python -m benchmarks.replay_model_tiers              # live Claude calls (needs ANTHROPIC_API_KEY)
+    python -m benchmarks.replay_model_tiers --stub       # offline, simulated per-tier latency
+    python -m benchmarks.replay_model_tiers --json out.json
+
+For every tier in data/model_routing.json, plus the routed mode (fast tier
+with escalation), reports p50/p95 latency per reply, mean cost per reply,
+intent accuracy against the recorded label, the escalation rate, and the
+share of prompt tokens served from the prompt cache.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDED_REPLIES_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'recorded_replies.jsonl')
+
+ROUTED = 'routed'
+
+# Simulated latency per tier for --stub runs (seconds)
+STUB_TIER_LATENCY_S = {
+    'fast': 0.15,
+    'standard': 0.6
+}
+
+
+def load_recorded_replies(path: str = RECORDED_REPLIES_PATH) -> List[dict]:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(replies: List[dict], mode: str) -> Dict:
+    """Run every recorded reply through extract_intent in one mode"""
+    from agents.extractor import extract_intent
+    from benchmarks.workloads import percentile
+    from utils.llm_costs import usage_scope
+
+    latencies, costs = [], []
+    correct = escalated = 0
+    prompt_tokens = cached_tokens = 0
+
+    for reply in replies:
+        with usage_scope() as usage:
+            started = time.perf_counter()
+            result = extract_intent(
+                reply['reply'],
+                conversation_context=reply.get('context', ''),
+                last_assistant_message=reply.get('last_assistant_message', ''),
+                tier=None if mode == ROUTED else mode
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+        costs.append(usage.cost_usd)
+        for call in usage.calls:
+            cached_tokens += call['cache_read_input_tokens']
+            prompt_tokens += call['input_tokens'] + call['cache_creation_input_tokens'] + call['cache_read_input_tokens']
+        if len(usage.calls) > 1:
+            escalated += 1
+        if result['intent'] == reply['expected_intent']:
+            correct += 1
+
+    count = len(replies)
+    return {
+        'replies': count,
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'mean_cost_usd': round(sum(costs) / count, 6),
+        'accuracy': round(correct / count, 3),
+        'escalation_rate': round(escalated / count, 3),
+        'cached_prompt_share': round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0
+    }
+
+
+def print_report(results: Dict[str, Dict]):
+    header = f"{'mode':<10} {'p50 ms':>9} {'p95 ms':>9} {'$/reply':>10} {'accuracy':>9} {'escalated':>10} {'cached':>7}"
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        print(
+            f"{mode:<10} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['mean_cost_usd']:>10.6f} "
+            f"{r['accuracy']:>9.1%} {r['escalation_rate']:>10.1%} {r['cached_prompt_share']:>7.1%}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compare model tiers on recorded customer replies')
+    parser.add_argument('--stub', action='store_true', help='Use the offline Claude stub instead of the API')
+    parser.add_argument('--replies', default=RECORDED_REPLIES_PATH, help='JSONL file of recorded replies')
+    parser.add_argument('--json', dest='json_path', help='Write machine-readable results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from utils.config import load_model_routing
+    from agents.model_router import model_for_tier
+
+    tiers = list(load_model_routing()['tiers'])
+
+    if args.stub:
+        from benchmarks.stubs import install_llm_stub
+        install_llm_stub({model_for_tier(t): STUB_TIER_LATENCY_S.get(t, 0.0) for t in tiers})
+    elif not os.getenv('ANTHROPIC_API_KEY'):
+        print('ANTHROPIC_API_KEY is not set; use --stub for an offline run')
+        return 1
+
+    replies = load_recorded_replies(args.replies)
+    results = {mode: replay(replies, mode) for mode in tiers + [ROUTED]}
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite for the dunning pipeline
+
+Usage (from the repo root):
+    python -m benchmarks.run_benchmarks                      # run all, compare to baseline
+    python -m benchmarks.run_benchmarks --only router_node   # run a subset
+    python -m benchmarks.run_benchmarks --json out.json      # write machine-readable results
+    python -m benchmarks.run_benchmarks --update-baseline    # store results as the new baseline
+
+Every benchmark runs in a fresh process (so peak RSS is per benchmark) inside a
+scratch copy of data/, because tool_executor_node writes to data/mock_db.json.
+The Claude client is replaced by benchmarks.stubs.StubAnthropic; the mock
+Stripe/email latency is disabled.
+
+Exits with status 1 if any benchmark regressed against the stored baseline.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from datetime import datetime
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+# Allowed slowdown before a benchmark counts as a regression
+DEFAULT_LATENCY_TOLERANCE = 0.25  # +25% p50 latency
+DEFAULT_RSS_TOLERANCE = 0.20  # +20% peak RSS
+# Ignore RSS growth smaller than this (interpreter/import noise on a ~20 MB process)
+RSS_SLACK_MB = 5.0
+
+
+# ---------------------------------------------------------------------------
+# Benchmark definitions
+# Each setup function returns (callable, items_per_op). The callable is timed.
+# ---------------------------------------------------------------------------
+
+def setup_router_node():
+    from agents.router import router_node
+    from benchmarks.workloads import make_state
+
+    state = make_state('user_123')
+    return (lambda: router_node(state)), 1
+
+
+def setup_retention_score():
+    from agents.retention_scorer import calculate_retention_priority_score
+    from benchmarks.workloads import make_cohort
+
+    cohort = make_cohort(1000)
+
+    def run():
+        for c in cohort:
+            calculate_retention_priority_score(
+                medical_urgency_score=c['medical_urgency_score'],
+                payment_risk_score=c['payment_risk_score'],
+                medication_adherence_score=c['medication_adherence_score'],
+                ltv=c['ltv'],
+                tenure_months=c['tenure_months']
+            )
+    return run, len(cohort)
+
+
+def setup_batch_score_customers():
+    from agents.retention_scorer import batch_score_customers
+    from benchmarks.workloads import make_cohort
+
+    cohort = make_cohort(10000)
+    return (lambda: batch_score_customers(cohort)), len(cohort)
+
+
+def setup_streaming_ingestion():
+    from agents.ingestion import ingest_export
+    from benchmarks.workloads import write_failure_export
+
+    # 100k-row CSV export in the scratch dir; peak RSS should not grow with its size
+    write_failure_export('failures.csv', 100000)
+    return (lambda: ingest_export('failures.csv', ai_agent_capacity=50)), 100000
+
+
+def setup_offer_policy_batch():
+    from agents.offer_policy import select_offers_for_cohort
+    from benchmarks.workloads import make_cohort
+
+    cohort = make_cohort(100000)
+    return (lambda: select_offers_for_cohort(cohort)), len(cohort)
+
+
+def setup_customer_table_page():
+    from utils.customer_store import CustomerStore
+    from benchmarks.workloads import make_users
+
+    store = CustomerStore()
+    store.load_users(make_users(200000))
+    filters = [
+        {},
+        {'risk_tiers': ['high'], 'sort_by': 'retention_score'},
+        {'risk_tiers': ['high', 'medium'], 'statuses': ['premium'], 'page': 40},
+    ]
+    counter = {'i': 0}
+
+    def run():
+        counter['i'] += 1
+        return store.query(**filters[counter['i'] % len(filters)])
+    return run, 1
+
+
+def setup_extractor_node():
+    from benchmarks.stubs import install_llm_stub
+    from benchmarks.workloads import make_reply_state, SAMPLE_REPLIES
+
+    install_llm_stub()
+    from agents.extractor import extractor_node
+
+    states = [make_reply_state(reply) for reply in SAMPLE_REPLIES]
+    counter = {'i': 0}
+
+    def run():
+        counter['i'] += 1
+        return extractor_node(states[counter['i'] % len(states)])
+    return run, 1
+
+
+def setup_negotiator_node():
+    from benchmarks.stubs import install_llm_stub
+    from benchmarks.workloads import make_reply_state
+
+    install_llm_stub()
+    from agents.negotiator import negotiator_node
+
+    state = make_reply_state("I can't afford it", intent='financial_hardship')
+    return (lambda: negotiator_node(state)), 1
+
+
+def setup_tool_executor_node():
+    from benchmarks.stubs import disable_simulated_latency
+    from benchmarks.workloads import make_reply_state
+
+    disable_simulated_latency()
+    from agents.tools import tool_executor_node
+
+    state = make_reply_state("ok do the $4.99 keeper one", intent='accept_bridge')
+    return (lambda: tool_executor_node(state)), 1
+
+
+def setup_graph_initial_turn():
+    from benchmarks.stubs import install_llm_stub
+    from benchmarks.workloads import make_state
+
+    install_llm_stub()
+    from graph import create_petdunning_graph
+
+    graph = create_petdunning_graph()
+    state = make_state('user_789')
+    return (lambda: graph.invoke(dict(state))), 1
+
+
+def setup_graph_response_turn():
+    from benchmarks.stubs import install_llm_stub, disable_simulated_latency
+    from benchmarks.workloads import make_reply_state
+
+    install_llm_stub()
+    disable_simulated_latency()
+    from graph import create_response_graph
+
+    graph = create_response_graph()
+    state = make_reply_state("ok do the $4.99 keeper one")
+    return (lambda: graph.invoke(dict(state))), 1
+
+
+# name → (setup, iterations, warmup)
+BENCHMARKS: Dict[str, tuple] = {
+    'router_node': (setup_router_node, 2000, 100),
+    'retention_score': (setup_retention_score, 200, 10),
+    'batch_score_customers': (setup_batch_score_customers, 20, 2),
+    'offer_policy_batch': (setup_offer_policy_batch, 20, 2),
+    'streaming_ingestion': (setup_streaming_ingestion, 5, 1),
+    'customer_table_page': (setup_customer_table_page, 300, 20),
+    'extractor_node': (setup_extractor_node, 2000, 100),
+    'negotiator_node': (setup_negotiator_node, 2000, 100),
+    'tool_executor_node': (setup_tool_executor_node, 300, 20),
+    'graph_initial_turn': (setup_graph_initial_turn, 300, 20),
+    'graph_response_turn': (setup_graph_response_turn, 300, 20),
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return round(peak / divisor, 1)
+
+
+def measure(fn: Callable, iterations: int, warmup: int, items_per_op: int = 1) -> Dict:
+    """Time `fn` and summarise the latency distribution"""
+    from benchmarks.workloads import percentile
+
+    for _ in range(warmup):
+        fn()
+
+    latencies_ms = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn()
+        latencies_ms.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - started
+
+    latencies_ms.sort()
+    return {
+        'iterations': iterations,
+        'items_per_op': items_per_op,
+        'ops_per_sec': round(iterations / elapsed, 2) if elapsed > 0 else 0.0,
+        'items_per_sec': round(iterations * items_per_op / elapsed, 2) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 4),
+        'p50_ms': round(percentile(latencies_ms, 50), 4),
+        'p95_ms': round(percentile(latencies_ms, 95), 4),
+        'p99_ms': round(percentile(latencies_ms, 99), 4),
+        'max_ms': round(latencies_ms[-1], 4),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _run_in_scratch_dir(name: str, iterations: int, warmup: int) -> Dict:
+    """Child-process entry point: run one benchmark in a scratch copy of data/"""
+    sys.path.insert(0, REPO_ROOT)
+    scratch = tempfile.mkdtemp(prefix='careloop-bench-')
+    try:
+        shutil.copytree(os.path.join(REPO_ROOT, 'data'), os.path.join(scratch, 'data'))
+        os.chdir(scratch)
+
+        setup, _, _ = BENCHMARKS[name]
+        fn, items_per_op = setup()
+        return measure(fn, iterations, warmup, items_per_op)
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run_benchmarks(names: List[str], scale: float = 1.0) -> Dict[str, Dict]:
+    """Run each benchmark in its own spawned process"""
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for name in names:
+        _, iterations, warmup = BENCHMARKS[name]
+        iterations = max(1, int(iterations * scale))
+        warmup = max(0, int(warmup * scale))
+        with ctx.Pool(processes=1) as pool:
+            results[name] = pool.apply(_run_in_scratch_dir, (name, iterations, warmup))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def compare_to_baseline(results: Dict, baseline: Dict,
+                        latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE,
+                        rss_tolerance: float = DEFAULT_RSS_TOLERANCE) -> List[Dict]:
+    """
+    Return a list of regressions. A benchmark regresses when its p50 latency or
+    peak RSS exceeds the baseline by more than the tolerance, or when it has a
+    baseline result but failed to run. Benchmarks without a usable baseline
+    are skipped.
+    """
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get('benchmarks', {}).get(name)
+        if not reference or 'error' in reference:
+            continue
+        if 'error' in current:
+            regressions.append({'benchmark': name, 'metric': 'error', 'error': current['error']})
+            continue
+
+        checks = [
+            ('p50_ms', latency_tolerance),
+            ('peak_rss_mb', rss_tolerance),
+        ]
+        for metric, tolerance in checks:
+            before = reference.get(metric)
+            after = current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            if metric == 'peak_rss_mb' and after - before < RSS_SLACK_MB:
+                continue
+            if change > tolerance:
+                regressions.append({
+                    'benchmark': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change_pct': round(change * 100, 1)
+                })
+    return regressions
+
+
+def print_report(results: Dict, regressions: List[Dict]):
+    """Human-readable results table"""
+    header = f"{'benchmark':<24}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        if 'error' in r:
+            print(f"{name:<24}  ERROR: {r['error']}")
+            continue
+        print(
+            f"{name:<24}{r['ops_per_sec']:>12,.1f}{r['p50_ms']:>10.3f}"
+            f"{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['peak_rss_mb']:>9.1f}"
+        )
+
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for reg in regressions:
+            if reg['metric'] == 'error':
+                print(f"  {reg['benchmark']}: failed to run ({reg['error']})")
+                continue
+            print(
+                f"  {reg['benchmark']}.{reg['metric']}: "
+                f"{reg['baseline']} → {reg['current']} (+{reg['change_pct']}%)"
+            )
+    else:
+        print("\n✅ No regressions against baseline")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='CareLoop dunning pipeline benchmarks')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='Run a subset of benchmarks')
+    parser.add_argument('--json', dest='json_path', help='Write machine-readable results to this file')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply iteration counts (e.g. 0.1 for a smoke run)')
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE)
+    parser.add_argument('--rss-tolerance', type=float, default=DEFAULT_RSS_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    names = args.only or list(BENCHMARKS)
+    results = run_benchmarks(names, scale=args.scale)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': results
+    }
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    regressions = compare_to_baseline(
+        results, baseline,
+        latency_tolerance=args.latency_tolerance,
+        rss_tolerance=args.rss_tolerance
+    )
+    report['regressions'] = regressions
+
+    print_report(results, regressions)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        # Merge into the existing baseline so a partial run (--only, or a
+        # benchmark that errored) does not drop the other stored entries
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r') as f:
+                stored = json.load(f)
+        merged = dict(stored.get('benchmarks', {}))
+        merged.update({k: v for k, v in results.items() if 'error' not in v})
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'generated_at': report['generated_at'],
+                'python': report['python'],
+                'platform': report['platform'],
+                'benchmarks': merged
+            }, f, indent=2)
+        print(f"\n📌 Baseline updated: {args.baseline}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
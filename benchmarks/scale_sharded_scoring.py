@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Scaling of sharded cohort scoring (agents/sharded_scoring.py) with worker count
+
+Usage (from the repo root):
+    python -m benchmarks.scale_sharded_scoring                        # 1M customers, 1/2/4/8/16 workers
+    python -m benchmarks.scale_sharded_scoring --rows 200000 --workers 1 2 4
+    python -m benchmarks.scale_sharded_scoring --json out.json
+
+Writes a synthetic record store once, then times a full re-score at each
+worker count (best of --repeat runs, pool start-up included). Speedup and
+efficiency are relative to the 1-worker run, which is always included; worker
+counts above the CPU count can't scale further and are reported as-is.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_WORKERS = (1, 2, 4, 8, 16)
+
+
+def build_store(path: str, rows: int):
+    from benchmarks.workloads import iter_cohort
+    from utils.record_store import write_record_store
+
+    write_record_store({customer['user_id']: customer for customer in iter_cohort(rows)}, path)
+
+
+def run_scaling(store_path: str, worker_counts: List[int], capacity: int, repeat: int) -> Dict[int, dict]:
+    from agents.sharded_scoring import sharded_daily_outreach_list
+
+    results = {}
+    baseline_s = None
+    # Speedups are measured against a real 1-worker run, never extrapolated
+    for workers in sorted(set(worker_counts) | {1}):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outcome = sharded_daily_outreach_list(store_path, capacity, workers=workers)
+            timings.append(time.perf_counter() - started)
+        best_s = min(timings)
+        if baseline_s is None:
+            baseline_s = best_s
+        speedup = baseline_s / best_s
+        results[workers] = {
+            'seconds': round(best_s, 3),
+            'customers_per_sec': round(outcome['total_failures'] / best_s, 1),
+            'speedup': round(speedup, 2),
+            'efficiency': round(speedup / workers, 3)
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Measure sharded scoring speedup across worker counts')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=list(DEFAULT_WORKERS))
+    parser.add_argument('--capacity', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    scratch = tempfile.mkdtemp(prefix='careloop-shards-')
+    try:
+        store_path = os.path.join(scratch, 'customers.crs')
+        build_store(store_path, args.rows)
+        results = run_scaling(store_path, sorted(args.workers), args.capacity, args.repeat)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f"{args.rows} customers, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'seconds':>10}{'cust/s':>12}{'speedup':>9}{'efficiency':>12}")
+    print('-' * 51)
+    for workers, r in results.items():
+        print(f"{workers:>8}{r['seconds']:>10.3f}{r['customers_per_sec']:>12.0f}{r['speedup']:>9.2f}{r['efficiency']:>12.3f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'rows': args.rows, 'cpus': os.cpu_count(), 'workers': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
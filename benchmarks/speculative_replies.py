@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Speculative pre-generation of negotiator follow-ups (agents/speculation.py)
+
+Usage (from the repo root):
+    python -m benchmarks.speculative_replies                        # 100 conversations
+    python -m benchmarks.speculative_replies --conversations 400 --think-s 2 --top-k 1 2 3 --json out.json
+
+Offline: the Claude client is the benchmark stub with a simulated generation
+latency. Each conversation gets its first outreach, then replies with intents
+drawn from REPLY_TRANSITIONS after a random think time, until the negotiator
+sends a closing message. Customers' intents are passed to the negotiator
+directly (no extractor), so the reported latency is the negotiator's response
+time from the moment the reply's intent is known. Runs without speculation and
+with each --top-k, and reports response latency, speculative hit rate, wasted
+tokens and cost per conversation.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Simulated synchronous latency of a generation call (seconds)
+STUB_GENERATION_LATENCY_S = 0.6
+
+# How the simulated customers actually reply to each strategy (deliberately
+# not the speculator's prior, so the transition statistics have to learn it)
+REPLY_TRANSITIONS = {
+    'initial_outreach_with_bridge_offer': {
+        'financial_hardship': 0.35, 'ask_for_time': 0.2, 'ask_for_more_info': 0.15,
+        'accept_bridge': 0.15, 'decline_bridge': 0.15
+    },
+    'explain_bridge_plan_details': {'accept_bridge': 0.65, 'decline_bridge': 0.25, 'ask_for_time': 0.1},
+    'offer_payment_extension': {'accept_extension': 0.5, 'ambiguous_acceptance': 0.3, 'accept_bridge': 0.2},
+    'request_clarification': {'accept_bridge': 0.5, 'accept_extension': 0.5},
+}
+MAX_REPLIES = 4
+
+
+def run_conversation(user_id: str, campaign_id: str, think_s: float, rng: random.Random) -> List[float]:
+    """One conversation; returns the negotiator latency (ms) of each reply turn"""
+    from agents.negotiator import negotiator_node
+    from benchmarks.workloads import make_routed_state
+
+    state = make_routed_state()
+    state.update(user_id=user_id, campaign_id=campaign_id)
+    state.update(negotiator_node(state))
+
+    latencies = []
+    for _ in range(MAX_REPLIES):
+        replies = REPLY_TRANSITIONS.get(state['negotiation_strategy'])
+        if not replies:
+            break  # closing message sent
+        time.sleep(rng.uniform(0.5, 1.5) * think_s)
+        intent = rng.choices(list(replies), weights=list(replies.values()))[0]
+        state = {
+            **state,
+            'messages': state['messages'] + [{'role': 'user', 'content': intent, 'timestamp': ''}],
+            'conversation_stage': 'negotiating',
+            'current_intent': intent
+        }
+        started = time.perf_counter()
+        state.update(negotiator_node(state))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run_mode(top_k: Optional[int], conversations: int, concurrency: int, think_s: float) -> Dict:
+    """All conversations with speculation off (top_k=None) or drafting the top_k strategies"""
+    from agents import negotiator
+    from agents.speculation import Speculator
+    from benchmarks.workloads import percentile
+    from utils.llm_costs import ledger
+
+    speculator = Speculator(negotiator.plan_reply, top_k=top_k, max_workers=2 * concurrency) if top_k else None
+    negotiator._speculator, negotiator._speculator_loaded = speculator, True
+    campaign_id = f"bench-speculation-{top_k or 'off'}"
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_conversation, f'spec_{i:05d}', campaign_id, think_s, random.Random(i))
+            for i in range(conversations)
+        ]
+        latencies = [latency for future in futures for latency in future.result()]
+
+    stats = {}
+    if speculator is not None:
+        speculator.close()  # wait for the last drafts so their tokens are counted
+        stats = speculator.stats()
+    negotiator._speculator, negotiator._speculator_loaded = None, False
+
+    spend = ledger.summary(campaign_id)
+    return {
+        'reply_turns': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'hit_rate': stats.get('hit_rate'),
+        'drafts': stats.get('drafts', 0),
+        'wasted_tokens': stats.get('wasted_tokens', 0),
+        'wasted_token_fraction': stats.get('wasted_token_fraction', 0.0),
+        'cost_per_conversation_usd': round(spend['cost_usd'] / conversations, 6)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Measure speculative pre-generation of negotiator follow-ups')
+    parser.add_argument('--conversations', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=25, help='Conversations in flight at once')
+    parser.add_argument('--think-s', type=float, default=1.0, help='Mean customer think time between messages')
+    parser.add_argument('--top-k', type=int, nargs='+', default=[1, 2], help='Strategies drafted after each message')
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from benchmarks.stubs import install_llm_stub
+
+    install_llm_stub(STUB_GENERATION_LATENCY_S)
+
+    results = {'off': run_mode(None, args.conversations, args.concurrency, args.think_s)}
+    for top_k in args.top_k:
+        results[f'top_{top_k}'] = run_mode(top_k, args.conversations, args.concurrency, args.think_s)
+
+    print(f"{args.conversations} conversations, {args.concurrency} in flight, "
+          f"think time ~{args.think_s:g}s, generation {STUB_GENERATION_LATENCY_S:g}s")
+    header = (f"{'mode':<8}{'turns':>7}{'p50 ms':>9}{'p95 ms':>9}{'hit rate':>10}"
+              f"{'drafts':>8}{'wasted tok':>12}{'wasted %':>10}{'$/conv':>11}")
+    print(header)
+    print('-' * len(header))
+    for mode, r in results.items():
+        hit_rate = f"{r['hit_rate']:.1%}" if r['hit_rate'] is not None else '-'
+        print(f"{mode:<8}{r['reply_turns']:>7}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{hit_rate:>10}"
+              f"{r['drafts']:>8}{r['wasted_tokens']:>12}{r['wasted_token_fraction']:>10.1%}"
+              f"{r['cost_per_conversation_usd']:>11.6f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
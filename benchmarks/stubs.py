@@ -0,0 +1,234 @@
+"""
+Offline stand-ins for external services used by the benchmarks
+Replaces the Claude client and the simulated Stripe/email latency so that
+benchmark numbers measure our own code, not the network
+"""
+import re
+import json
+import time
+from types import SimpleNamespace
+
+
+# Keyword → intent rules used by the stub classifier (first match wins)
+STUB_INTENT_RULES = [
+    ('keeper', 'accept_bridge'),
+    ('$4.99', 'accept_bridge'),
+    ('extension', 'accept_extension'),
+    ('cancel', 'cancel_request'),
+    ('card', 'update_payment'),
+    ('afford', 'financial_hardship'),
+    ('friday', 'ask_for_time'),
+    ('what', 'ask_for_more_info'),
+    ('no thanks', 'decline_bridge'),
+    ('yes', 'ambiguous_acceptance'),
+]
+
+
+# Shortest prefix (tokens) the API will cache, per model family. Shorter
+# prefixes marked with cache_control are processed as ordinary input.
+MIN_CACHEABLE_TOKENS = {
+    'claude-haiku-4-5': 4096,
+    'claude-sonnet-4-5': 1024,
+}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+
+def min_cacheable_tokens(model: str) -> int:
+    for family, tokens in MIN_CACHEABLE_TOKENS.items():
+        if model.startswith(family):
+            return tokens
+    return DEFAULT_MIN_CACHEABLE_TOKENS
+
+
+def _stub_intent(prompt: str) -> dict:
+    """Pick a plausible intent for the user message embedded in an extractor prompt"""
+    match = re.search(r'User\'s message: "(.*?)"', prompt, re.DOTALL)
+    user_message = match.group(1).lower() if match else ''
+
+    intent = 'financial_hardship'
+    for keyword, candidate in STUB_INTENT_RULES:
+        if keyword in user_message:
+            intent = candidate
+            break
+
+    return {
+        'intent': intent,
+        'confidence': 0.9,
+        'reasoning': f'Stub classification for "{user_message[:40]}"',
+        'entities': {}
+    }
+
+
+def _stub_batch_intents(prompt: str) -> list:
+    """Stub answers for a batched extractor prompt ("Reply 1\n...", "Reply 2\n...")"""
+    chunks = re.split(r'^Reply (\d+)\n', prompt, flags=re.MULTILINE)
+    # re.split with a group: ['', '1', body1, '2', body2, ...]
+    return [
+        {'id': int(number), **_stub_intent(body)}
+        for number, body in zip(chunks[1::2], chunks[2::2])
+    ]
+
+
+def _text(content) -> str:
+    """Text of a message/system value given as a string or a list of content blocks"""
+    if isinstance(content, list):
+        return ' '.join(block.get('text', '') for block in content)
+    return content
+
+
+class StubMessages:
+    """Mimics `client.messages` from the Anthropic SDK"""
+
+    def __init__(self, latency_s=0.0, output_token_latency_s=0.0):
+        # Seconds of simulated latency, or a {model: seconds} dict
+        self.latency_s = latency_s
+        # Extra seconds per generated token (longer answers take longer)
+        self.output_token_latency_s = output_token_latency_s
+        self.calls = 0
+        # (model, system text) prefixes already written to the simulated prompt cache
+        self._cached_prefixes = set()
+
+    def create(self, model: str, max_tokens: int, messages: list, system=None, **kwargs):
+        self.calls += 1
+        response = self._respond(model, messages, system, kwargs.get('tool_choice'))
+        latency = self.latency_s.get(model, 0.0) if isinstance(self.latency_s, dict) else self.latency_s
+        latency += self.output_token_latency_s * response.usage.output_tokens
+        if latency:
+            time.sleep(latency)
+        return response
+
+    def _respond(self, model: str, messages: list, system=None, tool_choice=None):
+        prompt = _text(messages[-1]['content'])
+        system_text = _text(system or '')
+        cache_write = cache_read = 0
+        prefix_tokens = len(system_text) // 4
+        if (isinstance(system, list) and any('cache_control' in block for block in system)
+                and prefix_tokens >= min_cacheable_tokens(model)):
+            if (model, system_text) in self._cached_prefixes:
+                cache_read = prefix_tokens
+            else:
+                self._cached_prefixes.add((model, system_text))
+                cache_write = prefix_tokens
+            uncached_system_tokens = 0
+        else:
+            uncached_system_tokens = prefix_tokens
+
+        answer = None
+        if 'BATCH MODE' in system_text:
+            answer = {'replies': _stub_batch_intents(prompt)}
+            text = json.dumps(answer['replies'])
+        elif 'intent classification' in system_text or 'intent classification' in prompt:
+            answer = _stub_intent(prompt)
+            text = json.dumps(answer)
+        else:
+            text = (
+                "We noticed your latest payment didn't go through. "
+                "Our $4.99/month Digital Keeper Plan keeps records and 24/7 chat active. "
+                "Would you like to learn more?"
+            )
+
+        if answer is not None and tool_choice and tool_choice.get('type') == 'tool':
+            # Forced tool call: the answer comes back as the tool's parsed input
+            block = SimpleNamespace(type='tool_use', id=f'toolu_stub_{self.calls}',
+                                    name=tool_choice['name'], input=answer)
+        else:
+            block = SimpleNamespace(type='text', text=text)
+
+        return SimpleNamespace(
+            id=f'msg_stub_{self.calls}',
+            model=model,
+            stop_reason='tool_use' if block.type == 'tool_use' else 'end_turn',
+            content=[block],
+            usage=SimpleNamespace(
+                input_tokens=max(1, len(prompt) // 4) + uncached_system_tokens,
+                output_tokens=max(1, len(text) // 4),
+                cache_creation_input_tokens=cache_write,
+                cache_read_input_tokens=cache_read
+            )
+        )
+
+
+class StubBatches:
+    """
+    Mimics `client.messages.batches` (the Message Batches API): a batch ends
+    `turnaround_s` seconds after it is created, and its results are the
+    answers StubMessages would have given. Custom ids in `fail_ids` come
+    back as errored.
+    """
+
+    def __init__(self, messages: StubMessages, turnaround_s=0.0, fail_ids=()):
+        self._messages = messages
+        self.turnaround_s = turnaround_s
+        self.fail_ids = set(fail_ids)
+        self.created = 0
+        self.requests = 0
+        self._batches = {}
+
+    def create(self, requests: list):
+        self.created += 1
+        self.requests += len(requests)
+        batch_id = f'msgbatch_stub_{self.created}'
+        self._batches[batch_id] = (time.monotonic(), list(requests))
+        return self.retrieve(batch_id)
+
+    def retrieve(self, batch_id: str):
+        created_at, requests = self._batches[batch_id]
+        ended = time.monotonic() - created_at >= self.turnaround_s
+        return SimpleNamespace(
+            id=batch_id,
+            type='message_batch',
+            processing_status='ended' if ended else 'in_progress',
+            request_counts=SimpleNamespace(
+                processing=0 if ended else len(requests),
+                succeeded=len(requests) if ended else 0,
+                errored=0,
+                canceled=0,
+                expired=0
+            )
+        )
+
+    def results(self, batch_id: str):
+        if self.retrieve(batch_id).processing_status != 'ended':
+            raise RuntimeError(f'Batch {batch_id} has not ended')
+        for request in self._batches[batch_id][1]:
+            custom_id = request['custom_id']
+            if custom_id in self.fail_ids:
+                result = SimpleNamespace(type='errored', error=SimpleNamespace(type='api_error'))
+            else:
+                params = dict(request['params'])
+                result = SimpleNamespace(
+                    type='succeeded',
+                    message=self._messages._respond(params.pop('model'), params['messages'], params.get('system'),
+                                                    params.get('tool_choice'))
+                )
+            yield SimpleNamespace(custom_id=custom_id, result=result)
+
+
+class StubAnthropic:
+    """Drop-in replacement for `anthropic.Anthropic` with no network access"""
+
+    def __init__(self, latency_s=0.0, output_token_latency_s=0.0, batch_turnaround_s=0.0):
+        self.messages = StubMessages(latency_s, output_token_latency_s)
+        self.messages.batches = StubBatches(self.messages, batch_turnaround_s)
+
+
+def install_llm_stub(latency_s=0.0, output_token_latency_s=0.0, batch_turnaround_s=0.0) -> StubAnthropic:
+    """
+    Point the shared Claude client (agents.llm) at a stub.
+    Returns the stub so callers can inspect call counts.
+    """
+    from agents import llm
+
+    stub = StubAnthropic(latency_s, output_token_latency_s, batch_turnaround_s)
+    llm.client = stub
+    return stub
+
+
+def disable_simulated_latency():
+    """
+    Remove the time.sleep() calls the mock Stripe/email tools use to fake
+    network latency, so tool_executor benchmarks measure only our code.
+    """
+    from agents import tools
+
+    tools.time = SimpleNamespace(sleep=lambda seconds: None, time=time.time)
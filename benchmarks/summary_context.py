@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Prompt size per turn over a long thread with the rolling conversation summary
+(agents/conversation_summary.py)
+
+Usage (from the repo root):
+    python -m benchmarks.summary_context                   # 40 customer replies
+    python -m benchmarks.summary_context --replies 100 --json out.json
+
+Offline (Claude stub). Runs one conversation for --replies turns (extractor →
+negotiator, cycling the sample replies) and records the uncached input tokens
+of each turn's Claude calls: with the rolling summary, with no history at all
+(the summary rendered empty), and the estimate for appending the full
+transcript to both prompts instead.
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+REPORT_TURNS = (1, 5, 10, 20, 40, 80)
+
+
+def run_thread(replies: int, with_summary: bool) -> List[Dict]:
+    """Per-turn input tokens and transcript size for one long conversation"""
+    from agents import extractor, negotiator
+    from benchmarks.workloads import SAMPLE_REPLIES, make_routed_state
+
+    render = extractor.render_summary
+    if not with_summary:
+        extractor.render_summary = negotiator.render_summary = lambda summary: ''
+    try:
+        state = make_routed_state()
+        state.update(negotiator.negotiator_node(state))
+        turns = []
+        for turn in range(replies):
+            reply = SAMPLE_REPLIES[turn % len(SAMPLE_REPLIES)]
+            state['messages'] = state['messages'] + [{'role': 'user', 'content': reply, 'timestamp': ''}]
+            input_tokens = 0
+            for node in (extractor.extractor_node, negotiator.negotiator_node):
+                update = node(state)
+                state.update(update)
+                input_tokens += sum(call['input_tokens'] for call in update['tool_calls'][-1]['llm_calls'])
+            transcript_chars = sum(len(message['content']) for message in state['messages'][:-1])
+            turns.append({'turn': turn + 1, 'input_tokens': input_tokens, 'transcript_tokens': transcript_chars // 4})
+    finally:
+        extractor.render_summary = negotiator.render_summary = render
+    return turns
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Measure per-turn prompt size with the rolling conversation summary')
+    parser.add_argument('--replies', type=int, default=40)
+    parser.add_argument('--json', dest='json_path', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+
+    from benchmarks.stubs import install_llm_stub, disable_simulated_latency
+
+    install_llm_stub()
+    disable_simulated_latency()
+
+    summary_turns = run_thread(args.replies, with_summary=True)
+    bare_turns = run_thread(args.replies, with_summary=False)
+
+    rows = []
+    for summary, bare in zip(summary_turns, bare_turns):
+        rows.append({
+            'turn': summary['turn'],
+            'no_history': bare['input_tokens'],
+            'rolling_summary': summary['input_tokens'],
+            # Both agents would carry the whole transcript
+            'full_history_estimate': bare['input_tokens'] + 2 * bare['transcript_tokens']
+        })
+
+    print(f"Uncached input tokens per turn (extractor + negotiator), {args.replies} replies")
+    header = f"{'turn':>6}{'no history':>12}{'summary':>10}{'full history':>14}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        if row['turn'] in REPORT_TURNS or row['turn'] == len(rows):
+            print(f"{row['turn']:>6}{row['no_history']:>12}{row['rolling_summary']:>10}"
+                  f"{row['full_history_estimate']:>14}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
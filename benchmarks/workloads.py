@@ -0,0 +1,139 @@
+"""
+Benchmark Workloads
+Builds realistic agent states and synthetic payment-failure cohorts
+"""
+import json
+import math
+import random
+from datetime import datetime
+from typing import List
+
+from state import build_initial_state
+
+
+def load_users() -> dict:
+    """Load demo customers from the mock database"""
+    with open('data/mock_db.json', 'r') as f:
+        return json.load(f)['users']
+
+
+def make_state(user_id: str = 'user_123') -> dict:
+    """Initial AgentState for a demo customer, as app.py builds it"""
+    users = load_users()
+    return build_initial_state(user_id, users[user_id])
+
+
+def make_routed_state(user_id: str = 'user_123') -> dict:
+    """AgentState after router_node has run (ready for the negotiator)"""
+    from agents.router import router_node
+
+    state = make_state(user_id)
+    state.update(router_node(state))
+    return state
+
+
+def make_reply_state(reply: str, user_id: str = 'user_123', intent: str = None) -> dict:
+    """
+    AgentState mid-conversation: one outreach message sent and a customer reply received.
+    Pass `intent` to pre-set current_intent (for negotiator / tool executor benchmarks).
+    """
+    state = make_routed_state(user_id)
+    state['messages'] = [
+        {
+            'role': 'assistant',
+            'content': (
+                "Would you prefer a 14-day payment extension or our $4.99/month "
+                "Digital Keeper Plan?"
+            ),
+            'timestamp': datetime.now().isoformat()
+        },
+        {'role': 'user', 'content': reply, 'timestamp': datetime.now().isoformat()}
+    ]
+    if intent:
+        state['current_intent'] = intent
+        state['conversation_stage'] = 'negotiating'
+    return state
+
+
+def make_cohort(size: int, seed: int = 7) -> list:
+    """
+    Synthetic payment-failure cohort in the shape get_daily_outreach_list expects
+    """
+    return list(iter_cohort(size, seed))
+
+
+def iter_cohort(size: int, seed: int = 7):
+    """make_cohort as a generator, for export files too large to build in memory"""
+    rng = random.Random(seed)
+    for i in range(size):
+        yield {
+            'user_id': f'user_{i:07d}',
+            'medical_urgency_score': rng.choice([50.0, 55.0, 77.0, 82.5, 90.0, 100.0]),
+            'payment_risk_score': round(rng.uniform(0, 100), 1),
+            'medication_adherence_score': rng.randint(30, 100),
+            'ltv': rng.choice([800, 2400, 3200, 5600, 8000, 12000]),
+            'tenure_months': rng.randint(1, 60)
+        }
+
+
+def write_failure_export(path: str, size: int, seed: int = 7):
+    """Billing failure export (CSV) with the make_cohort columns"""
+    import csv
+
+    with open(path, 'w', newline='') as f:
+        writer = None
+        for row in iter_cohort(size, seed):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+
+
+def make_users(size: int, seed: int = 7) -> dict:
+    """
+    Synthetic mock_db-shaped customers ({user_id: user_data}) for the
+    At-Risk Customers table
+    """
+    rng = random.Random(seed)
+    pets = [
+        ('Bella', 'Diabetes (Insulin Dependent)', 'high'),
+        ('Whiskers', 'Chronic Kidney Disease', 'high'),
+        ('Max', 'Heartworm Prevention', 'medium'),
+        ('Luna', 'Annual Wellness', 'low'),
+    ]
+    users = {}
+    for i in range(size):
+        pet_name, condition, tier = rng.choice(pets)
+        users[f'user_{i:07d}'] = {
+            'name': f'Customer {i}',
+            'pet_name': pet_name,
+            'pet_condition': condition,
+            'medical_risk_tier': tier,
+            'ltv': rng.choice([800, 2400, 3200, 5600, 8000, 12000]),
+            'tenure_months': rng.randint(1, 60),
+            'current_plan': rng.choice(['premium', 'premium', 'bridge', 'cancelled']),
+            'retention_priority_score': round(rng.uniform(0, 100), 1)
+        }
+    return users
+
+
+SAMPLE_REPLIES = [
+    "yes",
+    "ok do the $4.99 keeper one",
+    "I'd like the extension please",
+    "cancel my plan",
+    "I can't afford it right now",
+    "can I have till friday",
+    "what's included?",
+    "no thanks",
+    "I'll update my card tonight",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (any order); 0.0 when there are none"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
@@ -0,0 +1,283 @@
+"""
+Campaign Runner
+Starts AI outreach for a day's outreach list and sends the first messages.
+
+PRIORITY_OUTREACH customers get their first message in real time on the job
+runner. SECONDARY_OUTREACH customers don't need real-time latency, so by
+default their prompts are submitted through the Message Batches API (half the
+price, and no pressure on the synchronous rate limits). Their conversations
+wait in the conversation store until the batch ends; poll() applies the
+results and dispatch() sends every message that is ready. Customers whose
+first message was drafted the night before (agents/outreach_precompute.py)
+are ready right away.
+
+Usage (from the repo root):
+    python -m campaign failures.csv.gz --campaign-id nov-05 --capacity 50 --db campaign.sqlite
+    python -m campaign --poll --db campaign.sqlite        # collect ended batches, dispatch
+"""
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from state import build_initial_state
+from jobs import JobRunner, TURN_INITIAL, JOB_FAILED
+from agents import llm
+from agents.ingestion import ingest_export
+from agents.router import router_node
+from agents.negotiator import (
+    INITIAL_OUTREACH_MAX_TOKENS,
+    INITIAL_OUTREACH_STRATEGY,
+    INITIAL_OUTREACH_TASK,
+    generation_params,
+    initial_outreach_prompt,
+    message_update,
+    negotiator_node,
+    precomputed_outreach
+)
+from agents.tools import send_email
+from utils.conversation_store import (
+    ConversationStore,
+    STATUS_DISPATCHED,
+    STATUS_FAILED,
+    STATUS_GENERATING,
+    STATUS_READY
+)
+from utils.llm_costs import usage_scope, budget_mode, BUDGET_TEMPLATE
+from utils.metrics import load_mock_data
+from utils.telemetry import Counter, get_registry
+
+# Retention decisions whose first message may wait for a message batch
+DEFERRED_DECISIONS = ('SECONDARY_OUTREACH',)
+
+DEFAULT_POLL_INTERVAL_S = 30.0
+
+OUTREACH_GENERATED = get_registry().register(Counter(
+    'careloop_campaign_outreach_total',
+    'First outreach messages generated for campaigns',
+    ('mode',)  # realtime | precomputed | batch | batch_fallback
+))
+
+
+def outreach_subject(state: Dict) -> str:
+    return f"About {state['pet_name']}'s care plan"
+
+
+class CampaignRunner:
+    """
+    Runs a campaign against a conversation store.
+
+    - launch(): real-time turns for urgent customers, one message batch for
+      the deferred ones
+    - poll(): applies the results of every ended batch; requests the batch
+      couldn't serve (errored / expired) are generated in real time instead
+    - dispatch(): sends every ready message and marks it dispatched
+    """
+
+    def __init__(
+        self,
+        store: ConversationStore,
+        runner: Optional[JobRunner] = None,
+        users: Optional[Dict[str, Dict]] = None,
+        send: Callable[[str, str, str], Dict] = send_email,
+        defer_secondary: bool = True
+    ):
+        self.store = store
+        self._runner = runner
+        self.users = users if users is not None else load_mock_data()['users']
+        self.send = send
+        self.defer_secondary = defer_secondary
+
+    @property
+    def runner(self) -> JobRunner:
+        if self._runner is None:
+            self._runner = JobRunner()
+        return self._runner
+
+    def launch(self, campaign_id: str, outreach_list: List[Dict]) -> Dict:
+        """
+        Start outreach for `outreach_list` (the ai_outreach_list of a daily
+        outreach result). Returns counts and the submitted batch id, if any.
+        """
+        realtime, deferred, unknown = [], [], 0
+        for customer in outreach_list:
+            user_data = self.users.get(customer['user_id'])
+            if user_data is None:
+                unknown += 1
+                continue
+            state = build_initial_state(customer['user_id'], user_data, campaign_id)
+            if self.defer_secondary and customer.get('retention_decision') in DEFERRED_DECISIONS:
+                deferred.append(state)
+            else:
+                realtime.append(state)
+
+        # Campaigns at their spend cap get template messages, which need no batch
+        if deferred and budget_mode(campaign_id) == BUDGET_TEMPLATE:
+            realtime.extend(deferred)
+            deferred = []
+
+        # The router is rule-based (no Claude call), so it runs here and the
+        # stored state is what the negotiator would have seen in the graph
+        deferred = [{**state, **router_node(state)} for state in deferred]
+
+        # Drafted the night before (real-time turns pick their drafts up in the negotiator)
+        precomputed = len(deferred)
+        deferred = self._serve_precomputed(campaign_id, deferred)
+        precomputed -= len(deferred)
+
+        batch_id = self._submit_batch(campaign_id, deferred) if deferred else None
+        self._run_realtime(realtime)
+        return {
+            'campaign_id': campaign_id,
+            'realtime': len(realtime),
+            'precomputed': precomputed,
+            'deferred': len(deferred),
+            'unknown_customers': unknown,
+            'batch_id': batch_id
+        }
+
+    def _run_realtime(self, states: List[Dict]):
+        futures = [(state, self.runner.run_turn(TURN_INITIAL, state)) for state in states]
+        for state, future in futures:
+            job = future.result()
+            if job['status'] == JOB_FAILED:
+                self.store.save(state, STATUS_FAILED)
+            else:
+                self.store.save(job['state'], STATUS_READY)
+                OUTREACH_GENERATED.inc(mode='realtime')
+
+    def _serve_precomputed(self, campaign_id: str, routed: List[Dict]) -> List[Dict]:
+        """Mark customers with a precomputed first message ready; returns the others"""
+        remaining = []
+        for state in routed:
+            with usage_scope(campaign_id) as usage:
+                message = precomputed_outreach(state)
+            if message is None:
+                remaining.append(state)
+                continue
+            self.store.save({**state, **message_update(state, message, INITIAL_OUTREACH_STRATEGY, usage)},
+                            STATUS_READY)
+            OUTREACH_GENERATED.inc(mode='precomputed')
+        return remaining
+
+    def _submit_batch(self, campaign_id: str, routed: List[Dict]) -> str:
+        requests = {
+            state['user_id']: generation_params(initial_outreach_prompt(state), INITIAL_OUTREACH_MAX_TOKENS)
+            for state in routed
+        }
+        with usage_scope(campaign_id):
+            batch = llm.create_message_batch(INITIAL_OUTREACH_TASK, requests)
+
+        self.store.add_batch(batch['batch_id'], campaign_id, INITIAL_OUTREACH_TASK,
+                             batch['tier'], batch['model'], len(requests))
+        self.store.save_many(routed, STATUS_GENERATING, batch['batch_id'])
+        return batch['batch_id']
+
+    def poll(self) -> int:
+        """Collect every open batch that has ended; returns how many were collected"""
+        collected = 0
+        for batch in self.store.open_batches():
+            if llm.message_batch_status(batch['batch_id']) == llm.BATCH_ENDED:
+                self.collect(batch)
+                collected += 1
+        return collected
+
+    def collect(self, batch: Dict):
+        """Apply an ended batch's results to its waiting conversations"""
+        submitted = datetime.fromisoformat(batch['submitted_at'])
+        turnaround_ms = (datetime.now() - submitted).total_seconds() * 1000
+        waiting = self.store.in_batch(batch['batch_id'])
+
+        for custom_id, response in llm.message_batch_results(batch['batch_id']):
+            if response is None or custom_id not in waiting:
+                continue  # errored/expired requests stay in `waiting` for the real-time fallback
+            conversation = waiting.pop(custom_id)
+            state = conversation['state']
+            with usage_scope(batch['campaign_id']) as usage:
+                llm.record_batch_usage(batch['task'], batch['tier'], batch['model'], response, turnaround_ms)
+            message = response.content[0].text
+            self.store.save({**state, **message_update(state, message, INITIAL_OUTREACH_STRATEGY, usage)},
+                            STATUS_READY, batch['batch_id'])
+            OUTREACH_GENERATED.inc(mode='batch')
+
+        for conversation in waiting.values():
+            self._generate_now(conversation['state'], batch['batch_id'])
+        self.store.close_batch(batch['batch_id'])
+
+    def _generate_now(self, state: Dict, batch_id: str):
+        try:
+            update = negotiator_node(state)
+        except Exception:
+            self.store.save(state, STATUS_FAILED, batch_id)
+            return
+        self.store.save({**state, **update}, STATUS_READY, batch_id)
+        OUTREACH_GENERATED.inc(mode='batch_fallback')
+
+    def dispatch(self, campaign_id: Optional[str]) -> int:
+        """Send every ready first message of a campaign; returns how many were sent"""
+        sent = 0
+        for conversation in self.store.by_status(campaign_id, STATUS_READY):
+            state = conversation['state']
+            body = state['messages'][-1]['content']
+            self.send(state['user_email'], outreach_subject(state), body)
+            self.store.set_status(conversation['conversation_id'], STATUS_DISPATCHED)
+            sent += 1
+        return sent
+
+    def campaigns_with_open_batches(self) -> List[Optional[str]]:
+        return sorted({batch['campaign_id'] for batch in self.store.open_batches()}, key=str)
+
+    def run(self, campaign_id: str, outreach_list: List[Dict],
+            poll_interval_s: float = DEFAULT_POLL_INTERVAL_S, wait: bool = True) -> Dict:
+        """
+        Launch a campaign, send the real-time messages right away and, with
+        `wait`, keep polling until the deferred ones are sent too
+        """
+        summary = self.launch(campaign_id, outreach_list)
+        dispatched = self.dispatch(campaign_id)
+        while wait and self.store.open_batches():
+            time.sleep(poll_interval_s)
+            if self.poll():
+                dispatched += self.dispatch(campaign_id)
+        summary['dispatched'] = dispatched
+        summary['status_counts'] = self.store.status_counts(campaign_id)
+        return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Run an AI outreach campaign over a billing failure export')
+    parser.add_argument('export', nargs='?', help='Failure export (.csv / .jsonl, optionally .gz)')
+    parser.add_argument('--campaign-id', help='Campaign the conversations and spend belong to')
+    parser.add_argument('--capacity', type=int, default=10, help='Customers the AI agent can handle today')
+    parser.add_argument('--db', default='campaign.sqlite', help='Conversation store (SQLite file)')
+    parser.add_argument('--realtime-only', action='store_true', help='Generate every first message in real time')
+    parser.add_argument('--no-wait', action='store_true', help="Return after launch; collect later with --poll")
+    parser.add_argument('--poll', action='store_true', help='Collect ended batches and dispatch, then exit')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL_S)
+    args = parser.parse_args(argv)
+
+    store = ConversationStore(args.db)
+    campaign = CampaignRunner(store, defer_secondary=not args.realtime_only)
+    try:
+        if args.poll:
+            campaigns = campaign.campaigns_with_open_batches()
+            collected = campaign.poll()
+            dispatched = sum(campaign.dispatch(campaign_id) for campaign_id in campaigns)
+            print(json.dumps({'collected_batches': collected, 'dispatched': dispatched}, indent=2))
+            return 0
+
+        if not args.export or not args.campaign_id:
+            parser.error('an export and --campaign-id are required unless --poll is given')
+
+        outreach = ingest_export(args.export, args.capacity)
+        summary = campaign.run(args.campaign_id, outreach['ai_outreach_list'],
+                               poll_interval_s=args.poll_interval, wait=not args.no_wait)
+        print(json.dumps(summary, indent=2))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -7,6 +7,7 @@ from agents.router import router_node
 from agents.negotiator import negotiator_node
 from agents.extractor import extractor_node
 from agents.tools import tool_executor_node
+from utils.tracing import traced_node
 
 
 def create_petdunning_graph():
@@ -16,21 +17,19 @@ def create_petdunning_graph():
     Flow:
     1. START → router (assess risk)
     2. router → negotiator (generate initial message)
-    3. [User responds]
-    4. extractor → analyze user intent
-    5. negotiator → generate response
-    6. tool_executor → execute actions (Stripe, DB)
-    7. Check if conversation complete → END or loop back
+    3. negotiator → END (wait for the user's reply)
+
+    The reply is handled by create_response_graph (extractor → negotiator →
+    tool_executor). Its nodes are not added here: LangGraph rejects nodes
+    with no outgoing edge.
     """
 
     # Create graph
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("router", router_node)
-    workflow.add_node("negotiator", negotiator_node)
-    workflow.add_node("extractor", extractor_node)
-    workflow.add_node("tool_executor", tool_executor_node)
+    workflow.add_node("router", traced_node("router")(router_node))
+    workflow.add_node("negotiator", traced_node("negotiator")(negotiator_node))
 
     # Define flow
     workflow.set_entry_point("router")
@@ -59,9 +58,9 @@ def create_response_graph():
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("extractor", extractor_node)
-    workflow.add_node("negotiator", negotiator_node)
-    workflow.add_node("tool_executor", tool_executor_node)
+    workflow.add_node("extractor", traced_node("extractor")(extractor_node))
+    workflow.add_node("negotiator", traced_node("negotiator")(negotiator_node))
+    workflow.add_node("tool_executor", traced_node("tool_executor")(tool_executor_node))
 
     # Define flow
     workflow.set_entry_point("extractor")
@@ -0,0 +1,196 @@
+"""
+Background Agent Execution
+Runs graph turns on a worker pool so Streamlit reruns never block on Claude;
+the page submits a turn, gets a job id back and polls the job's status
+"""
+import os
+import copy
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from graph import create_petdunning_graph, create_response_graph
+from scheduler import KeyedScheduler
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Graph turn kinds
+TURN_INITIAL = 'initial'  # router → negotiator (first outreach)
+TURN_RESPONSE = 'response'  # extractor → negotiator → tool_executor
+GRAPH_BUILDERS = {
+    TURN_INITIAL: create_petdunning_graph,
+    TURN_RESPONSE: create_response_graph
+}
+
+WORKERS_ENV = 'CARELOOP_AGENT_WORKERS'
+DEFAULT_WORKERS = 4
+
+# Finished jobs kept for polling before the oldest are dropped
+MAX_FINISHED_JOBS = 1000
+
+
+class Job:
+    """One graph turn for one conversation"""
+
+    def __init__(self, kind: str, conversation_id: str, state: dict, after: Optional['Job'] = None):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.conversation_id = conversation_id
+        self.status = JOB_QUEUED
+        self.state = state  # latest merged state (updated after every node)
+        self.input_messages: List[dict] = list(state.get('messages', []))
+        # Earlier turn of the conversation still pending at submission; this
+        # turn runs on its result instead of the state it was submitted with
+        self.after = after
+        self.completed_nodes = []
+        self.error: Optional[str] = None
+        self.submitted_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+
+    def snapshot(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'conversation_id': self.conversation_id,
+            'status': self.status,
+            'state': copy.deepcopy(self.state),
+            'completed_nodes': list(self.completed_nodes),
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobRunner:
+    """
+    Worker service for graph turns.
+
+    - submit_turn() copies the state, queues the turn and returns immediately
+    - turns run on a KeyedScheduler keyed by conversation: different
+      conversations run in parallel, turns of one conversation run strictly
+      one after another in submission order
+    - a turn submitted while an earlier turn of the conversation is still
+      pending runs on that turn's finished state plus the messages it added,
+      so the second reply sees the first one's outcome (and a completed
+      conversation only records it) instead of driving the tool executor
+      again from the same pre-reply state
+    - get() returns a snapshot of a job's status and latest state
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        max_workers = max_workers or int(os.getenv(WORKERS_ENV, DEFAULT_WORKERS))
+        self.scheduler = KeyedScheduler(max_workers, name='agent')
+        # Compiled graphs hold no per-run state, so workers share them. Each
+        # is compiled on its first turn, so a graph that fails to build fails
+        # only its own turns (and is retried on the next one)
+        self._graphs: Dict[str, object] = {}
+        self._graphs_lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Most recently submitted job per conversation
+        self._latest: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit_turn(self, kind: str, state: dict) -> str:
+        """Queue a graph turn and return its job id"""
+        job, _ = self._submit(kind, state)
+        return job.job_id
+
+    def run_turn(self, kind: str, state: dict) -> Future:
+        """
+        Queue a graph turn and return a Future that resolves to the finished
+        job's snapshot (for async callers: asyncio.wrap_future)
+        """
+        _, future = self._submit(kind, state)
+        return future
+
+    def _submit(self, kind: str, state: dict):
+        if kind not in GRAPH_BUILDERS:
+            raise ValueError(f"Unknown turn kind: {kind}")
+
+        conversation_id = state['user_id']
+        with self._lock:
+            previous = self._latest.get(conversation_id)
+            pending = previous if previous and previous.status in (JOB_QUEUED, JOB_RUNNING) else None
+            job = Job(kind, conversation_id, copy.deepcopy(state), after=pending)
+            self._jobs[job.job_id] = job
+            self._latest[conversation_id] = job
+            self._prune()
+
+        return job, self.scheduler.submit(job.conversation_id, self._run, job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def active_jobs(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status in (JOB_QUEUED, JOB_RUNNING))
+
+    def shutdown(self, wait: bool = True):
+        self.scheduler.shutdown(wait=wait)
+
+    def _run(self, job: Job) -> dict:
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now().isoformat()
+        try:
+            previous, job.after = job.after, None
+            if previous is not None and previous.status == JOB_DONE:
+                job.state = rebase_turn(previous, job.input_messages)
+                if job.state.get('conversation_stage') == 'completed':
+                    # Nothing left to negotiate; keep the reply on record only
+                    job.status = JOB_DONE
+                    return job.snapshot()
+            state = job.state
+            for event in self._graph(job.kind).stream(state):
+                for node, value in event.items():
+                    if isinstance(value, dict):
+                        state = {**state, **value}
+                    job.completed_nodes.append(node)
+                job.state = state
+            job.status = JOB_DONE
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = datetime.now().isoformat()
+        return job.snapshot()
+
+    def _graph(self, kind: str):
+        with self._graphs_lock:
+            graph = self._graphs.get(kind)
+            if graph is None:
+                graph = self._graphs[kind] = GRAPH_BUILDERS[kind]()
+            return graph
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (caller holds the lock)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (JOB_DONE, JOB_FAILED)]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            job = self._jobs.pop(job_id)
+            if self._latest.get(job.conversation_id) is job:
+                del self._latest[job.conversation_id]
+
+
+def rebase_turn(previous: Job, messages: List[dict]) -> dict:
+    """
+    Input for a turn queued behind `previous`: the finished state of
+    `previous` plus the messages this turn's input added beyond what it
+    shares with the input of `previous`
+    """
+    shared = 0
+    for mine, theirs in zip(messages, previous.input_messages):
+        if mine != theirs:
+            break
+        shared += 1
+    state = copy.deepcopy(previous.state)
+    state['messages'] = state.get('messages', []) + copy.deepcopy(messages[shared:])
+    return state
@@ -0,0 +1,114 @@
+"""
+Conversation-Keyed Scheduler
+Runs tasks for different conversations in parallel on a worker pool while
+tasks for the same conversation run strictly one after another, in order
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+from utils.telemetry import Gauge, Histogram, get_registry
+from utils.tracing import get_histogram
+
+QUEUED_TASKS = get_registry().register(Gauge(
+    'careloop_scheduler_queued_tasks',
+    'Tasks waiting in conversation queues',
+    ('scheduler',)
+))
+BUSY_CONVERSATIONS = get_registry().register(Gauge(
+    'careloop_scheduler_busy_conversations',
+    'Conversations with a task running or queued',
+    ('scheduler',)
+))
+QUEUE_WAIT = get_registry().register(Histogram(
+    'careloop_scheduler_wait_seconds',
+    'Time a task waited before starting (behind its conversation and for a worker)',
+    ('scheduler',)
+))
+CONVERSATION_QUEUE_DEPTH = get_registry().register(Histogram(
+    'careloop_scheduler_conversation_queue_depth',
+    'Tasks already waiting in the conversation queue when a task is submitted',
+    ('scheduler',),
+    buckets=(0, 1, 2, 4, 8, 16, 32)
+))
+
+
+class KeyedScheduler:
+    """
+    Per-key FIFO queues drained by a shared thread pool.
+
+    A key with pending work has exactly one drain scheduled on the pool. The
+    drain runs one task, then re-submits itself if the key has more, so a busy
+    conversation yields the worker to other conversations between tasks.
+    """
+
+    def __init__(self, max_workers: int, name: str = 'agent'):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'careloop-{name}')
+        # key → waiting tasks; a key is present while its drain is scheduled or running
+        self._queues: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._wait_histogram = get_histogram(f'scheduler.{name}.wait')
+
+    def submit(self, key: str, fn, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) behind every earlier task for `key`"""
+        future = Future()
+        task = (future, fn, args, kwargs, time.perf_counter())
+
+        with self._lock:
+            queue = self._queues.get(key)
+            start_drain = queue is None
+            if start_drain:
+                queue = self._queues[key] = deque()
+            depth = len(queue)
+            queue.append(task)
+
+        QUEUED_TASKS.inc(scheduler=self.name)
+        CONVERSATION_QUEUE_DEPTH.observe(depth, scheduler=self.name)
+        if start_drain:
+            BUSY_CONVERSATIONS.inc(scheduler=self.name)
+            self._executor.submit(self._run_next, key)
+        return future
+
+    def _run_next(self, key: str):
+        with self._lock:
+            future, fn, args, kwargs, submitted = self._queues[key].popleft()
+
+        waited_s = time.perf_counter() - submitted
+        QUEUED_TASKS.dec(scheduler=self.name)
+        QUEUE_WAIT.observe(waited_s, scheduler=self.name)
+        self._wait_histogram.record(waited_s * 1000)
+
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        with self._lock:
+            more = bool(self._queues[key])
+            if not more:
+                del self._queues[key]
+
+        if more:
+            self._executor.submit(self._run_next, key)
+        else:
+            BUSY_CONVERSATIONS.dec(scheduler=self.name)
+
+    def stats(self) -> dict:
+        """Current queue depth and wait-time percentiles for this scheduler"""
+        with self._lock:
+            depths = [len(queue) for queue in self._queues.values()]
+        return {
+            'queued_tasks': sum(depths),
+            'busy_conversations': len(depths),
+            'max_conversation_queue_depth': max(depths, default=0),
+            'wait_p50_ms': round(self._wait_histogram.percentile(50), 2),
+            'wait_p95_ms': round(self._wait_histogram.percentile(95), 2),
+            'wait_p99_ms': round(self._wait_histogram.percentile(99), 2)
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
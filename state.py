@@ -52,6 +52,7 @@ class AgentState(TypedDict):
     messages: List[Message]
     current_intent: Optional[str]  # 'accept_bridge', 'financial_hardship', 'decline_cancel', etc.
     conversation_stage: str  # 'initial', 'negotiating', 'closing', 'completed'
+    conversation_summary: Optional[dict]  # Rolling summary both agents prompt with (agents/conversation_summary.py)
 
     # Plan State
     current_plan: str  # 'premium', 'bridge', 'cancelled'
@@ -66,6 +67,11 @@ class AgentState(TypedDict):
     revenue_impact: float
     churn_prevented: bool
 
+    # LLM Spend (rolled up from every Claude call in this conversation)
+    campaign_id: Optional[str]  # Outreach campaign this conversation belongs to
+    llm_usage: Optional[dict]  # {'calls', 'input_tokens', 'output_tokens', 'cache_*_input_tokens', 'cost_usd'}
+    llm_cost_usd: float
+
 
 class RouterOutput(TypedDict):
     """Output from the Router agent"""
@@ -75,12 +81,19 @@ class RouterOutput(TypedDict):
     risk_score: float
 
 
+# Where an ExtractorOutput came from
+EXTRACTION_MODEL = 'model'  # a validated Claude classification
+EXTRACTION_KEYWORD = 'keyword'  # keyword rules (no usable model answer, or budget spent)
+EXTRACTION_CACHE = 'cache'  # the intent cache
+
+
 class ExtractorOutput(TypedDict):
     """Output from the Intent Extractor"""
     intent: str
     confidence: float
     extracted_entities: dict
     reasoning: str
+    source: str  # EXTRACTION_*
 
 
 class NegotiatorOutput(TypedDict):
@@ -88,3 +101,53 @@ class NegotiatorOutput(TypedDict):
     message: str
     tone: str
     strategy: str
+
+
+def build_initial_state(user_id: str, user_data: dict, campaign_id: Optional[str] = None) -> AgentState:
+    """
+    Build a fresh AgentState for a customer whose payment just failed.
+    Router-populated fields start as None and are filled in by router_node.
+    """
+    return AgentState(
+        user_id=user_id,
+        user_name=user_data['name'],
+        user_email=user_data['email'],
+        pet_name=user_data['pet_name'],
+        pet_condition=user_data['pet_condition'],
+        medical_risk_tier=user_data['medical_risk_tier'],
+        risk_score=0.0,
+        ltv=user_data['ltv'],
+        tenure_months=user_data['tenure_months'],
+        # Payment history data (will be populated by router)
+        payment_history=None,
+        payment_risk_score=None,
+        payment_risk_tier=None,
+        failure_rate=None,
+        late_payment_rate=None,
+        payment_reliability=None,
+        # Medical data (will be populated by router)
+        medical_history=None,
+        medication_adherence_score=None,
+        medical_urgency_score=None,
+        medical_urgency_tier=None,
+        continuity_of_care_importance=None,
+        # Retention priority (will be populated by router)
+        retention_priority_score=None,
+        retention_decision=None,
+        should_engage_ai=None,
+        # Conversation data
+        messages=[],
+        current_intent=None,
+        conversation_stage='initial',
+        conversation_summary=None,
+        current_plan=user_data['current_plan'],
+        target_plan=None,
+        router_decision=None,
+        negotiation_strategy=None,
+        tool_calls=[],
+        revenue_impact=0.0,
+        churn_prevented=False,
+        campaign_id=campaign_id,
+        llm_usage=None,
+        llm_cost_usd=0.0
+    )
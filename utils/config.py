@@ -1,8 +1,9 @@
 """
-Configuration utilities for loading API keys
+Configuration utilities for loading API keys and model routing
 Supports both local .env files and Streamlit Cloud secrets
 """
 import os
+import json
 from dotenv import load_dotenv
 
 # Load .env file for local development
@@ -22,3 +23,27 @@ def get_api_key():
 
     # Fall back to environment variable (for local development)
     return os.getenv('ANTHROPIC_API_KEY')
+
+
+_model_routing = None
+
+
+def load_model_routing() -> dict:
+    """
+    Load the model routing config (tiers, per-task routing, escalation rules
+    and pricing). This file is the single source of truth for which Claude
+    model serves which task.
+    """
+    global _model_routing
+    if _model_routing is None:
+        with open('data/model_routing.json', 'r') as f:
+            _model_routing = json.load(f)
+    return _model_routing
+
+
+def model_pricing() -> dict:
+    """USD per million tokens, keyed by model name"""
+    return {
+        tier['model']: {'input': tier['input_cost_per_mtok'], 'output': tier['output_cost_per_mtok']}
+        for tier in load_model_routing()['tiers'].values()
+    }
@@ -0,0 +1,178 @@
+"""
+Conversation Store
+Durable agent state per conversation for campaign runs, plus the Message
+Batches submitted for deferred outreach, so a campaign can be polled and
+dispatched across process restarts
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Conversation lifecycle in a campaign run
+STATUS_GENERATING = 'generating'  # outreach submitted in a message batch
+STATUS_READY = 'ready'  # outreach message generated, not yet sent
+STATUS_DISPATCHED = 'dispatched'  # outreach sent to the customer
+STATUS_FAILED = 'failed'  # no message could be generated
+
+# Message batch bookkeeping
+BATCH_SUBMITTED = 'submitted'
+BATCH_COLLECTED = 'collected'  # results applied to the conversations
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    campaign_id TEXT,
+    status TEXT NOT NULL,
+    batch_id TEXT,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_campaign ON conversations (campaign_id, status);
+CREATE INDEX IF NOT EXISTS idx_conversations_batch ON conversations (batch_id);
+
+CREATE TABLE IF NOT EXISTS message_batches (
+    batch_id TEXT PRIMARY KEY,
+    campaign_id TEXT,
+    task TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    model TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    ended_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_message_batches_status ON message_batches (status);
+"""
+
+
+class ConversationStore:
+    """
+    SQLite-backed conversation states (in memory by default).
+
+    States are stored as JSON; a conversation is keyed by its user_id, as in
+    the job runner and the conversation API.
+    """
+
+    def __init__(self, db_path: str = ':memory:'):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    # -- conversations -----------------------------------------------------
+
+    def save(self, state: Dict, status: str, batch_id: Optional[str] = None):
+        """Insert or replace a conversation's state"""
+        self.save_many([state], status, batch_id)
+
+    def save_many(self, states: List[Dict], status: str, batch_id: Optional[str] = None):
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (state['user_id'], state.get('campaign_id'), status, batch_id, json.dumps(state, default=str), now)
+                    for state in states
+                ]
+            )
+
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        """{'state', 'status', 'batch_id', 'campaign_id', 'updated_at'} or None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT conversation_id, campaign_id, status, batch_id, state, updated_at '
+                'FROM conversations WHERE conversation_id = ?',
+                (conversation_id,)
+            ).fetchone()
+        return _conversation(row) if row else None
+
+    def by_status(self, campaign_id: Optional[str], status: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT conversation_id, campaign_id, status, batch_id, state, updated_at '
+                'FROM conversations WHERE campaign_id IS ? AND status = ? ORDER BY conversation_id',
+                (campaign_id, status)
+            ).fetchall()
+        return [_conversation(row) for row in rows]
+
+    def in_batch(self, batch_id: str) -> Dict[str, Dict]:
+        """Conversations still waiting on a message batch, by conversation_id"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT conversation_id, campaign_id, status, batch_id, state, updated_at '
+                'FROM conversations WHERE batch_id = ? AND status = ?',
+                (batch_id, STATUS_GENERATING)
+            ).fetchall()
+        return {row[0]: _conversation(row) for row in rows}
+
+    def set_status(self, conversation_id: str, status: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE conversations SET status = ?, updated_at = ? WHERE conversation_id = ?',
+                (status, datetime.now().isoformat(), conversation_id)
+            )
+
+    def status_counts(self, campaign_id: Optional[str]) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM conversations WHERE campaign_id IS ? GROUP BY status',
+                (campaign_id,)
+            ).fetchall())
+
+    # -- message batches ---------------------------------------------------
+
+    def add_batch(self, batch_id: str, campaign_id: Optional[str], task: str, tier: str, model: str, requests: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO message_batches VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)',
+                (batch_id, campaign_id, task, tier, model, requests, BATCH_SUBMITTED, datetime.now().isoformat())
+            )
+
+    def open_batches(self) -> List[Dict]:
+        """Submitted batches whose results haven't been collected yet"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT batch_id, campaign_id, task, tier, model, requests, status, submitted_at, ended_at '
+                'FROM message_batches WHERE status != ? ORDER BY submitted_at',
+                (BATCH_COLLECTED,)
+            ).fetchall()
+        return [_batch(row) for row in rows]
+
+    def close_batch(self, batch_id: str):
+        """Mark a batch's results as collected"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE message_batches SET status = ?, ended_at = ? WHERE batch_id = ?',
+                (BATCH_COLLECTED, datetime.now().isoformat(), batch_id)
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+def _conversation(row: tuple) -> Dict:
+    conversation_id, campaign_id, status, batch_id, state, updated_at = row
+    return {
+        'conversation_id': conversation_id,
+        'campaign_id': campaign_id,
+        'status': status,
+        'batch_id': batch_id,
+        'state': json.loads(state),
+        'updated_at': updated_at
+    }
+
+
+def _batch(row: tuple) -> Dict:
+    batch_id, campaign_id, task, tier, model, requests, status, submitted_at, ended_at = row
+    return {
+        'batch_id': batch_id,
+        'campaign_id': campaign_id,
+        'task': task,
+        'tier': tier,
+        'model': model,
+        'requests': requests,
+        'status': status,
+        'submitted_at': submitted_at,
+        'ended_at': ended_at
+    }
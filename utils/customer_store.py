@@ -0,0 +1,190 @@
+"""
+Customer Query Layer
+Indexed, paginated access to the at-risk customer list so the dashboard only
+materializes the page it shows, however many customers are in the portfolio
+"""
+import math
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from agents.payment_history import get_payment_history, calculate_payment_risk_score
+from agents.ezyvet_client import (
+    get_pet_medical_history,
+    get_medication_adherence_score,
+    assess_medical_urgency
+)
+from agents.retention_scorer import calculate_retention_priority_score
+
+# Sort keys exposed to the UI → indexed column
+SORT_COLUMNS = {
+    'ltv': 'ltv',
+    'retention_score': 'retention_score'
+}
+
+DEFAULT_PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    user_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    pet TEXT NOT NULL,
+    ltv REAL NOT NULL,
+    tenure_months INTEGER NOT NULL,
+    risk_tier TEXT NOT NULL,
+    status TEXT NOT NULL,
+    retention_score REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_customers_ltv ON customers (ltv, user_id, risk_tier, status);
+CREATE INDEX IF NOT EXISTS idx_customers_retention ON customers (retention_score, user_id, risk_tier, status);
+"""
+# Risk tier and status are low-cardinality, so each sort index carries them as
+# trailing columns: a filtered page walks the index in sort order, checks the
+# filter on index entries and stops after LIMIT matches (no sort of all matches).
+# Match counts come from per-(risk_tier, status) totals kept in memory.
+
+
+def score_customer(user_id: str, user_data: Dict) -> float:
+    """Retention priority score (0-100), computed from the same inputs the router uses"""
+    payment_risk = calculate_payment_risk_score(get_payment_history(user_id))
+    medical_history = get_pet_medical_history(pet_id='pet_001', user_id=user_id)
+    adherence_data = get_medication_adherence_score(user_id)
+    medical_urgency = assess_medical_urgency(medical_history, adherence_data)
+
+    return calculate_retention_priority_score(
+        medical_urgency_score=medical_urgency['urgency_score'],
+        payment_risk_score=payment_risk['payment_risk_score'],
+        medication_adherence_score=adherence_data['adherence_score'],
+        ltv=user_data['ltv'],
+        tenure_months=user_data['tenure_months']
+    )['retention_priority_score']
+
+
+def customer_row(user_id: str, user_data: Dict) -> tuple:
+    """customers table row for a mock_db user entry"""
+    retention_score = user_data.get('retention_priority_score')
+    if retention_score is None:
+        retention_score = score_customer(user_id, user_data)
+    return (
+        user_id,
+        user_data['name'],
+        f"{user_data['pet_name']} ({user_data['pet_condition']})",
+        user_data['ltv'],
+        user_data['tenure_months'],
+        user_data['medical_risk_tier'],
+        user_data['current_plan'],
+        retention_score
+    )
+
+
+class CustomerStore:
+    """
+    SQLite-backed customer index (in memory by default).
+
+    Filtering, sorting and paging run in SQL against indexed columns; only
+    the requested page is turned into Python rows.
+    """
+
+    def __init__(self, db_path: str = ':memory:'):
+        # Streamlit serves reruns from different threads; the lock serializes access
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._facet_counts: Dict[tuple, int] = {}
+
+    def load_users(self, users: Dict[str, Dict]):
+        """Insert or refresh customers from a {user_id: user_data} mapping"""
+        self.upsert_rows(customer_row(user_id, user_data) for user_id, user_data in users.items())
+
+    def upsert_rows(self, rows: Iterable[tuple]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._refresh_facet_counts()
+
+    def _refresh_facet_counts(self):
+        self._facet_counts = {
+            (risk_tier, status): count
+            for risk_tier, status, count in self._conn.execute(
+                'SELECT risk_tier, status, COUNT(*) FROM customers GROUP BY risk_tier, status'
+            )
+        }
+
+    def count(self, risk_tiers: Optional[List[str]] = None, statuses: Optional[List[str]] = None) -> int:
+        """Number of customers matching the filters (no table scan)"""
+        return sum(
+            count for (risk_tier, status), count in self._facet_counts.items()
+            if (not risk_tiers or risk_tier in risk_tiers) and (not statuses or status in statuses)
+        )
+
+    def distinct_values(self, column: str) -> List[str]:
+        """Filter options for 'risk_tier' or 'status'"""
+        if column not in ('risk_tier', 'status'):
+            raise ValueError(f"Cannot list values for column: {column}")
+        position = 0 if column == 'risk_tier' else 1
+        return sorted({key[position] for key in self._facet_counts})
+
+    def query(
+        self,
+        risk_tiers: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        sort_by: str = 'ltv',
+        descending: bool = True,
+        page: int = 1,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Dict:
+        """
+        One page of customers matching the filters.
+
+        Returns:
+            {'rows': [...], 'total': matching customers, 'page': page,
+             'page_size': page_size, 'pages': page count}
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort_by}")
+
+        where, params = [], []
+        if risk_tiers:
+            where.append(f"risk_tier IN ({', '.join('?' * len(risk_tiers))})")
+            params.extend(risk_tiers)
+        if statuses:
+            where.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+        direction = 'DESC' if descending else 'ASC'
+        order_sql = f"ORDER BY {SORT_COLUMNS[sort_by]} {direction}, user_id {direction}"
+
+        with self._lock:
+            total = self.count(risk_tiers, statuses)
+            pages = max(1, math.ceil(total / page_size))
+            page = min(max(1, page), pages)
+            rows = self._conn.execute(
+                f'SELECT user_id, name, pet, ltv, tenure_months, risk_tier, status, retention_score '
+                f'FROM customers {where_sql} {order_sql} LIMIT ? OFFSET ?',
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+
+        return {
+            'rows': [table_row(row) for row in rows],
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'pages': pages
+        }
+
+
+def table_row(row: tuple) -> Dict:
+    """Format a customers row the way the At-Risk Customers table displays it"""
+    user_id, name, pet, ltv, tenure_months, risk_tier, status, retention_score = row
+    return {
+        'User': name,
+        'Pet': pet,
+        'LTV': ltv,
+        'Tenure': f"{tenure_months} mo",
+        'Risk': risk_tier.upper(),
+        'Status': status.upper(),
+        'Retention Score': round(retention_score, 1)
+    }
@@ -0,0 +1,150 @@
+"""
+Draft Store
+Initial outreach messages drafted ahead of a customer's payment failure (see
+agents/outreach_precompute.py), keyed by user_id with an expiry, so the
+failure handler fetches and sends instead of waiting on a generation call.
+
+Each draft carries a fingerprint of the prompt it was generated from; a draft
+whose customer details changed since it was drafted is never served.
+
+Enabled with CARELOOP_DRAFT_STORE (a SQLite file shared by the nightly
+precompute and the agent processes, or ':memory:').
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from utils.telemetry import Counter, get_registry
+
+DRAFT_STORE_ENV = 'CARELOOP_DRAFT_STORE'
+
+# Fetch outcomes
+DRAFT_HIT = 'hit'
+DRAFT_MISS = 'miss'  # nothing drafted for the customer
+DRAFT_EXPIRED = 'expired'
+DRAFT_STALE = 'stale'  # the customer's details changed since drafting
+
+DRAFT_FETCHES = get_registry().register(Counter(
+    'careloop_outreach_draft_fetches_total',
+    'Precomputed initial outreach lookups at failure time, by result',
+    ('result',)
+))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outreach_drafts (
+    user_id TEXT PRIMARY KEY,
+    due_date TEXT NOT NULL,
+    failure_probability REAL NOT NULL,
+    message TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    usage TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outreach_drafts_expires ON outreach_drafts (expires_at);
+"""
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+
+
+class DraftStore:
+    """SQLite-backed outreach drafts with a per-draft expiry (in memory by default)"""
+
+    def __init__(self, db_path: str = ':memory:'):
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def put_many(self, drafts: List[Dict], ttl: timedelta):
+        """
+        Insert or replace drafts: dicts with user_id, due_date,
+        failure_probability, message, fingerprint and usage (records)
+        """
+        now = datetime.now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO outreach_drafts VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (draft['user_id'], draft['due_date'], draft['failure_probability'], draft['message'],
+                     draft['fingerprint'], json.dumps(draft.get('usage', [])), now.isoformat(),
+                     (now + ttl).isoformat())
+                    for draft in drafts
+                ]
+            )
+
+    def take(self, user_id: str, fingerprint: str) -> Optional[Dict]:
+        """
+        Remove and return the customer's draft if it is unexpired and was
+        drafted from the same prompt; None otherwise
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT user_id, due_date, failure_probability, message, fingerprint, usage, created_at, expires_at '
+                'FROM outreach_drafts WHERE user_id = ?',
+                (user_id,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute('DELETE FROM outreach_drafts WHERE user_id = ?', (user_id,))
+
+        if row is None:
+            result, draft = DRAFT_MISS, None
+        else:
+            draft = _draft(row)
+            if draft['expires_at'] <= datetime.now().isoformat():
+                result, draft = DRAFT_EXPIRED, None
+            elif draft['fingerprint'] != fingerprint:
+                result, draft = DRAFT_STALE, None
+            else:
+                result = DRAFT_HIT
+        DRAFT_FETCHES.inc(result=result)
+        return draft
+
+    def purge_expired(self) -> int:
+        """Delete expired drafts; returns how many were removed"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                'DELETE FROM outreach_drafts WHERE expires_at <= ?', (datetime.now().isoformat(),)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM outreach_drafts').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def _draft(row: tuple) -> Dict:
+    user_id, due_date, failure_probability, message, fingerprint, usage, created_at, expires_at = row
+    return {
+        'user_id': user_id,
+        'due_date': due_date,
+        'failure_probability': failure_probability,
+        'message': message,
+        'fingerprint': fingerprint,
+        'usage': json.loads(usage),
+        'created_at': created_at,
+        'expires_at': expires_at
+    }
+
+
+_store: Optional[DraftStore] = None
+_store_loaded = False
+_store_lock = threading.Lock()
+
+
+def get_draft_store() -> Optional[DraftStore]:
+    """Process-wide draft store (None unless CARELOOP_DRAFT_STORE is set)"""
+    global _store, _store_loaded
+    with _store_lock:
+        if not _store_loaded:
+            path = os.getenv(DRAFT_STORE_ENV, '').strip()
+            _store = DraftStore(path) if path else None
+            _store_loaded = True
+        return _store
@@ -0,0 +1,236 @@
+"""
+Claude Token and Cost Accounting
+Captures usage for every Claude call and rolls it up per conversation and
+per campaign, with a budget guard that downgrades spend near a campaign cap
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.config import model_pricing
+from utils.telemetry import Counter, get_registry
+
+# Budget guard thresholds (fraction of the campaign's spend cap)
+CHEAP_MODEL_THRESHOLD = 0.80  # switch to the routing config's budget_downgrade_tier
+TEMPLATE_THRESHOLD = 0.95  # stop calling Claude, use templates / keyword rules
+
+BUDGET_NORMAL = 'normal'
+BUDGET_CHEAP_MODEL = 'cheap_model'
+BUDGET_TEMPLATE = 'template'
+
+LLM_COST = get_registry().register(Counter(
+    'careloop_llm_cost_dollars_total',
+    'Estimated Claude spend (USD)',
+    ('campaign', 'model')
+))
+
+
+# Prompt cache pricing relative to the model's input price
+CACHE_WRITE_PRICE_MULTIPLIER = 1.25
+CACHE_READ_PRICE_MULTIPLIER = 0.10
+
+# Requests sent through the asynchronous Message Batches API are billed at
+# half the synchronous price
+BATCH_PRICE_MULTIPLIER = 0.50
+
+# Token counts summed into conversation and campaign totals
+TOKEN_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+def calculate_cost(model: str, input_tokens: int, output_tokens: int,
+                   cache_creation_input_tokens: int = 0, cache_read_input_tokens: int = 0,
+                   batch: bool = False) -> float:
+    """
+    Estimated USD cost of one call (unknown models are priced as the most expensive tier).
+    `input_tokens` is the uncached part of the prompt, as the API reports it.
+    `batch` applies the Message Batches discount.
+    """
+    prices = model_pricing()
+    pricing = prices.get(model) or max(prices.values(), key=lambda p: p['output'])
+    input_cost = (
+        input_tokens
+        + cache_creation_input_tokens * CACHE_WRITE_PRICE_MULTIPLIER
+        + cache_read_input_tokens * CACHE_READ_PRICE_MULTIPLIER
+    ) * pricing['input']
+    cost = (input_cost + output_tokens * pricing['output']) / 1_000_000
+    return cost * BATCH_PRICE_MULTIPLIER if batch else cost
+
+
+def usage_record(task: str, model: str, response, latency_ms: float, batch: bool = False) -> dict:
+    """Per-call usage record built from a Claude response (`batch`: served by the Message Batches API)"""
+    usage = getattr(response, 'usage', None)
+    tokens = {field: getattr(usage, field, 0) or 0 for field in TOKEN_FIELDS}
+    model = getattr(response, 'model', None) or model
+    record = {
+        'task': task,
+        'model': model,
+        **tokens,
+        'latency_ms': round(latency_ms, 1),
+        'cost_usd': round(calculate_cost(model, **tokens, batch=batch), 6),
+        'timestamp': datetime.now().isoformat()
+    }
+    if batch:
+        record['batch_api'] = True
+    return record
+
+
+def _empty_totals() -> dict:
+    return {'calls': 0, **{field: 0 for field in TOKEN_FIELDS}, 'cost_usd': 0.0}
+
+
+# ---------------------------------------------------------------------------
+# Per-conversation capture
+# ---------------------------------------------------------------------------
+
+class UsageScope:
+    """Collects the Claude calls made while a node runs"""
+
+    def __init__(self, campaign_id: Optional[str] = None):
+        self.campaign_id = campaign_id
+        self.calls: List[dict] = []
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(call['cost_usd'] for call in self.calls)
+
+    def totals(self, previous: Optional[dict] = None) -> dict:
+        """Conversation-level totals: previous totals plus the calls in this scope"""
+        totals = {**_empty_totals(), **(previous or {})}
+        for call in self.calls:
+            totals['calls'] += 1
+            for field in TOKEN_FIELDS:
+                totals[field] += call.get(field, 0)
+            totals['cost_usd'] = round(totals['cost_usd'] + call['cost_usd'], 6)
+        return totals
+
+
+_active_scope: ContextVar[Optional[UsageScope]] = ContextVar('careloop_usage_scope', default=None)
+
+
+@contextmanager
+def usage_scope(campaign_id: Optional[str] = None):
+    """
+    Capture every Claude call made inside the block:
+
+        with usage_scope(state.get('campaign_id')) as usage:
+            message = generate_initial_outreach(state)
+        usage.calls, usage.totals(state.get('llm_usage'))
+    """
+    scope = UsageScope(campaign_id)
+    token = _active_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _active_scope.reset(token)
+
+
+def current_campaign_id() -> Optional[str]:
+    scope = _active_scope.get()
+    return scope.campaign_id if scope else None
+
+
+def record_call(record: dict):
+    """Attach a usage record to the active scope and the campaign ledger"""
+    scope = _active_scope.get()
+    campaign_id = scope.campaign_id if scope else None
+    if scope is not None:
+        scope.calls.append(record)
+    ledger.record(campaign_id, record)
+    LLM_COST.inc(record['cost_usd'], campaign=campaign_id or 'none', model=record['model'])
+
+
+def split_record(record: dict, parts: int) -> List[dict]:
+    """
+    Split the usage of one call made on behalf of `parts` conversations (a
+    batched classification) into per-conversation shares. Token counts are
+    divided as evenly as whole tokens allow; the shares sum to the call.
+    """
+    shares = []
+    for index in range(parts):
+        share = {**record, 'batch_size': parts, 'cost_usd': round(record['cost_usd'] / parts, 6)}
+        for field in TOKEN_FIELDS:
+            quotient, remainder = divmod(record.get(field, 0), parts)
+            share[field] = quotient + (1 if index < remainder else 0)
+        shares.append(share)
+    return shares
+
+
+def attach_record(record: dict):
+    """
+    Attach a share of an already-recorded call to the active scope only (the
+    call itself was counted in the campaign ledger when it was made)
+    """
+    scope = _active_scope.get()
+    if scope is not None:
+        scope.calls.append(record)
+
+
+# ---------------------------------------------------------------------------
+# Per-campaign totals + budget guard
+# ---------------------------------------------------------------------------
+
+class CampaignLedger:
+    """Process-wide spend totals per campaign, with optional spend caps"""
+
+    def __init__(self):
+        self._totals: Dict[str, dict] = {}
+        self._caps: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_cap(self, campaign_id: str, cap_usd: float):
+        with self._lock:
+            self._caps[campaign_id] = cap_usd
+
+    def record(self, campaign_id: Optional[str], record: dict):
+        if not campaign_id:
+            return
+        with self._lock:
+            totals = self._totals.setdefault(campaign_id, {**_empty_totals(), 'by_model': {}})
+            totals['calls'] += 1
+            for field in TOKEN_FIELDS:
+                totals[field] += record.get(field, 0)
+            totals['cost_usd'] += record['cost_usd']
+            totals['by_model'][record['model']] = totals['by_model'].get(record['model'], 0.0) + record['cost_usd']
+
+    def spend(self, campaign_id: str) -> float:
+        with self._lock:
+            return self._totals.get(campaign_id, {}).get('cost_usd', 0.0)
+
+    def summary(self, campaign_id: str) -> dict:
+        with self._lock:
+            totals = dict(self._totals.get(campaign_id) or _empty_totals())
+            cap = self._caps.get(campaign_id)
+        totals['cap_usd'] = cap
+        totals['budget_mode'] = self.budget_mode(campaign_id)
+        return totals
+
+    def budget_mode(self, campaign_id: Optional[str]) -> str:
+        """
+        How much Claude a campaign may still use:
+        - 'normal': under CHEAP_MODEL_THRESHOLD of its cap (or no cap)
+        - 'cheap_model': generation/classification move to the budget downgrade tier
+        - 'template': no more Claude calls; templates and keyword rules only
+        """
+        if not campaign_id:
+            return BUDGET_NORMAL
+        with self._lock:
+            cap = self._caps.get(campaign_id)
+            spent = self._totals.get(campaign_id, {}).get('cost_usd', 0.0)
+        if not cap:
+            return BUDGET_NORMAL
+        used = spent / cap
+        if used >= TEMPLATE_THRESHOLD:
+            return BUDGET_TEMPLATE
+        if used >= CHEAP_MODEL_THRESHOLD:
+            return BUDGET_CHEAP_MODEL
+        return BUDGET_NORMAL
+
+
+ledger = CampaignLedger()
+
+
+def budget_mode(campaign_id: Optional[str]) -> str:
+    return ledger.budget_mode(campaign_id)
+
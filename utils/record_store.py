@@ -0,0 +1,257 @@
+"""
+Compact Customer Record Store
+Customer profiles as fixed-width columns in one memory-mapped file: numeric
+fields are packed arrays, tiers/plans/statuses are interned to one-byte codes,
+and a sorted user_id index gives the row for a customer by binary search.
+
+Reads are zero-copy views into the mapping, so every process that opens the
+same file shares its pages through the OS page cache.
+
+Build from the mock database:
+    python -m utils.record_store data/mock_db.json data/customers.crs
+"""
+import os
+import sys
+import json
+import math
+import mmap
+import struct
+import argparse
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'CRS1'
+_HEADER_PREFIX = struct.Struct('<4sI')  # magic, header JSON length
+_ALIGN = 8
+
+# name → array typecode. Float columns store NaN for a missing value.
+NUMERIC_COLUMNS = {
+    'ltv': 'd',
+    'plan_cost': 'd',
+    'balance': 'd',
+    'tenure_months': 'i',
+    'retention_priority_score': 'd',
+    'medical_urgency_score': 'd',
+    'payment_risk_score': 'd',
+    'medication_adherence_score': 'd'
+}
+
+# Low-cardinality string fields, stored as codes into a per-column value table
+ENUM_COLUMNS = ('medical_risk_tier', 'current_plan', 'last_payment_status')
+
+_ENUM_TYPECODE = 'B'
+_ROW_TYPECODE = 'I'
+MAX_ENUM_VALUES = 256
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _numeric(value, typecode: str):
+    if typecode == 'd':
+        return math.nan if value is None else float(value)
+    return int(value or 0)
+
+
+def write_record_store(users: Dict[str, Dict], path: str) -> int:
+    """
+    Write {user_id: user_data} (mock_db shape) as a record store file.
+    Returns the number of rows written.
+    """
+    user_ids = list(users)
+    columns: Dict[str, array] = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+    enum_values: Dict[str, List[str]] = {name: [] for name in ENUM_COLUMNS}
+    enum_codes: Dict[str, Dict[str, int]] = {name: {} for name in ENUM_COLUMNS}
+    for name in ENUM_COLUMNS:
+        columns[name] = array(_ENUM_TYPECODE)
+
+    for user_id in user_ids:
+        user_data = users[user_id]
+        for name, typecode in NUMERIC_COLUMNS.items():
+            columns[name].append(_numeric(user_data.get(name), typecode))
+        for name in ENUM_COLUMNS:
+            value = user_data.get(name) or ''
+            codes = enum_codes[name]
+            code = codes.get(value)
+            if code is None:
+                if len(codes) == MAX_ENUM_VALUES:
+                    raise ValueError(f"{name} has more than {MAX_ENUM_VALUES} distinct values")
+                code = codes[value] = len(codes)
+                enum_values[name].append(value)
+            columns[name].append(code)
+
+    # user_id index: ids sorted and padded to a fixed width, plus each id's row
+    encoded_ids = [user_id.encode('utf-8') for user_id in user_ids]
+    if any(b'\0' in encoded for encoded in encoded_ids):
+        raise ValueError("user_id may not contain NUL bytes")
+    id_width = max((len(encoded) for encoded in encoded_ids), default=1)
+    order = sorted(range(len(encoded_ids)), key=encoded_ids.__getitem__)
+    index_ids = b''.join(encoded_ids[row].ljust(id_width, b'\0') for row in order)
+    index_rows = array(_ROW_TYPECODE, order)
+
+    blocks: List[Tuple[str, str, bytes]] = [
+        (name, column.typecode, column.tobytes()) for name, column in columns.items()
+    ]
+    blocks.append(('_index_ids', 'c', index_ids))
+    blocks.append(('_index_rows', _ROW_TYPECODE, index_rows.tobytes()))
+
+    # Column offsets are relative to the (aligned) end of the header
+    layout = {}
+    offset = 0
+    for name, typecode, data in blocks:
+        offset = _aligned(offset)
+        layout[name] = {'typecode': typecode, 'offset': offset, 'nbytes': len(data)}
+        offset += len(data)
+
+    header = json.dumps({
+        'rows': len(user_ids),
+        'id_width': id_width,
+        'columns': layout,
+        'enums': enum_values
+    }).encode('utf-8')
+    data_start = _aligned(_HEADER_PREFIX.size + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, _, data in blocks:
+            f.seek(data_start + layout[name]['offset'])
+            f.write(data)
+    os.replace(tmp_path, path)
+    return len(user_ids)
+
+
+class RecordStore:
+    """
+    Read-only view over a record store file.
+
+    `column(name)` returns a memoryview straight into the mapping (no copy);
+    `get(user_id)` decodes one customer's fields into a dict.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_len = _HEADER_PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a customer record store")
+        header = json.loads(self._mmap[_HEADER_PREFIX.size:_HEADER_PREFIX.size + header_len])
+        data_start = _aligned(_HEADER_PREFIX.size + header_len)
+
+        self.rows: int = header['rows']
+        self.enums: Dict[str, List[str]] = header['enums']
+        self._id_width: int = header['id_width']
+        # Every view into the mapping, so close() can release them before unmapping
+        self._views: List[memoryview] = [memoryview(self._mmap)]
+        self._columns: Dict[str, memoryview] = {}
+        for name, spec in header['columns'].items():
+            start = data_start + spec['offset']
+            view = self._views[0][start:start + spec['nbytes']]
+            self._views.append(view)
+            if spec['typecode'] != 'c':
+                view = view.cast(spec['typecode'])
+                self._views.append(view)
+            self._columns[name] = view
+        self._ids_start = data_start + header['columns']['_index_ids']['offset']
+        self._columns.pop('_index_ids')
+        self._index_rows = self._columns.pop('_index_rows')
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, user_id: str) -> bool:
+        return self.row_of(user_id) is not None
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of a column (enum columns hold codes into `enums[name]`)"""
+        return self._columns[name]
+
+    def row_of(self, user_id: str) -> Optional[int]:
+        """Row number for a user_id (binary search over the sorted id index)"""
+        key = user_id.encode('utf-8').ljust(self._id_width, b'\0')
+        if len(key) > self._id_width:
+            return None
+        mapping, start, width = self._mmap, self._ids_start, self._id_width
+        low, high = 0, self.rows
+        while low < high:
+            mid = (low + high) // 2
+            offset = start + mid * width
+            if mapping[offset:offset + width] < key:
+                low = mid + 1
+            else:
+                high = mid
+        offset = start + low * width
+        if low < self.rows and mapping[offset:offset + width] == key:
+            return self._index_rows[low]
+        return None
+
+    def user_id_at(self, position: int) -> str:
+        """user_id at a position of the sorted index"""
+        offset = self._ids_start + position * self._id_width
+        return self._mmap[offset:offset + self._id_width].rstrip(b'\0').decode('utf-8')
+
+    def record(self, row: int) -> Dict:
+        """Decoded fields of one row (missing float values come back as None)"""
+        record = {}
+        for name, typecode in NUMERIC_COLUMNS.items():
+            value = self._columns[name][row]
+            record[name] = None if typecode == 'd' and math.isnan(value) else value
+        for name in ENUM_COLUMNS:
+            record[name] = self.enums[name][self._columns[name][row]] or None
+        return record
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Decoded fields for a customer, or None if the id isn't in the store"""
+        row = self.row_of(user_id)
+        return None if row is None else self.record(row)
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """All user_ids in sorted order"""
+        for position in range(self.rows):
+            yield self.user_id_at(position)
+
+    def iter_index(self) -> Iterator[Tuple[bytes, int]]:
+        """(UTF-8 user_id, row) for every customer, in user_id order"""
+        mapping, offset, width = self._mmap, self._ids_start, self._id_width
+        rows = self._index_rows
+        for position in range(self.rows):
+            yield mapping[offset:offset + width].rstrip(b'\0'), rows[position]
+            offset += width
+
+    def close(self):
+        self._columns.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> 'RecordStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def build_from_mock_db(db_path: str, out_path: str) -> int:
+    with open(db_path, 'r') as f:
+        return write_record_store(json.load(f)['users'], out_path)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Build a compact customer record store from mock_db.json')
+    parser.add_argument('db', help='mock_db.json-shaped file')
+    parser.add_argument('out', help='Record store file to write')
+    args = parser.parse_args(argv)
+
+    rows = build_from_mock_db(args.db, args.out)
+    print(f"{rows} customers → {args.out} ({os.path.getsize(args.out)} bytes)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
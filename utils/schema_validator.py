@@ -0,0 +1,109 @@
+"""
+Compiled JSON Schema Validation
+Validates structured model output (tool inputs) against the JSON schema that
+was sent with the tool. The schema is compiled once into nested check
+functions, so validating an answer is a walk over the value with no schema
+interpretation on the hot path.
+
+Supports the subset the tool schemas use: type (object, array, string,
+number, integer, boolean, null), enum, minimum / maximum, required,
+properties, additionalProperties (bool) and items.
+"""
+from typing import Any, Callable, Dict, List
+
+Check = Callable[[Any, str], None]
+
+_TYPES = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None,
+}
+
+
+class SchemaError(ValueError):
+    """A value doesn't match its schema; `path` locates the offending field"""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f'{path or "$"}: {message}')
+        self.path = path
+
+
+def compile_validator(schema: Dict) -> Callable[[Any], Any]:
+    """
+    Validator for `schema`: returns the value unchanged when it matches,
+    raises SchemaError (with the path of the first mismatch) otherwise
+    """
+    check = _compile(schema)
+
+    def validate(value: Any) -> Any:
+        check(value, '')
+        return value
+
+    return validate
+
+
+def _compile(schema: Dict) -> Check:
+    checks: List[Check] = []
+
+    if 'type' in schema:
+        expected = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        type_checks = [_TYPES[name] for name in expected]
+        expected_text = ' or '.join(expected)
+
+        def check_type(value, path):
+            if not any(type_check(value) for type_check in type_checks):
+                raise SchemaError(path, f'expected {expected_text}, got {type(value).__name__}')
+        checks.append(check_type)
+
+    if 'enum' in schema:
+        allowed = frozenset(schema['enum'])
+
+        def check_enum(value, path):
+            if value not in allowed:
+                raise SchemaError(path, f'{value!r} is not one of the allowed values')
+        checks.append(check_enum)
+
+    if 'minimum' in schema or 'maximum' in schema:
+        low, high = schema.get('minimum'), schema.get('maximum')
+
+        def check_range(value, path):
+            if (low is not None and value < low) or (high is not None and value > high):
+                raise SchemaError(path, f'{value!r} is outside [{low}, {high}]')
+        checks.append(check_range)
+
+    if 'properties' in schema or 'required' in schema:
+        properties = {name: _compile(sub) for name, sub in schema.get('properties', {}).items()}
+        required = tuple(schema.get('required', ()))
+        closed = schema.get('additionalProperties') is False
+
+        def check_object(value, path):
+            for name in required:
+                if name not in value:
+                    raise SchemaError(path, f'missing required field {name!r}')
+            for name, field_value in value.items():
+                field_check = properties.get(name)
+                if field_check is not None:
+                    field_check(field_value, f'{path}.{name}')
+                elif closed:
+                    raise SchemaError(path, f'unexpected field {name!r}')
+        checks.append(check_object)
+
+    if 'items' in schema:
+        item_check = _compile(schema['items'])
+
+        def check_items(value, path):
+            for index, item in enumerate(value):
+                item_check(item, f'{path}[{index}]')
+        checks.append(check_items)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path):
+        for check in checks:
+            check(value, path)
+    return check_all
@@ -0,0 +1,476 @@
+"""
+Process-wide Prometheus Metrics
+Counters, gauges and histograms for a headless deployment, served as Prometheus text
+on a local HTTP endpoint.
+
+Multi-process aggregation: set CARELOOP_METRICS_DIR to a shared directory and
+every worker process periodically snapshots its metrics there. The endpoint
+(in any worker, or standalone via `python -m utils.telemetry`) sums all
+snapshots, so the fleet is observed as one.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+METRICS_DIR_ENV = 'CARELOOP_METRICS_DIR'
+METRICS_PORT_ENV = 'CARELOOP_METRICS_PORT'
+DEFAULT_PORT = 9464
+FLUSH_INTERVAL_S = 5.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: dict) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra: dict = None) -> str:
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError(f'{self.name}: counters can only increase')
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        _registry.ensure_flusher()
+
+    def describe(self) -> dict:
+        """Type, help text and label names, so another process can rebuild the metric"""
+        return {'type': self.type_name, 'help': self.documentation, 'labelnames': list(self.labelnames)}
+
+    @classmethod
+    def from_description(cls, name: str, description: dict):
+        return cls(name, description.get('help', ''), tuple(description.get('labelnames', ())))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), v] for k, v in self._values.items()]
+        return {**self.describe(), 'values': values}
+
+    @staticmethod
+    def merge(into: dict, other: dict):
+        totals = {tuple(k): v for k, v in into.get('values', [])}
+        for k, v in other.get('values', []):
+            totals[tuple(k)] = totals.get(tuple(k), 0.0) + v
+        into['values'] = [[list(k), v] for k, v in totals.items()]
+
+    def render(self, snapshot: dict) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted((tuple(k), v) for k, v in snapshot.get('values', []))
+        ]
+
+
+class Gauge(Counter):
+    """
+    Value that can go up and down (e.g. queue depth). Across processes the
+    last reported value of each live process is summed; snapshots of exited
+    processes don't contribute.
+    """
+
+    type_name = 'gauge'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        _registry.ensure_flusher()
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+        _registry.ensure_flusher()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key → [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            else:
+                row[len(self.buckets)] += 1
+            row[-1] += value
+        _registry.ensure_flusher()
+
+    def describe(self) -> dict:
+        """Type, help text, label names and buckets, so another process can rebuild the metric"""
+        return {'type': self.type_name, 'help': self.documentation, 'labelnames': list(self.labelnames),
+                'buckets': list(self.buckets)}
+
+    @classmethod
+    def from_description(cls, name: str, description: dict):
+        return cls(name, description.get('help', ''), tuple(description.get('labelnames', ())),
+                   buckets=description.get('buckets', LATENCY_BUCKETS))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), list(v)] for k, v in self._values.items()]
+        return {**self.describe(), 'values': values}
+
+    @staticmethod
+    def merge(into: dict, other: dict):
+        totals = {tuple(k): list(v) for k, v in into.get('values', [])}
+        for k, v in other.get('values', []):
+            current = totals.get(tuple(k))
+            totals[tuple(k)] = list(v) if current is None else [a + b for a, b in zip(current, v)]
+        into['values'] = [[list(k), v] for k, v in totals.items()]
+
+    def render(self, snapshot: dict) -> List[str]:
+        lines = []
+        for key, row in sorted((tuple(k), v) for k, v in snapshot.get('values', [])):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), row[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, {"le": le})} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(row[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+METRIC_TYPES = {metric_type.type_name: metric_type for metric_type in (Counter, Gauge, Histogram)}
+
+
+def _snapshot_process_alive(filename: str) -> bool:
+    """Whether the process that wrote metrics_<pid>.json is still running"""
+    try:
+        pid = int(filename[len('metrics_'):-len('.json')])
+    except ValueError:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+class MetricsRegistry:
+    """Holds every metric in the process and aggregates snapshots across processes"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._flusher_pid: Optional[int] = None
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.snapshot() for m in metrics}
+
+    # -- multi-process ------------------------------------------------------
+
+    @staticmethod
+    def metrics_dir() -> Optional[str]:
+        return os.getenv(METRICS_DIR_ENV)
+
+    def _snapshot_path(self, directory: str, pid: int = None) -> str:
+        return os.path.join(directory, f'metrics_{pid or os.getpid()}.json')
+
+    def flush(self):
+        """Write this process's snapshot to the shared metrics directory"""
+        directory = self.metrics_dir()
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = self._snapshot_path(directory)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def ensure_flusher(self):
+        """Start the background snapshot thread the first time a metric changes"""
+        pid = os.getpid()
+        # Compare pids so a forked worker starts its own flusher
+        if self._flusher_pid == pid or not self.metrics_dir():
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+
+            def loop():
+                while True:
+                    time.sleep(FLUSH_INTERVAL_S)
+                    try:
+                        self.flush()
+                    except OSError:
+                        pass
+
+            threading.Thread(target=loop, name='careloop-metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def aggregate(self) -> dict:
+        """
+        Sum this process's live metrics with every other process's last snapshot.
+        Snapshots of exited processes are kept, so counters and histograms never
+        go backwards, but their gauges are dropped: a dead worker's queue depth
+        or busy count is not current.
+
+        Metrics this process never registered (the standalone aggregator imports
+        only this module) are rebuilt from the type, help text and buckets each
+        snapshot carries.
+        """
+        combined = self.snapshot()
+        directory = self.metrics_dir()
+        if not directory or not os.path.isdir(directory):
+            return combined
+
+        own_path = self._snapshot_path(directory)
+        for filename in sorted(os.listdir(directory)):
+            path = os.path.join(directory, filename)
+            if not filename.endswith('.json') or path == own_path:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _snapshot_process_alive(filename)
+            for name, snapshot in other.items():
+                metric = self._metric_for(name, snapshot)
+                if metric is None or (not alive and isinstance(metric, Gauge)):
+                    continue
+                metric.merge(combined.setdefault(name, {**metric.describe(), 'values': []}), snapshot)
+        return combined
+
+    def _metric_for(self, name: str, snapshot: dict):
+        """The registered metric `name`, else one rebuilt from its snapshot (None if it can't be)"""
+        metric = self._metrics.get(name)
+        if metric is not None:
+            return metric
+        metric_type = METRIC_TYPES.get(snapshot.get('type'))
+        return metric_type.from_description(name, snapshot) if metric_type else None
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        combined = self.aggregate()
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        # Registered metrics first, then those known only from other processes' snapshots
+        registered = {metric.name for metric in metrics}
+        metrics += [self._metric_for(name, combined[name]) for name in sorted(combined) if name not in registered]
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.render(combined.get(metric.name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+# ---------------------------------------------------------------------------
+# Metric definitions
+# ---------------------------------------------------------------------------
+
+CONVERSATIONS = _registry.register(Counter(
+    'careloop_conversations_total',
+    'Conversations started by a payment failure, by router decision',
+    ('router_decision',)
+))
+INTENTS = _registry.register(Counter(
+    'careloop_intents_total',
+    'Customer intents detected by the extractor',
+    ('intent',)
+))
+STRATEGIES = _registry.register(Counter(
+    'careloop_strategies_total',
+    'Negotiation strategies chosen by the negotiator',
+    ('strategy',)
+))
+PLAN_CHANGES = _registry.register(Counter(
+    'careloop_plan_changes_total',
+    'Subscription plan changes executed by the tool executor',
+    ('to_plan',)
+))
+REVENUE_SAVED = _registry.register(Counter(
+    'careloop_revenue_saved_dollars_total',
+    'Positive revenue_impact of completed conversations (USD)'
+))
+REVENUE_LOST = _registry.register(Counter(
+    'careloop_revenue_lost_dollars_total',
+    'Magnitude of negative revenue_impact of completed conversations (USD)'
+))
+NODE_LATENCY = _registry.register(Histogram(
+    'careloop_node_latency_seconds',
+    'Graph node execution time',
+    ('node',),
+    buckets=LATENCY_BUCKETS
+))
+LLM_TOKENS = _registry.register(Histogram(
+    'careloop_llm_tokens',
+    'Tokens per Claude call',
+    ('task', 'direction'),
+    buckets=TOKEN_BUCKETS
+))
+
+
+def record_revenue_impact(amount: float):
+    """Split a signed revenue_impact into the saved/lost counters"""
+    if amount > 0:
+        REVENUE_SAVED.inc(amount)
+    elif amount < 0:
+        REVENUE_LOST.inc(-amount)
+
+
+def record_llm_usage(task: str, response):
+    """Observe input/output (and prompt cache read/write) token counts from a Claude response, if reported"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    LLM_TOKENS.observe(getattr(usage, 'input_tokens', 0) or 0, task=task, direction='input')
+    LLM_TOKENS.observe(getattr(usage, 'output_tokens', 0) or 0, task=task, direction='output')
+    LLM_TOKENS.observe(getattr(usage, 'cache_read_input_tokens', 0) or 0, task=task, direction='cache_read')
+    LLM_TOKENS.observe(getattr(usage, 'cache_creation_input_tokens', 0) or 0, task=task, direction='cache_write')
+
+
+# ---------------------------------------------------------------------------
+# HTTP endpoint
+# ---------------------------------------------------------------------------
+
+def _make_server(host: str, port: int):
+    """
+    Build the /metrics HTTP server. http.server is imported here rather than at
+    module level: it pulls in the email/http.client packages (~7 MB RSS), which
+    every node process would otherwise pay for without ever serving metrics.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = _registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of the app logs
+
+    return ThreadingHTTPServer((host, port), MetricsHandler)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, host: str = '127.0.0.1'):
+    """
+    Serve /metrics on a background thread. Idempotent, so it is safe to call
+    from Streamlit scripts that re-run on every interaction. Returns None if
+    the port is already taken (e.g. another worker is serving).
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        port = port or int(os.getenv(METRICS_PORT_ENV, DEFAULT_PORT))
+        try:
+            _server = _make_server(host, port)
+        except OSError:
+            return None
+        threading.Thread(target=_server.serve_forever, name='careloop-metrics-http', daemon=True).start()
+        return _server
+
+
+def main(argv=None) -> int:
+    """Standalone aggregator: serve the fleet's metrics from CARELOOP_METRICS_DIR"""
+    parser = argparse.ArgumentParser(description='Serve aggregated CareLoop metrics')
+    parser.add_argument('--port', type=int, default=int(os.getenv(METRICS_PORT_ENV, DEFAULT_PORT)))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--metrics-dir', default=os.getenv(METRICS_DIR_ENV))
+    args = parser.parse_args(argv)
+
+    if not args.metrics_dir:
+        print(f'❌ Set {METRICS_DIR_ENV} or pass --metrics-dir')
+        return 1
+    os.environ[METRICS_DIR_ENV] = args.metrics_dir
+
+    server = _make_server(args.host, args.port)
+    print(f'📈 Serving aggregated metrics on http://{args.host}:{args.port}/metrics')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""
+Tracing and Latency Histograms
+Wraps graph nodes and external calls (LLM, ezyVet, Stripe, DB) in timed spans.
+
+- Node spans are attached to the node's `tool_calls` entries (key 'trace'),
+  with external calls made during the node recorded as child spans
+- Every span duration is also recorded in a process-wide HDR-style histogram
+- Spans and histograms can be exported as OpenTelemetry (OTLP/JSON) payloads
+"""
+import time
+import random
+import hashlib
+import functools
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils.telemetry import NODE_LATENCY
+
+SERVICE_NAME = 'careloop'
+SCOPE_NAME = 'careloop.tracing'
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+
+_active_span: ContextVar[Optional['Span']] = ContextVar('careloop_active_span', default=None)
+
+
+class Span:
+    """A single timed operation. Node spans collect child spans for external calls."""
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent: Optional['Span'] = None, attributes: dict = None):
+        self.name = name
+        self.kind = kind  # 'node', 'llm', 'ezyvet', 'stripe', 'db', 'email', ...
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_span_id = parent.span_id if parent else ''
+        self.attributes = attributes if attributes is not None else {}
+        self.children: List['Span'] = []
+        self.start_unix_nano = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self.duration_ms = 0.0
+        self.status = 'ok'
+
+    def end(self):
+        self.duration_ms = (time.perf_counter_ns() - self._t0) / 1e6
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form stored in tool_calls"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'status': self.status,
+            'start_unix_nano': self.start_unix_nano,
+            'duration_ms': round(self.duration_ms, 3),
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+def turn_trace_id(state: dict) -> str:
+    """
+    Deterministic trace id for one conversation turn.
+    A turn is identified by the customer and how many replies they have sent,
+    so every node in the same graph run shares the trace id.
+    """
+    replies = sum(1 for m in state.get('messages', []) if m.get('role') == 'user')
+    key = f"{state.get('user_id', 'unknown')}:{replies}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# HDR-style latency histograms
+# ---------------------------------------------------------------------------
+
+class LatencyHistogram:
+    """
+    Log-linear bucketed histogram in the spirit of HdrHistogram.
+
+    Values are recorded in microseconds. Each power-of-two range is split into
+    2**(precision_bits - 1) linear sub-buckets, so the relative error of any
+    reported percentile is below 2**-(precision_bits - 1) regardless of scale.
+    """
+
+    def __init__(self, precision_bits: int = 8):
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.sum_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+            self.total_count = 0
+            self.sum_us = 0
+            self.min_us = None
+            self.max_us = 0
+
+    def _bucket_index(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self.precision_bits)
+        return (shift << (self.precision_bits - 1)) + (value_us >> shift)
+
+    def _bucket_bounds(self, index: int) -> tuple:
+        """(lowest, highest) value in microseconds that maps to this bucket"""
+        half = 1 << (self.precision_bits - 1)
+        if index < (half << 1):
+            return index, index
+        shift = (index >> (self.precision_bits - 1)) - 1
+        mantissa = index - (shift << (self.precision_bits - 1))
+        low = mantissa << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, duration_ms: float):
+        value_us = int(duration_ms * 1000)
+        if value_us < 0:
+            value_us = 0
+        shift = value_us.bit_length() - self.precision_bits
+        if shift < 0:
+            shift = 0
+        index = (shift << (self.precision_bits - 1)) + (value_us >> shift)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.total_count += 1
+            self.sum_us += value_us
+            if value_us > self.max_us:
+                self.max_us = value_us
+            if self.min_us is None or value_us < self.min_us:
+                self.min_us = value_us
+
+    def percentile(self, pct: float) -> float:
+        """Value (ms) at the given percentile"""
+        with self._lock:
+            if not self.total_count:
+                return 0.0
+            target = max(1, int(round(pct / 100 * self.total_count)))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= target:
+                    low, high = self._bucket_bounds(index)
+                    return min(high, self.max_us) / 1000
+            return self.max_us / 1000
+
+    def buckets(self) -> List[tuple]:
+        """Sorted (upper_bound_ms, count) pairs for non-empty buckets"""
+        with self._lock:
+            return [
+                (self._bucket_bounds(index)[1] / 1000, self.counts[index])
+                for index in sorted(self.counts)
+            ]
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.total_count,
+            'min_ms': (self.min_us or 0) / 1000,
+            'max_ms': self.max_us / 1000,
+            'mean_ms': round(self.sum_us / self.total_count / 1000, 3) if self.total_count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'p999_ms': self.percentile(99.9)
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+_histograms_started_unix_nano = time.time_ns()
+
+
+def get_histogram(name: str) -> LatencyHistogram:
+    """Process-wide histogram for a node or external call"""
+    histogram = _histograms.get(name)
+    if histogram is not None:
+        return histogram
+    with _histograms_lock:
+        if name not in _histograms:
+            _histograms[name] = LatencyHistogram()
+        return _histograms[name]
+
+
+def latency_summary() -> Dict[str, dict]:
+    """Percentile summary of every histogram, keyed by span name"""
+    with _histograms_lock:
+        names = sorted(_histograms)
+    return {name: get_histogram(name).snapshot() for name in names}
+
+
+def reset_histograms():
+    """Clear all histograms in place (e.g. between benchmark runs)"""
+    global _histograms_started_unix_nano
+    with _histograms_lock:
+        for histogram in _histograms.values():
+            histogram.reset()
+        _histograms_started_unix_nano = time.time_ns()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+class trace_call:
+    """
+    Time an external call. When used inside a traced node, the span is
+    attached to that node's span as a child.
+
+        with trace_call('stripe.update_subscription', kind='stripe') as span:
+            ...
+
+    (A class rather than a @contextmanager generator: this sits on the hot
+    path of every node, and the generator protocol roughly doubles its cost.)
+    """
+    __slots__ = ('span', 'parent')
+
+    def __init__(self, name: str, kind: str = 'external', **attributes):
+        self.parent = _active_span.get()
+        self.span = Span(
+            name, kind,
+            trace_id=self.parent.trace_id if self.parent else '',
+            parent=self.parent,
+            attributes=attributes
+        )
+
+    def __enter__(self) -> 'Span':
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.end()
+        if exc_type is not None:
+            span.status = 'error'
+            span.attributes['error'] = exc_type.__name__
+        get_histogram(span.name).record(span.duration_ms)
+        if self.parent is not None:
+            self.parent.children.append(span)
+        return False
+
+
+def traced_call(name: str, kind: str = 'external'):
+    """Decorator form of trace_call for functions that wrap an external service"""
+    def decorator(fn):
+        histogram = get_histogram(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _active_span.get() is None:
+                # Outside a traced node there is no span to attach to: only time it
+                t0 = time.perf_counter_ns()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.record((time.perf_counter_ns() - t0) / 1e6)
+            with trace_call(name, kind=kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_node(name: str):
+    """
+    Wrap a LangGraph node so its execution is timed and the resulting span is
+    attached to the tool_calls entries the node produced.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(state):
+            span = Span(name, 'node', trace_id=turn_trace_id(state))
+            token = _active_span.set(span)
+            try:
+                result = fn(state)
+            except Exception as e:
+                span.status = 'error'
+                span.attributes['error'] = type(e).__name__
+                raise
+            finally:
+                _active_span.reset(token)
+                span.end()
+                get_histogram(f'node.{name}').record(span.duration_ms)
+                NODE_LATENCY.observe(span.duration_ms / 1000, node=name)
+            return attach_span(state, result, span)
+        return wrapper
+    return decorator
+
+
+def attach_span(state: dict, result: dict, span: Span) -> dict:
+    """
+    Return a copy of a node result whose new tool_calls entries carry the span.
+    Nodes that log nothing get a trace-only entry so the turn waterfall is complete.
+
+    Each new entry is also stamped as an event: a stable `event_id` and the
+    `timestamp` at which the node finished (entries are never rewritten after
+    this, so the Glass Box can cache their rendering by event_id).
+    """
+    previous = state.get('tool_calls', [])
+    produced = result.get('tool_calls', previous)
+    new_entries = produced[len(previous):]
+
+    span_dict = span.to_dict()
+    finished_at = datetime.fromtimestamp(
+        span_dict['start_unix_nano'] / 1e9 + span_dict['duration_ms'] / 1000
+    ).isoformat()
+    if not new_entries:
+        new_entries = [{'agent': span.name, 'trace_only': True}]
+
+    annotated = [
+        {
+            'timestamp': finished_at,
+            **entry,
+            'event_id': f"{span_dict['span_id']}-{i}",
+            'duration_ms': span_dict['duration_ms']
+        }
+        for i, entry in enumerate(new_entries)
+    ]
+    annotated[0]['trace'] = span_dict
+
+    updated = dict(result)
+    updated['tool_calls'] = list(produced[:len(previous)]) + annotated
+    return updated
+
+
+# ---------------------------------------------------------------------------
+# Turn waterfall + OpenTelemetry export
+# ---------------------------------------------------------------------------
+
+def _flatten(span: dict, depth: int = 0) -> List[dict]:
+    rows = [{**{k: v for k, v in span.items() if k != 'children'}, 'depth': depth}]
+    for child in span.get('children', []):
+        rows.extend(_flatten(child, depth + 1))
+    return rows
+
+
+def collect_spans(tool_calls: List[dict], trace_id: str = None) -> List[dict]:
+    """All spans (nodes and their children) in tool_calls, optionally for one trace"""
+    rows = []
+    for call in tool_calls:
+        span = call.get('trace')
+        if span and (trace_id is None or span['trace_id'] == trace_id):
+            rows.extend(_flatten(span))
+    return rows
+
+
+def turn_waterfall(tool_calls: List[dict]) -> List[dict]:
+    """
+    Spans of the most recent turn with start offsets relative to the first span,
+    ready to be drawn as a waterfall.
+    """
+    traced = [call['trace'] for call in tool_calls if call.get('trace')]
+    if not traced:
+        return []
+
+    rows = collect_spans(tool_calls, trace_id=traced[-1]['trace_id'])
+    turn_start = min(row['start_unix_nano'] for row in rows)
+    for row in rows:
+        row['offset_ms'] = round((row['start_unix_nano'] - turn_start) / 1e6, 3)
+    return rows
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> List[dict]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+def _otlp_resource() -> dict:
+    return {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})}
+
+
+def export_spans_otlp(tool_calls: List[dict]) -> dict:
+    """Spans recorded in tool_calls as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for row in collect_spans(tool_calls):
+        end = row['start_unix_nano'] + int(row['duration_ms'] * 1e6)
+        spans.append({
+            'traceId': row['trace_id'],
+            'spanId': row['span_id'],
+            'parentSpanId': row['parent_span_id'],
+            'name': row['name'],
+            'kind': SPAN_KIND_INTERNAL if row['kind'] == 'node' else SPAN_KIND_CLIENT,
+            'startTimeUnixNano': str(row['start_unix_nano']),
+            'endTimeUnixNano': str(end),
+            'attributes': _otlp_attributes({'careloop.span.kind': row['kind'], **row.get('attributes', {})}),
+            'status': {'code': 2 if row['status'] == 'error' else 1}
+        })
+
+    return {
+        'resourceSpans': [{
+            'resource': _otlp_resource(),
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': spans}]
+        }]
+    }
+
+
+def export_histograms_otlp() -> dict:
+    """Latency histograms as an OTLP/JSON ExportMetricsServiceRequest"""
+    now = str(time.time_ns())
+    with _histograms_lock:
+        items = sorted(_histograms.items())
+
+    data_points = []
+    for name, histogram in items:
+        buckets = histogram.buckets()
+        snapshot = histogram.snapshot()
+        data_points.append({
+            'attributes': _otlp_attributes({'span.name': name}),
+            'startTimeUnixNano': str(_histograms_started_unix_nano),
+            'timeUnixNano': now,
+            'count': str(snapshot['count']),
+            'sum': histogram.sum_us / 1000,
+            'min': snapshot['min_ms'],
+            'max': snapshot['max_ms'],
+            # OTLP explicit buckets: one more count than bounds (overflow bucket)
+            'explicitBounds': [upper for upper, _ in buckets],
+            'bucketCounts': [str(count) for _, count in buckets] + ['0']
+        })
+
+    return {
+        'resourceMetrics': [{
+            'resource': _otlp_resource(),
+            'scopeMetrics': [{
+                'scope': {'name': SCOPE_NAME},
+                'metrics': [{
+                    'name': 'careloop.span.duration',
+                    'unit': 'ms',
+                    'histogram': {
+                        'aggregationTemporality': 2,  # CUMULATIVE
+                        'dataPoints': data_points
+                    }
+                }]
+            }]
+        }]
+    }
@@ -2,8 +2,13 @@
 Custom Streamlit UI Components
 """
 import streamlit as st
+import json
 import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from utils.tracing import turn_waterfall
+from agents.offer_policy import router_reasoning
 
 
 def gmail_style_message(message: dict, is_user: bool = False):
@@ -154,71 +159,231 @@ def plan_comparison_table():
     """, unsafe_allow_html=True)
 
 
+# Decision log layout: the newest entries are drawn as expanders; older ones
+# are only rendered, a page at a time, when the user asks for them
+GLASS_BOX_RECENT_ENTRIES = 5
+GLASS_BOX_PAGE_SIZE = 10
+
+# Formatted Glass Box entries keyed by event_id (entries never change once logged)
+_ENTRY_VIEW_CACHE_SIZE = 1024
+_entry_views: "OrderedDict[str, dict]" = OrderedDict()
+# Shared by every Streamlit session thread
+_entry_views_lock = threading.Lock()
+
+
 def glass_box_panel(state: dict):
     """
     Render the "Glass Box" AI reasoning panel
     """
     st.markdown("### 🧠 AI Decision Log")
 
-    # Show tool calls in reverse chronological order
     tool_calls = state.get('tool_calls', [])
 
-    for i, call in enumerate(reversed(tool_calls)):
-        agent = call.get('agent', 'unknown')
-        timestamp = datetime.now().strftime("%H:%M:%S")
-
-        with st.expander(f"🔸 {agent.upper()} - {timestamp}", expanded=(i == 0)):
-            # Router
-            if agent == 'router':
-                st.markdown(f"**Decision:** `{call.get('decision')}`")
-                st.markdown(f"**Risk Score:** `{call.get('risk_score', 0):.2f}`")
-
-                # Payment History Display
-                payment_check = call.get('payment_check', {})
-                if payment_check:
-                    st.markdown("---")
-                    st.markdown("**💳 Payment History Analysis:**")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown(f"- **Risk Score:** `{payment_check.get('risk_score', 'N/A'):.1f}/100`")
-                        st.markdown(f"- **Risk Tier:** `{payment_check.get('risk_tier', 'N/A')}`")
-                        st.markdown(f"- **Reliability:** `{payment_check.get('reliability', 'N/A').upper()}`")
-                    with col2:
-                        st.markdown(f"- **Failure Rate:** `{payment_check.get('failure_rate', 'N/A'):.1f}%`")
-                        st.markdown(f"- **Late Rate:** `{payment_check.get('late_rate', 'N/A'):.1f}%`")
-                        st.markdown(f"- **Total Payments:** `{payment_check.get('total_payments', 'N/A')}`")
-
-                # Medical Check Display
-                medical_check = call.get('medical_check', {})
-                if medical_check:
-                    st.markdown("---")
-                    st.markdown("**🏥 Medical History Check:**")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown(f"- **Urgency Score:** `{medical_check.get('urgency_score', 'N/A'):.1f}/100`")
-                        st.markdown(f"- **Urgency Tier:** `{medical_check.get('urgency_tier', 'N/A')}`")
-                    with col2:
-                        st.markdown(f"- **Adherence:** `{medical_check.get('adherence_score', 'N/A')}%`")
-                        st.markdown(f"- **Critical Meds:** `{medical_check.get('critical_medications', 0)}`")
-
-                st.info(call.get('reasoning', ''))
-
-            # Extractor
-            elif agent == 'extractor':
-                st.markdown(f"**Intent Detected:** `{call.get('intent')}`")
-                st.markdown(f"**Confidence:** `{call.get('confidence', 0):.0%}`")
-                st.success(call.get('reasoning', ''))
-
-            # Negotiator
-            elif agent == 'negotiator':
-                st.markdown(f"**Strategy:** `{call.get('strategy')}`")
-                st.markdown(f"**Message Preview:**")
-                st.text(call.get('message_preview', ''))
-
-            # Tool Executor
-            elif 'tool' in call:
-                st.markdown(f"**API Call:** `{call.get('tool')}`")
-                st.json(call.get('result', {}))
+    trace_waterfall(tool_calls)
+
+    # Trace-only entries exist just to carry timing for the waterfall
+    entries = [call for call in tool_calls if not call.get('trace_only')]
+
+    # Newest first
+    recent = entries[-GLASS_BOX_RECENT_ENTRIES:][::-1]
+    older = entries[:-GLASS_BOX_RECENT_ENTRIES][::-1]
+
+    for i, call in enumerate(recent):
+        glass_box_entry(call, expanded=(i == 0))
+
+    if older and st.checkbox(f"🗂️ Show {len(older)} older events", key="glass_box_show_older"):
+        pages = -(-len(older) // GLASS_BOX_PAGE_SIZE)
+        page = 1
+        if pages > 1:
+            page = st.number_input("Older events page", min_value=1, max_value=pages, value=1, step=1,
+                                   key="glass_box_older_page")
+        start = (int(page) - 1) * GLASS_BOX_PAGE_SIZE
+        for call in older[start:start + GLASS_BOX_PAGE_SIZE]:
+            glass_box_entry(call, expanded=False)
+
+
+def glass_box_entry(call: dict, expanded: bool = False):
+    """
+    Render one decision-log entry from its cached view
+    """
+    view = glass_box_entry_view(call)
+
+    with st.expander(view['title'], expanded=expanded):
+        for kind, content in view['blocks']:
+            if kind == 'markdown':
+                st.markdown(content)
+            elif kind == 'columns':
+                col1, col2 = st.columns(2)
+                col1.markdown(content[0])
+                col2.markdown(content[1])
+            elif kind == 'info':
+                st.info(content)
+            elif kind == 'success':
+                st.success(content)
+            elif kind == 'text':
+                st.text(content)
+            elif kind == 'caption':
+                st.caption(content)
+            elif kind == 'json':
+                st.code(content, language='json')
+
+
+def glass_box_entry_view(call: dict) -> dict:
+    """
+    Title and pre-formatted content blocks for a decision-log entry.
+    Built once per event_id; entries without one (nodes run outside the
+    traced graph) are formatted on every call.
+    """
+    event_id = call.get('event_id')
+    if event_id is not None:
+        with _entry_views_lock:
+            view = _entry_views.get(event_id)
+            if view is not None:
+                _entry_views.move_to_end(event_id)
+                return view
+
+    # Formatted outside the lock; two sessions may build the same view once each
+    view = _build_entry_view(call)
+
+    if event_id is not None:
+        with _entry_views_lock:
+            _entry_views[event_id] = view
+            if len(_entry_views) > _ENTRY_VIEW_CACHE_SIZE:
+                _entry_views.popitem(last=False)
+    return view
+
+
+def _event_time(call: dict) -> str:
+    """HH:MM:SS of the stored event timestamp"""
+    timestamp = call.get('timestamp')
+    if not timestamp:
+        return "--:--:--"
+    return datetime.fromisoformat(timestamp).strftime("%H:%M:%S")
+
+
+def _build_entry_view(call: dict) -> dict:
+    agent = call.get('agent', 'unknown')
+    blocks = []
+
+    # Router
+    if agent == 'router':
+        blocks.append(('markdown', (
+            f"**Decision:** `{call.get('decision')}`\n\n"
+            f"**Risk Score:** `{call.get('risk_score', 0):.2f}`"
+        )))
+
+        # Payment History Display
+        payment_check = call.get('payment_check', {})
+        if payment_check:
+            blocks.append(('markdown', "---\n\n**💳 Payment History Analysis:**"))
+            blocks.append(('columns', (
+                f"- **Risk Score:** `{payment_check.get('risk_score', 'N/A'):.1f}/100`\n"
+                f"- **Risk Tier:** `{payment_check.get('risk_tier', 'N/A')}`\n"
+                f"- **Reliability:** `{payment_check.get('reliability', 'N/A').upper()}`",
+                f"- **Failure Rate:** `{payment_check.get('failure_rate', 'N/A'):.1f}%`\n"
+                f"- **Late Rate:** `{payment_check.get('late_rate', 'N/A'):.1f}%`\n"
+                f"- **Total Payments:** `{payment_check.get('total_payments', 'N/A')}`"
+            )))
+
+        # Medical Check Display
+        medical_check = call.get('medical_check', {})
+        if medical_check:
+            blocks.append(('markdown', "---\n\n**🏥 Medical History Check:**"))
+            blocks.append(('columns', (
+                f"- **Urgency Score:** `{medical_check.get('urgency_score', 'N/A'):.1f}/100`\n"
+                f"- **Urgency Tier:** `{medical_check.get('urgency_tier', 'N/A')}`",
+                f"- **Adherence:** `{medical_check.get('adherence_score', 'N/A')}%`\n"
+                f"- **Critical Meds:** `{medical_check.get('critical_medications', 0)}`"
+            )))
+
+        blocks.append(('info', router_reasoning(call)))
+
+    # Extractor
+    elif agent == 'extractor':
+        blocks.append(('markdown', (
+            f"**Intent Detected:** `{call.get('intent')}`\n\n"
+            f"**Confidence:** `{call.get('confidence', 0):.0%}`"
+        )))
+        blocks.append(('success', call.get('reasoning', '')))
+        blocks.extend(('caption', line) for line in llm_usage_lines(call.get('llm_calls', [])))
+
+    # Negotiator
+    elif agent == 'negotiator':
+        blocks.append(('markdown', f"**Strategy:** `{call.get('strategy')}`\n\n**Message Preview:**"))
+        blocks.append(('text', call.get('message_preview', '')))
+        blocks.extend(('caption', line) for line in llm_usage_lines(call.get('llm_calls', [])))
+
+    # Tool Executor
+    elif 'tool' in call:
+        blocks.append(('markdown', f"**API Call:** `{call.get('tool')}`"))
+        blocks.append(('json', json.dumps(call.get('result', {}), indent=2, default=str)))
+
+    return {
+        'title': f"🔸 {agent.upper()} - {_event_time(call)}",
+        'blocks': blocks
+    }
+
+
+def llm_usage_lines(llm_calls: list) -> list:
+    """
+    One caption line per Claude call: model, tokens, latency and estimated cost
+    """
+    return [
+        f"🤖 {llm_call['model']} · {llm_call['input_tokens']:,} in / {llm_call['output_tokens']:,} out tokens"
+        f"{_cache_note(llm_call)} · {llm_call['latency_ms']:,.0f} ms · ${llm_call['cost_usd']:.4f}"
+        for llm_call in llm_calls
+    ]
+
+
+def _cache_note(llm_call: dict) -> str:
+    read = llm_call.get('cache_read_input_tokens', 0)
+    written = llm_call.get('cache_creation_input_tokens', 0)
+    if read:
+        return f" (+{read:,} cached)"
+    if written:
+        return f" (+{written:,} written to cache)"
+    return ''
+
+
+def trace_waterfall(tool_calls: list):
+    """
+    Render a latency waterfall for the most recent turn: one bar per node,
+    with external calls (LLM, ezyVet, Stripe, DB) nested underneath
+    """
+    rows = turn_waterfall(tool_calls)
+    if not rows:
+        return
+
+    total_ms = max(row['offset_ms'] + row['duration_ms'] for row in rows) or 1.0
+    colors = {
+        'node': '#667eea',
+        'llm': '#764ba2',
+        'ezyvet': '#0F9D58',
+        'stripe': '#1A73E8',
+        'db': '#F4B400',
+        'email': '#DB4437'
+    }
+
+    bars = []
+    for row in rows:
+        left = row['offset_ms'] / total_ms * 100
+        width = max(row['duration_ms'] / total_ms * 100, 0.5)
+        color = colors.get(row['kind'], '#999')
+        label = row['name'] if row['kind'] == 'node' else f"↳ {row['name']}"
+        bars.append(f"""
+        <div style="display: flex; align-items: center; margin: 2px 0; font-size: 12px;">
+            <div style="width: 38%; padding-left: {row['depth'] * 12}px; white-space: nowrap;
+                        overflow: hidden; text-overflow: ellipsis;">{label}</div>
+            <div style="width: 50%; position: relative; height: 14px; background-color: #EEE; border-radius: 3px;">
+                <div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 100%;
+                            background-color: {color}; border-radius: 3px;"></div>
+            </div>
+            <div style="width: 12%; text-align: right;">{row['duration_ms']:,.0f} ms</div>
+        </div>
+        """)
+
+    with st.expander(f"⏱️ Turn Waterfall - {total_ms:,.0f} ms", expanded=False):
+        st.markdown("".join(bars), unsafe_allow_html=True)
 
 
 def metric_card(label: str, value: str, delta: str = None, help_text: str = None):
@@ -248,6 +413,7 @@ def metric_card(label: str, value: str, delta: str = None, help_text: str = None
 def user_table(users_data: list):
     """
     Render a table of users with their status
+    (one page of rows from utils.customer_store.CustomerStore.query)
     """
     import pandas as pd
 
@@ -276,6 +442,10 @@ def user_table(users_data: list):
             ),
             "Status": st.column_config.Column(
                 width="medium",
+            ),
+            "Retention Score": st.column_config.NumberColumn(
+                format="%.1f",
+                width="medium",
             )
         }
     )